@@ -0,0 +1,82 @@
+"""
+Time the analytics engine on synthetic history.
+
+    python benchmarks/analytics_bench.py [years] [budget_ms]
+
+Builds `years` of daily rows for two games (default 10), then times loading
+them into a PlayHistory and every statistic the reports use. Exits non-zero
+if any step takes longer than `budget_ms` (default 50).
+"""
+
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from play_counter.analytics import PlayHistory, burn_down, projection  # noqa: E402
+from play_counter.pricing import Pricing  # noqa: E402
+
+GAMES = ["maimai", "chunithm"]
+
+
+def synthetic_rows(years: int) -> list[tuple[date, str, int]]:
+    rng = np.random.default_rng(0)
+    start = date(2000, 1, 1)
+    days = years * 365
+    rows = []
+    for game in GAMES:
+        plays = rng.poisson(2, days) * (rng.random(days) < 0.4)
+        rows += [(start + timedelta(days=i), game, int(p)) for i, p in enumerate(plays)]
+    return rows
+
+
+def timed(label: str, fn, budget_ms: float) -> bool:
+    start = time.perf_counter()
+    fn()
+    elapsed = (time.perf_counter() - start) * 1000
+    ok = elapsed <= budget_ms
+    print(f"{'✅' if ok else '❌'} {label:<16} {elapsed:8.2f} ms")
+    return ok
+
+
+def main(years: int = 10, budget_ms: float = 50.0) -> int:
+    rows = synthetic_rows(years)
+    print(f"📊 {len(rows):,} rows ({years} years × {len(GAMES)} games)")
+    history = PlayHistory.from_rows(rows, GAMES)
+    # A price rise a year before the end, so spend is priced per day
+    pricing = Pricing.from_config(
+        [{"price": 40}, {"price": 50, "since": f"{history.end.year - 1}-01-01"}]
+    )
+    end = history.end
+    month = end - timedelta(days=29)
+    year = end - timedelta(days=364)
+
+    checks = [
+        ("load", lambda: PlayHistory.from_rows(rows, GAMES)),
+        ("totals", lambda: history.totals(month, end)),
+        (
+            "rolling 7/30",
+            lambda: (
+                history.rolling(7, history.start, end),
+                history.rolling(30, history.start, end),
+            ),
+        ),
+        ("streaks", lambda: history.streaks(end)),
+        ("weekdays", lambda: history.weekday_totals(history.start, end)),
+        ("percentiles", lambda: history.percentiles(history.start, end)),
+        (
+            "projection",
+            lambda: projection(history, year, end + timedelta(days=30), end),
+        ),
+        ("burn-down", lambda: burn_down(history, pricing, 10_000, month, end)),
+    ]
+    results = [timed(label, fn, budget_ms) for label, fn in checks]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:3])))
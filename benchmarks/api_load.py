@@ -0,0 +1,180 @@
+"""
+Load-test the read API against a local Postgres.
+
+    BENCH_DATABASE_URL=postgresql://... python benchmarks/api_load.py
+        [--clients 50] [--seconds 10] [--seed-days 730] [--writes 3]
+
+Seeds `--seed-days` of synthetic plays for a throwaway "loadtest" account,
+starts the API in-process on a free port and has `--clients` dashboards
+poll a mix of endpoints for `--seconds`, revalidating with If-None-Match
+like a browser would. `--writes` upserts spread over the run invalidate
+the cache through NOTIFY, as the daily scrape would. The account's rows
+are deleted afterwards.
+
+Prints requests per second, latency percentiles, the share of 304s and
+cache hits, and the number of read queries run for all those requests.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+ACCOUNT = "loadtest"
+ENDPOINTS = [
+    "/spend/daily",
+    "/spend/weekly",
+    "/spend/monthly",
+    "/spend/games?start={year_start}",
+    "/history?start={month_start}",
+]
+
+
+def _configure():
+    # Must happen before play_counter.config is read
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("❌ Set BENCH_DATABASE_URL to a local Postgres")
+    os.environ["DATABASE_URL"] = url
+
+
+async def _seed(days: int, games: list[str]):
+    from play_counter.db import acquire, ensure_schema, upsert_rows
+
+    await ensure_schema()
+    today = date.today()
+    rows, cumulative = [], {game: 0 for game in games}
+    for offset in range(days, -1, -1):
+        day = today - timedelta(days=offset)
+        for game in games:
+            plays = random.choice((0, 0, 0, 2, 4, 6))
+            cumulative[game] += plays
+            rows.append((ACCOUNT, game, day, plays, cumulative[game]))
+    async with acquire() as conn, conn.transaction():
+        await upsert_rows(conn, rows)
+    print(f"🌱 Seeded {len(rows)} rows for {ACCOUNT}")
+
+
+async def _cleanup():
+    from play_counter.db import acquire
+
+    async with acquire() as conn, conn.transaction():
+        await conn.execute("DELETE FROM public.plays WHERE account = $1", ACCOUNT)
+        await conn.execute(
+            "DELETE FROM public.play_rollups WHERE account = $1", ACCOUNT
+        )
+
+
+async def _write_today(games: list[str]):
+    from play_counter.db import acquire, upsert_rows
+
+    today = date.today()
+    async with acquire() as conn, conn.transaction():
+        cumulative = await conn.fetchval(
+            "SELECT max(cumulative) FROM public.plays WHERE account = $1", ACCOUNT
+        )
+        await upsert_rows(
+            conn,
+            [
+                (ACCOUNT, game, today, random.randint(1, 9), cumulative)
+                for game in games
+            ],
+        )
+
+
+async def _client(session, base: str, deadline: float, results: dict):
+    etags: dict[str, str] = {}
+    today = date.today()
+    paths = [
+        path.format(
+            year_start=today.replace(month=1, day=1), month_start=today.replace(day=1)
+        )
+        for path in ENDPOINTS
+    ]
+    while time.perf_counter() < deadline:
+        path = random.choice(paths)
+        url = f"{base}{path}{'&' if '?' in path else '?'}account={ACCOUNT}"
+        headers = {"If-None-Match": etags[url]} if url in etags else {}
+        start = time.perf_counter()
+        async with session.get(url, headers=headers) as response:
+            await response.read()
+        results["latencies"].append(time.perf_counter() - start)
+        results["statuses"][response.status] = (
+            results["statuses"].get(response.status, 0) + 1
+        )
+        if "ETag" in response.headers:
+            etags[url] = response.headers["ETag"]
+
+
+async def run(clients: int, seconds: float, seed_days: int, writes: int) -> int:
+    import aiohttp
+
+    from play_counter.api import build_app, start_server
+    from play_counter.db import close_pool
+    from play_counter.metrics import metrics
+    from play_counter.utils.games import tracked_games
+
+    games = tracked_games()
+    await _seed(seed_days, games)
+    metrics.reset()
+    runner = await start_server(build_app(), "127.0.0.1", 0)
+    port = runner.addresses[0][1]
+    base = f"http://127.0.0.1:{port}"
+
+    results = {"latencies": [], "statuses": {}}
+    try:
+        deadline = time.perf_counter() + seconds
+        connector = aiohttp.TCPConnector(limit=clients)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            polling = asyncio.gather(
+                *(_client(session, base, deadline, results) for _ in range(clients))
+            )
+            for _ in range(writes):
+                await asyncio.sleep(seconds / (writes + 1))
+                await _write_today(games)
+            await polling
+    finally:
+        await runner.cleanup()
+        await _cleanup()
+        await close_pool()
+
+    latencies = sorted(results["latencies"])
+    total = len(latencies)
+    counts = {name: 0 for name in ("hits", "misses", "invalidations")}
+    for (name, _), value in metrics.counters.items():
+        if name.startswith("api_cache_"):
+            counts[name[len("api_cache_") : -len("_total")]] += value
+    print(f"📊 {clients} client(s) for {seconds:g}s, {writes} write(s)")
+    print(f"   requests        {total} ({total / seconds:,.0f}/s)")
+    print(f"   latency p50     {statistics.median(latencies) * 1000:8.2f} ms")
+    print(f"   latency p95     {latencies[int(total * 0.95)] * 1000:8.2f} ms")
+    print(f"   latency max     {latencies[-1] * 1000:8.2f} ms")
+    print(f"   statuses        {results['statuses']}")
+    print(f"   cache hits      {counts['hits'] / total:.1%}")
+    print(f"   read queries    {counts['misses']:.0f}")
+    print(f"   invalidations   {counts['invalidations']:.0f}")
+    return 0 if set(results["statuses"]) <= {200, 304} else 1
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--seed-days", type=int, default=730)
+    parser.add_argument("--writes", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    _configure()
+    return asyncio.run(run(args.clients, args.seconds, args.seed_days, args.writes))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Check how long each command takes to import what it runs.
+
+    python benchmarks/import_budget.py [--repeat N]
+
+For every command in `main.COMMANDS` this runs
+
+    python -X importtime -c "import main; main.load_command('<command>')"
+
+in a fresh interpreter, adds up the self time of every imported module
+and keeps the fastest of `repeat` runs. The script exits non-zero if a
+command goes over its budget in BUDGETS_MS, or imports a module it must
+not load (e.g. Playwright for a report).
+
+Dummy settings are filled in for anything not set in the environment, as
+some modules read them when imported.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from main import COMMANDS  # noqa: E402
+
+# Milliseconds, with headroom for slower CI runners
+BUDGETS_MS = {
+    "run-once": 1500,
+    "daemon": 1500,
+    "scrape": 1500,
+    "report weekly": 900,
+    "report monthly": 900,
+    "notify": 700,
+    "backfill": 700,
+    "serve": 1200,
+}
+# Heavy dependencies a command has no use for
+FORBIDDEN = {
+    "report weekly": ("playwright", "asyncpg"),
+    "report monthly": ("playwright", "asyncpg"),
+    "notify": ("playwright", "asyncpg", "numpy"),
+    "backfill": ("playwright", "numpy"),
+    "serve": ("playwright", "numpy"),
+}
+DUMMY_SETTINGS = {
+    "DISCORD_WEBHOOK_URL": "http://127.0.0.1:9/webhook",
+    "DATABASE_URL": "postgresql://budget@127.0.0.1:9/budget",
+    "USERNAME": "budget",
+    "PASSWORD": "budget",
+}
+
+
+def measure(command: str) -> tuple[float, set[str]]:
+    """Return (total import milliseconds, top-level packages imported)."""
+    code = f"import main; main.load_command({command!r})"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        env={**DUMMY_SETTINGS, **os.environ},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total_us = 0
+    packages = set()
+    # "import time:       self [us] |  cumulative | imported package"
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        total_us += int(self_us)
+        packages.add(name.strip().split(".")[0])
+    return total_us / 1000, packages
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    failures = []
+    print("⏱️ Import time per command:")
+    for command in COMMANDS:
+        runs = [measure(command) for _ in range(args.repeat)]
+        ms, packages = min(runs, key=lambda run: run[0])
+        budget = BUDGETS_MS[command]
+        print(f"   {command:<16} {ms:8.1f} ms (budget {budget} ms)")
+        if ms > budget:
+            failures.append(f"{command} took {ms:.1f} ms, budget {budget} ms")
+        for package in FORBIDDEN.get(command, ()):
+            if package in packages:
+                failures.append(f"{command} imports {package}")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ Every command is within its import budget")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""
+Time the whole daily pipeline offline, against local stand-ins.
+
+    python benchmarks/pipeline_bench.py [--iterations N] [--threshold 0.25]
+                                        [--save-baseline]
+
+The SEGA pages and the Discord webhook are served by `stubs.StubServer`.
+Results go to a throwaway local store (see `play_counter.local_store`).
+Postgres is taken from BENCH_DATABASE_URL (e.g. a local or Docker
+Postgres). Without it the database is unreachable and the run takes the
+offline path: every scrape logs in through Playwright, since sessions
+can't be cached. Either way Playwright's Firefox must be installed.
+
+Each iteration runs `main.main(["run-once"])` and records:
+- the wall time of the run,
+- the time of each stage, from the `stage_seconds` metric,
+- the seconds spent sleeping in the login flow (`sleep_seconds_total`),
+  which must be zero against the stub: every wait is on a condition.
+
+Peak memory is the high-water resident set size from getrusage: of this
+process, and of the largest child process (the Playwright driver or one
+of the Firefox processes it starts; `ru_maxrss` reports the largest
+single process, not the tree's sum). Children only count once they have
+exited, which the browser does at the end of every run.
+
+The medians and the peak memory are compared with baseline.json, and the
+script exits non-zero if any of them is worse by more than `threshold`.
+--save-baseline records the current results instead.
+
+No baseline.json is committed: it has to be measured with --save-baseline
+on the machine that will run the comparison (with Firefox installed, and
+Postgres if the online path matters). Until then there is no gate and the
+script fails after printing its results. Nothing runs this benchmark in
+CI; .github/workflows/tests.yml only runs the test suite.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from stubs import PASSWORD, PLAY_COUNTS, StubServer, point_urls_at  # noqa: E402
+
+BASELINE = Path(__file__).parent / "baseline.json"
+MIN_STAGE_SECONDS = 0.05  # shorter stages are too noisy to compare
+
+
+def _configure(server: StubServer, workdir: str):
+    # Must happen before play_counter.config is imported
+    os.environ.update(
+        {
+            "DATABASE_URL": os.environ.get(
+                "BENCH_DATABASE_URL", "postgresql://bench@127.0.0.1:9/bench"
+            ),
+            "DISCORD_WEBHOOK_URL": server.webhook_url,
+            "WEEKREPORT_WEBHOOK": server.webhook_url,
+            "ACCOUNTS": json.dumps(
+                [{"name": "default", "username": "bench", "password": PASSWORD}]
+            ),
+            "LOCAL_STORE_PATH": os.path.join(workdir, "bench.sqlite3"),
+            "METRICS_JSONL": os.path.join(workdir, "metrics.jsonl"),
+            "METRICS_PROM": os.path.join(workdir, "metrics.prom"),
+        }
+    )
+    point_urls_at(server.base_url)
+
+
+async def _iteration(server: StubServer) -> dict:
+    from main import main
+    from play_counter.metrics import metrics
+
+    metrics.reset()
+    scraped = sum(server.hits[f"{game} playerData"] for game in PLAY_COUNTS)
+    start = time.perf_counter()
+    await main(["run-once"])
+    seconds = time.perf_counter() - start
+
+    # The metrics were reset above, so each stage has one observation
+    stages = {
+        dict(labels)["stage"]: hist.sum
+        for (name, labels), hist in metrics.histograms.items()
+        if name == "stage_seconds"
+    }
+    slept = sum(
+        value
+        for (name, _), value in metrics.counters.items()
+        if name == "sleep_seconds_total"
+    )
+    return {
+        "seconds": seconds,
+        "slept": slept,
+        "stages": stages,
+        "scraped": sum(server.hits[f"{g} playerData"] for g in PLAY_COUNTS) - scraped,
+    }
+
+
+async def _iterations(server: StubServer, count: int) -> list[dict]:
+    # One event loop for every iteration, like the daemon
+    return [await _iteration(server) for _ in range(count)]
+
+
+def _peak_rss_mb(who: int) -> float:
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    unit = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(who).ru_maxrss * unit / 1024 / 1024
+
+
+def _summarize(runs: list[dict]) -> dict:
+    stage_names = sorted({name for run in runs for name in run["stages"]})
+    return {
+        "iterations": len(runs),
+        "seconds": statistics.median(run["seconds"] for run in runs),
+        "peak_mb": _peak_rss_mb(resource.RUSAGE_SELF),
+        "browser_peak_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN),
+        "stages": {
+            name: statistics.median(run["stages"].get(name, 0) for run in runs)
+            for name in stage_names
+        },
+    }
+
+
+def _compare(result: dict, baseline: dict, threshold: float) -> list[str]:
+    """Return one line per figure that regressed by more than `threshold`."""
+    checks = [("total", result["seconds"], baseline["seconds"], "s")]
+    checks.append(("peak memory", result["peak_mb"], baseline["peak_mb"], " MB"))
+    checks.append(
+        (
+            "browser memory",
+            result["browser_peak_mb"],
+            baseline["browser_peak_mb"],
+            " MB",
+        )
+    )
+    checks += [
+        (f"stage {name}", result["stages"].get(name, 0), before, "s")
+        for name, before in baseline["stages"].items()
+        if before >= MIN_STAGE_SECONDS
+    ]
+    return [
+        f"{label}: {before:.3f}{unit} → {now:.3f}{unit}"
+        for label, now, before, unit in checks
+        if now > before * (1 + threshold)
+    ]
+
+
+def _print(result: dict):
+    print(f"📊 {result['iterations']} iteration(s)")
+    print(f"   {'total':<16} {result['seconds']:8.3f}s (median)")
+    print(f"   {'peak memory':<16} {result['peak_mb']:8.1f} MB")
+    print(f"   {'browser memory':<16} {result['browser_peak_mb']:8.1f} MB")
+    for name, seconds in result["stages"].items():
+        print(f"   {name:<16} {seconds:8.3f}s")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="allowed slowdown or memory growth as a fraction (default 0.25)",
+    )
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    with StubServer() as server, tempfile.TemporaryDirectory() as workdir:
+        _configure(server, workdir)
+        runs = asyncio.run(_iterations(server, args.iterations))
+        if any(run["scraped"] < len(PLAY_COUNTS) for run in runs):
+            print("❌ Not every game reached the stub Player Data page")
+            return 1
+        if any(run["slept"] for run in runs):
+            slept = max(run["slept"] for run in runs)
+            print(
+                f"❌ The login flow slept {slept:.1f}s instead of waiting on the page"
+            )
+            return 1
+        print(f"📨 Stub webhook received {len(server.webhook_posts)} post(s)")
+
+    result = _summarize(runs)
+    _print(result)
+
+    if args.save_baseline:
+        BASELINE.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"💾 Baseline written to {BASELINE}")
+        return 0
+    if not BASELINE.exists():
+        print(
+            f"❌ No {BASELINE.name}, nothing was compared: run with --save-baseline"
+            " on the reference machine to record one"
+        )
+        return 1
+
+    regressions = _compare(result, json.loads(BASELINE.read_text()), args.threshold)
+    for line in regressions:
+        print(f"❌ Regression: {line}")
+    if not regressions:
+        print(f"✅ Within {args.threshold:.0%} of the baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Local stand-ins for the SEGA sites and the Discord webhook.
+
+`StubServer` serves the pages in benchmarks/fixtures for both games from
+one local HTTP server:
+
+    /<game>/login          SEGA ID form; submitting with PASSWORD sets a
+                           cookie and goes to the home page, any other
+                           password shows the login error
+    /<game>/home/          home page
+    /<game>/playerData/    cumulative play count (needs the cookie,
+                           otherwise redirects to the login page)
+    /<game>/record/        recent plays (needs the cookie)
+    /webhook               accepts Discord posts (JSON or multipart with
+                           attachments) with 204
+
+`point_urls_at()` rewrites LOGIN_URLS/HOME_URLS/PLAYER_DATA_URLS/
+PLAYLOG_URLS in place so the scraper talks to the stub instead.
+"""
+
+import json
+import threading
+from email import policy
+from email.parser import BytesParser
+from collections import Counter
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+FIXTURES = Path(__file__).parent / "fixtures"
+SESSION_COOKIE = "clal=bench"
+
+AGREE_CHECKBOX = {
+    "maimai": (
+        '<label class="c-form__label--bg agree">'
+        '<input type="checkbox" id="agree"> I agree to the terms</label>'
+    ),
+    "chunithm": (
+        '<label class="c-form__label--bg">'
+        '<input type="checkbox" id="agree"> '
+        "Agree to the terms of use for Aime service</label>"
+    ),
+}
+PLAY_COUNTS = {"maimai": 1200, "chunithm": 800}
+PASSWORD = "bench"  # anything else gets the login error
+
+
+def _fixture(name: str, **values) -> bytes:
+    html = (FIXTURES / name).read_text(encoding="utf-8")
+    for key, value in values.items():
+        html = html.replace("{" + key + "}", str(value))
+    return html.encode("utf-8")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "StubServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes = b"", headers: dict | None = None):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parts = self.path.split("?")[0].strip("/").split("/")
+        game, page = parts[0], "/".join(parts[1:])
+        if game not in PLAY_COUNTS:
+            return self._send(404)
+        logged_in = SESSION_COOKIE in (self.headers.get("Cookie") or "")
+
+        if logged_in or page in ("login", "home"):
+            self.server.hits[f"{game} {page}"] += 1
+        if page == "login":
+            home = f"{self.server.base_url}/{game}/home/"
+            body = _fixture(
+                "login.html", agree=AGREE_CHECKBOX[game], home=home, password=PASSWORD
+            )
+            return self._send(200, body)
+        if page == "home":
+            return self._send(200, _fixture("home.html"))
+        if not logged_in:
+            login = f"{self.server.base_url}/{game}/login"
+            return self._send(302, headers={"Location": login})
+        if page == "playerData":
+            count = self.server.play_counts[game]
+            return self._send(200, _fixture(f"{game}_player_data.html", count=count))
+        if page == "record":
+            today = date.today().strftime("%Y/%m/%d")
+            return self._send(200, _fixture(f"{game}_playlog.html", date=today))
+        self._send(404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        if self.path.strip("/") != "webhook":
+            return self._send(404)
+        content_type = self.headers.get("Content-Type") or ""
+        if content_type.startswith("multipart/"):
+            payload = _multipart_payload(content_type, body)
+        else:
+            payload = json.loads(body or b"{}")
+        self.server.webhook_posts.append(payload)
+        self._send(204)
+
+
+def _multipart_payload(content_type: str, body: bytes) -> dict:
+    """payload_json of a multipart post, with the attachment names under "files"."""
+    message = BytesParser(policy=policy.default).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body
+    )
+    payload, files = {}, []
+    for part in message.iter_parts():
+        if part.get_param("name", header="content-disposition") == "payload_json":
+            payload = json.loads(part.get_payload(decode=True))
+        else:
+            files.append(part.get_filename())
+    return {**payload, "files": files}
+
+
+class StubServer(ThreadingHTTPServer):
+    """SEGA and Discord stub on 127.0.0.1, served from a background thread."""
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.base_url = f"http://127.0.0.1:{self.server_address[1]}"
+        self.hits: Counter = Counter()
+        self.webhook_posts: list[dict] = []
+        self.play_counts = dict(PLAY_COUNTS)
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def webhook_url(self) -> str:
+        return f"{self.base_url}/webhook"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+def point_urls_at(base_url: str):
+    """Send every scraper URL to the stub at `base_url`."""
+    from play_counter.utils import constants
+
+    for game in PLAY_COUNTS:
+        constants.LOGIN_URLS[game] = f"{base_url}/{game}/login"
+        constants.HOME_URLS[game] = f"{base_url}/{game}/home/"
+        constants.PLAYER_DATA_URLS[game] = f"{base_url}/{game}/playerData/"
+        constants.PLAYLOG_URLS[game] = f"{base_url}/{game}/record/"
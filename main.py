@@ -1,48 +1,116 @@
+"""
+Command line entry point.
+
+    python main.py [run-once]             scrape, store, sync, notify and report
+    python main.py daemon                 run-once on the SCRAPE_TIMES schedule
+    python main.py scrape                 scrape, store and sync only
+    python main.py report weekly|monthly  send a report from the local store
+    python main.py notify                 send today's notification again
+    python main.py backfill [--dry-run]   repair gaps and anomalies in Postgres
+    python main.py serve [--host --port]  serve spend data as JSON for dashboards
+
+Each command imports only the modules it runs (see COMMANDS), and checks
+only the settings it needs before doing anything, so e.g. a report never
+loads Playwright or asyncpg and doesn't need DATABASE_URL.
+"""
+
+import argparse
 import asyncio
+import importlib
 import sys
-from datetime import datetime, timedelta
-
-from play_counter.config import CONFIG
-from play_counter.daily_play_notifier import send_notification
-from play_counter.db import get_cumulative, test_db_connection, upsert_play_data
-from play_counter.reports.monthly import generate_monthly_report
-from play_counter.reports.weekly import generate_weekly_report
-from play_counter.scraper import fetch_cumulative
-
-
-async def main():
-    # Test DB connection first
-    if not await test_db_connection():
-        print("Exiting: Database is unreachable.")
-        sys.exit(1)
-
-    today = datetime.today()
-    today_str = today.strftime("%Y-%m-%d")
-    yesterday_str = (today - timedelta(days=1)).strftime("%Y-%m-%d")
-
-    if today.day == 1:
-        await generate_monthly_report()
-    if today.weekday() == 0:
-        await generate_weekly_report()
-
-    tasks = {game: fetch_cumulative(game) for game, enable in CONFIG.items() if enable}
-    cumulative_values = await asyncio.gather(*tasks.values())
-    cumulative = dict(zip(tasks.keys(), cumulative_values))
-
-    prev = {game: await get_cumulative(game, yesterday_str) for game in cumulative}
-    new = {game: max(0, cumulative[game] - prev[game]) for game in cumulative}
-
-    await upsert_play_data(
-        today_str,
-        new.get("maimai", 0),
-        new.get("chunithm", 0),
-        cumulative.get("maimai", 0),
-        cumulative.get("chunithm", 0),
+
+from play_counter import config
+
+SCRAPE_SETTINGS = ("DISCORD_WEBHOOK_URL", "DATABASE_URL", "ACCOUNTS")
+
+# command -> ("module:function", settings it can't run without)
+COMMANDS = {
+    "run-once": ("play_counter.daily:run", SCRAPE_SETTINGS),
+    "daemon": ("play_counter.daily:run_daemon", SCRAPE_SETTINGS),
+    "scrape": ("play_counter.daily:run_scrape", SCRAPE_SETTINGS),
+    "report weekly": (
+        "play_counter.reports.weekly:generate_weekly_report",
+        ("DISCORD_WEBHOOK_URL",),
+    ),
+    "report monthly": (
+        "play_counter.reports.monthly:generate_monthly_report",
+        ("DISCORD_WEBHOOK_URL",),
+    ),
+    "notify": (
+        "play_counter.daily_play_notifier:notify_today",
+        ("DISCORD_WEBHOOK_URL",),
+    ),
+    "backfill": ("play_counter.backfill:run_backfill", ("DATABASE_URL",)),
+    "serve": ("play_counter.api:serve", ("DATABASE_URL",)),
+}
+
+
+def load_command(command: str):
+    """Import the module behind `command` and return its entry function."""
+    module, _, function = COMMANDS[command][0].partition(":")
+    return getattr(importlib.import_module(module), function)
+
+
+def parse_args(argv=None) -> tuple[str, dict]:
+    """Return the COMMANDS key and the keyword arguments for its function."""
+    parser = argparse.ArgumentParser(description="Track maimai/CHUNITHM spending.")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.add_parser("run-once", help="run the daily job once (the default)")
+    commands.add_parser("daemon", help="keep running on the SCRAPE_TIMES schedule")
+    commands.add_parser("scrape", help="scrape and store, without notifying")
+    report = commands.add_parser("report", help="send the weekly or monthly report")
+    report.add_argument("period", choices=("weekly", "monthly"))
+    commands.add_parser("notify", help="send today's play notification")
+    backfill = commands.add_parser(
+        "backfill",
+        help="scan the whole history for missing days and anomalies and repair them",
+    )
+    backfill.add_argument(
+        "--dry-run", action="store_true", help="only report what would be repaired"
     )
+    serve = commands.add_parser("serve", help="serve spend data as a JSON API")
+    serve.add_argument("--host", help="address to listen on (default API_HOST)")
+    serve.add_argument("--port", type=int, help="port to listen on (default API_PORT)")
+    args = parser.parse_args(argv)
+
+    if args.command is None:
+        return "run-once", {}
+    if args.command == "report":
+        return f"report {args.period}", {}
+    if args.command == "backfill":
+        return "backfill", {"dry_run": args.dry_run}
+    if args.command == "serve":
+        return "serve", {"host": args.host, "port": args.port}
+    return args.command, {}
+
+
+async def main(argv=None) -> int:
+    command, kwargs = parse_args(argv)
+
+    absent = config.missing(*COMMANDS[command][1])
+    if absent:
+        print(f"❌ `{command}` needs {', '.join(absent)} (environment or .env)")
+        return 2
+
+    try:
+        await load_command(command)(**kwargs)
+    finally:
+        # Only clean up what the command actually loaded
+        if "play_counter.notifications" in sys.modules:
+            from play_counter.notifications import outbox
+
+            # Deliver notifications, reports and failure alerts as merged posts
+            await outbox.flush()
+        if "play_counter.db" in sys.modules:
+            from play_counter.db import close_pool
+
+            await close_pool()
+        if "play_counter.metrics" in sys.modules:
+            from play_counter.metrics import metrics
 
-    send_notification("chunithm", new.get("chunithm", 0))
-    send_notification("maimai", new.get("maimai", 0))
+            metrics.flush()
+    return 0
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    sys.exit(asyncio.run(main()))
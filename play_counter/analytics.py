@@ -0,0 +1,158 @@
+"""
+In-memory play history for reports.
+
+`load_history()` reads an account's daily rows from the local store (see
+`local_store`) in one query and lays them out as a dense (days × games)
+NumPy matrix indexed by date ordinal, with zeros for days without a row.
+Every statistic below is a vectorized pass over that matrix, so new report
+lines cost no extra SQL.
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+
+from play_counter.config import DEFAULT_ACCOUNT
+from play_counter.local_store import get_play_rows
+from play_counter.pricing import Pricing
+
+
+class PlayHistory:
+    """
+    Daily plays per game from `start` onwards.
+
+    `plays[i, j]` is the number of plays of `games[j]` on `start + i` days.
+    Dates outside the loaded range count as zero plays.
+    """
+
+    def __init__(self, start: date, games: list[str], plays: np.ndarray):
+        self.start = start
+        self.games = list(games)
+        self.plays = plays
+
+    @classmethod
+    def from_rows(cls, rows, games: list[str]) -> "PlayHistory":
+        """Build from (play_date, game, new_plays) rows in any order."""
+        games = list(games)
+        column = {game: j for j, game in enumerate(games)}
+        rows = [row for row in rows if row[1] in column]
+        if not rows:
+            return cls(date.today(), games, np.zeros((0, len(games)), np.int32))
+
+        ordinals = np.fromiter(
+            (row[0].toordinal() for row in rows), np.int64, len(rows)
+        )
+        columns = np.fromiter((column[row[1]] for row in rows), np.int64, len(rows))
+        values = np.fromiter((row[2] for row in rows), np.int32, len(rows))
+        origin = int(ordinals.min())
+        plays = np.zeros((int(ordinals.max()) - origin + 1, len(games)), np.int32)
+        np.add.at(plays, (ordinals - origin, columns), values)
+        return cls(date.fromordinal(origin), games, plays)
+
+    @property
+    def end(self) -> date:
+        """Last loaded day."""
+        return self.start + timedelta(days=len(self.plays) - 1)
+
+    def _index(self, day: date) -> int:
+        return day.toordinal() - self.start.toordinal()
+
+    def daily(self, start: date, end: date) -> np.ndarray:
+        """(days × games) plays from `start` to `end` inclusive, zero-padded."""
+        first, last = self._index(start), self._index(end) + 1
+        out = np.zeros((max(last - first, 0), len(self.games)), np.int32)
+        lo, hi = max(first, 0), min(last, len(self.plays))
+        if lo < hi:
+            out[lo - first : hi - first] = self.plays[lo:hi]
+        return out
+
+    def totals(self, start: date, end: date) -> dict[str, int]:
+        """Plays per game from `start` to `end` inclusive."""
+        sums = self.daily(start, end).sum(axis=0)
+        return {game: int(total) for game, total in zip(self.games, sums)}
+
+    def rolling(self, days: int, start: date, end: date) -> np.ndarray:
+        """
+        Total plays (all games) over the `days` days ending on each day from
+        `start` to `end`.
+        """
+        per_day = self.daily(start - timedelta(days=days - 1), end).sum(axis=1)
+        running = np.concatenate(([0], np.cumsum(per_day, dtype=np.int64)))
+        return running[days:] - running[:-days]
+
+    def streaks(self, end: date) -> tuple[int, int]:
+        """(current, longest) run of consecutive days with plays, up to `end`."""
+        played = self.daily(self.start, end).sum(axis=1) > 0
+        if not played.any():
+            return 0, 0
+        # Boundaries of every run of played days
+        edges = np.diff(np.concatenate(([0], played.astype(np.int8), [0])))
+        starts, stops = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+        lengths = stops - starts
+        current = int(lengths[-1]) if played[-1] else 0
+        return current, int(lengths.max())
+
+    def weekday_totals(self, start: date, end: date) -> np.ndarray:
+        """Plays (all games) per weekday, Monday first."""
+        per_day = self.daily(start, end).sum(axis=1)
+        weekdays = (np.arange(len(per_day)) + start.weekday()) % 7
+        return np.bincount(weekdays, weights=per_day, minlength=7).astype(np.int64)
+
+    def percentiles(self, start: date, end: date, qs=(50, 90)) -> dict[int, float]:
+        """Percentiles of plays per day (all games) over days that had plays."""
+        per_day = self.daily(start, end).sum(axis=1)
+        played = per_day[per_day > 0]
+        if not len(played):
+            return {q: 0.0 for q in qs}
+        return {q: float(v) for q, v in zip(qs, np.percentile(played, qs))}
+
+
+def projection(history: PlayHistory, start: date, end: date, today: date) -> float:
+    """Plays expected from `start` to `end` if the pace so far continues past `today`."""
+    length = (end - start).days + 1
+    elapsed = min((today - start).days + 1, length)
+    if elapsed <= 0:
+        return 0.0
+    so_far = history.daily(start, start + timedelta(days=elapsed - 1)).sum()
+    return float(so_far) * length / elapsed
+
+
+def daily_spend(
+    history: PlayHistory, pricing: Pricing, start: date, end: date
+) -> np.ndarray:
+    """(days × games) THB spent from `start` to `end`, at each day's price."""
+    plays = history.daily(start, end)
+    cost = np.empty(plays.shape)
+    for j, game in enumerate(history.games):
+        # Each price applies from its first day until the next one takes over
+        for day, per_play in pricing.changes(game, start, end):
+            cost[(day - start).days :, j] = per_play
+    return plays * cost
+
+
+def burn_down(
+    history: PlayHistory,
+    pricing: Pricing,
+    budget: float,
+    start: date,
+    end: date,
+    games: list[str] | None = None,
+) -> np.ndarray:
+    """
+    Budget left (THB) at the end of each day from `start` to `end`, with
+    plays at each day's price. Only `games` count against it, if given.
+    """
+    spend = daily_spend(history, pricing, start, end)
+    if games is not None:
+        spend = spend[:, [j for j, game in enumerate(history.games) if game in games]]
+    return budget - np.cumsum(spend.sum(axis=1))
+
+
+async def load_history(
+    games: list[str], account: str | None = DEFAULT_ACCOUNT, since: date | None = None
+) -> PlayHistory:
+    """
+    Read `account`'s daily plays of `games` (from `since`, if given) in one
+    query. With `account` None, every account's plays are added together.
+    """
+    return PlayHistory.from_rows(await get_play_rows(games, account, since), games)
@@ -0,0 +1,286 @@
+"""
+Read-only JSON API over public.plays for dashboards (`python main.py serve`).
+
+    GET /spend/daily      plays and THB per day and game
+    GET /spend/weekly     plays and THB per week (from Monday) and game
+    GET /spend/monthly    plays and THB per month and game
+    GET /spend/games      plays and THB per game over the whole range
+    GET /history          daily rows with the cumulative count
+    GET /health
+
+Every endpoint takes `start` and `end` (ISO dates; by default the last 30
+days, 12 weeks or 12 months up to today), `account` and `game` (repeatable,
+default: every tracked game). Spend is priced per day by `pricing`.
+
+Reads go through the `db` connection pool. Responses are cached in
+process by path and query, for up to API_CACHE_TTL seconds and
+API_CACHE_SIZE entries, with the least recently used dropped first.
+Concurrent misses for the same key share one query. The cache is cleared
+as soon as Postgres announces a write on `db.PLAYS_CHANGED_CHANNEL`, and
+again whenever the listening connection comes back after a drop, so
+polling dashboards cost one query per change rather than one per poll.
+Every response has an ETag, and a matching If-None-Match gets an empty
+304.
+"""
+
+import asyncio
+import hashlib
+import json
+import signal
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+
+from aiohttp import web
+
+from play_counter.config import (
+    API_CACHE_SIZE,
+    API_CACHE_TTL,
+    API_HOST,
+    API_PORT,
+    DEFAULT_ACCOUNT,
+)
+from play_counter.db import PLAYS_CHANGED_CHANNEL, get_daily_rows, listen
+from play_counter.metrics import metrics
+from play_counter.pricing import load_pricing
+from play_counter.utils.date_helpers import period_start
+from play_counter.utils.games import tracked_games
+
+
+class ResponseCache:
+    """LRU of (etag, body) by key; entries expire `ttl` seconds after they're stored."""
+
+    def __init__(self, max_entries: int = API_CACHE_SIZE, ttl: float = API_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.generation = 0  # bumped by clear() so in-flight results aren't stored
+        self._entries: OrderedDict[str, tuple[float, str, bytes]] = OrderedDict()
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+    def get(self, key: str) -> tuple[str, bytes] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, etag, body = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return etag, body
+
+    def put(self, key: str, body: bytes, generation: int) -> tuple[str, bytes]:
+        etag = f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+        if generation == self.generation:
+            self._entries[key] = (time.monotonic() + self.ttl, etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag, body
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+
+    async def fetch(self, key: str, build) -> tuple[str, bytes]:
+        """Cached (etag, body) for `key`, calling `build()` once on a miss."""
+        hit = self.get(key)
+        if hit is not None:
+            metrics.inc("api_cache_hits_total")
+            return hit
+        if key in self._in_flight:
+            metrics.inc("api_cache_hits_total")
+            in_flight = self._in_flight[key]
+            try:
+                return await asyncio.shield(in_flight)
+            except asyncio.CancelledError:
+                if not in_flight.cancelled():
+                    raise  # this request was cancelled, not the shared one
+            # Whoever was building it got cancelled; build it here instead
+            return await self.fetch(key, build)
+
+        metrics.inc("api_cache_misses_total")
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            generation = self.generation
+            body = json.dumps(await build(), separators=(",", ":")).encode()
+            result = self.put(key, body, generation)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # retrieved here if nobody else was waiting
+            raise
+        finally:
+            # Cancelled (or anything else not caught above): release the waiters
+            if not future.done():
+                future.cancel()
+            del self._in_flight[key]
+
+
+def _not_modified(request: web.Request, etag: str) -> bool:
+    header = request.headers.get("If-None-Match", "")
+    return header.strip() == "*" or etag in (tag.strip() for tag in header.split(","))
+
+
+def _bad_request(message: str) -> web.HTTPBadRequest:
+    return web.HTTPBadRequest(
+        text=json.dumps({"error": message}), content_type="application/json"
+    )
+
+
+def _date_arg(request: web.Request, name: str, default: date) -> date:
+    value = request.query.get(name)
+    if value is None:
+        return default
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise _bad_request(f"`{name}` must be a YYYY-MM-DD date, got {value!r}")
+
+
+def _range(request: web.Request, period: str | None) -> tuple[date, date]:
+    """The requested `start`/`end`, by default the last 30 days, 12 weeks or 12 months."""
+    end = _date_arg(request, "end", date.today())
+    if period == "week":
+        default = period_start("week", end) - timedelta(weeks=11)
+    elif period == "month":
+        default = period_start("month", end)
+        for _ in range(11):
+            default = period_start("month", default - timedelta(days=1))
+    else:
+        default = end - timedelta(days=29)
+    start = _date_arg(request, "start", default)
+    if start > end:
+        raise _bad_request("`start` is after `end`")
+    return start, end
+
+
+async def _rows(request: web.Request, period: str | None = None):
+    start, end = _range(request, period)
+    games = request.query.getall("game", None) or tracked_games()
+    account = request.query.get("account", DEFAULT_ACCOUNT)
+    return start, end, await get_daily_rows(start, end, games, account)
+
+
+def _spend(rows, period: str | None) -> list[dict]:
+    """Plays and THB per (day or period start, game), priced per day."""
+    pricing = load_pricing()
+    totals: dict[tuple[date, str], list] = {}
+    for row in rows:
+        day = row["play_date"]
+        key = (period_start(period, day) if period else day, row["game"])
+        total = totals.setdefault(key, [0, 0.0])
+        total[0] += row["new_plays"]
+        total[1] += row["new_plays"] * pricing.per_play(row["game"], day)
+    return [
+        {"start": day.isoformat(), "game": game, "plays": plays, "spend": round(thb, 2)}
+        for (day, game), (plays, thb) in sorted(totals.items())
+    ]
+
+
+def _spend_endpoint(period: str | None):
+    async def build(request: web.Request):
+        start, end, rows = await _rows(request, period)
+        return {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "rows": _spend(rows, period),
+        }
+
+    return build
+
+
+async def _games(request: web.Request):
+    start, end, rows = await _rows(request)
+    by_game: dict[str, dict] = {}
+    for row in _spend(rows, None):
+        total = by_game.setdefault(row["game"], {"plays": 0, "spend": 0.0})
+        total["plays"] += row["plays"]
+        total["spend"] = round(total["spend"] + row["spend"], 2)
+    return {"start": start.isoformat(), "end": end.isoformat(), "games": by_game}
+
+
+async def _history(request: web.Request):
+    start, end, rows = await _rows(request)
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "rows": [
+            {
+                "date": row["play_date"].isoformat(),
+                "game": row["game"],
+                "new_plays": row["new_plays"],
+                "cumulative": row["cumulative"],
+            }
+            for row in rows
+        ],
+    }
+
+
+def _cached(build):
+    """Serve `build(request)` as JSON through the app's ResponseCache."""
+
+    async def handler(request: web.Request) -> web.Response:
+        cache: ResponseCache = request.app["cache"]
+        etag, body = await cache.fetch(request.path_qs, lambda: build(request))
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if _not_modified(request, etag):
+            metrics.inc("api_not_modified_total")
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=body, content_type="application/json", headers=headers)
+
+    return handler
+
+
+async def _health(request: web.Request) -> web.Response:
+    return web.json_response({"ok": True})
+
+
+async def _listen_for_writes(app: web.Application):
+    def changed(accounts: str | None):
+        app["cache"].clear()
+        metrics.inc("api_cache_invalidations_total")
+
+    async with listen(PLAYS_CHANGED_CHANNEL, changed):
+        yield
+
+
+def build_app(cache: ResponseCache | None = None) -> web.Application:
+    app = web.Application()
+    app["cache"] = cache or ResponseCache()
+    app.cleanup_ctx.append(_listen_for_writes)
+    app.router.add_get("/spend/daily", _cached(_spend_endpoint(None)))
+    app.router.add_get("/spend/weekly", _cached(_spend_endpoint("week")))
+    app.router.add_get("/spend/monthly", _cached(_spend_endpoint("month")))
+    app.router.add_get("/spend/games", _cached(_games))
+    app.router.add_get("/history", _cached(_history))
+    app.router.add_get("/health", _health)
+    return app
+
+
+async def start_server(
+    app: web.Application, host: str = API_HOST, port: int = API_PORT
+) -> web.AppRunner:
+    """Start serving `app`; call `cleanup()` on the returned runner to stop."""
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+async def serve(host: str | None = None, port: int | None = None):
+    """Serve the API until SIGINT/SIGTERM."""
+    host, port = host or API_HOST, port or API_PORT
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    runner = await start_server(build_app(), host, port)
+    print(f"🌐 Serving spend data on http://{host}:{port}")
+    try:
+        await stop.wait()
+    finally:
+        await runner.cleanup()
+    print("👋 API stopped")
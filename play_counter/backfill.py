@@ -0,0 +1,102 @@
+"""
+Whole-history gap and anomaly repair for public.plays.
+
+Reads every row once, ordered per (account, game), and compares each day
+with the previous reading:
+
+- days missing between two readings are filled with `fill_gap`,
+- a day whose new_plays disagrees with the change in cumulative is
+  recomputed,
+- a cumulative that goes down is reported but left alone.
+
+All repairs are written as one bulk upsert, which also corrects the rollups.
+"""
+
+import sys
+
+from play_counter.config import GAP_STRATEGY
+from play_counter.db import acquire, ensure_schema, test_db_connection, upsert_rows
+from play_counter.local_store import (
+    count_unsynced,
+    mirror_from_postgres,
+    sync_to_postgres,
+)
+from play_counter.utils.gap_fill import fill_gap
+
+_HISTORY_QUERY = """
+    SELECT account, game, play_date, new_plays, cumulative,
+           LAG(play_date) OVER w AS prev_date,
+           LAG(cumulative) OVER w AS prev_cumulative
+    FROM public.plays
+    WINDOW w AS (PARTITION BY account, game ORDER BY play_date)
+    ORDER BY account, game, play_date
+"""
+
+
+def _check_row(row, strategy: str) -> tuple[list[tuple], str | None]:
+    """Return the (repairs, anomaly) for one history row."""
+    key = f"{row['account']}/{row['game']} {row['play_date']}"
+    if row["prev_date"] is None:
+        if row["new_plays"] and row["new_plays"] == row["cumulative"]:
+            return [], f"{key}: first row counts all {row['cumulative']} lifetime plays"
+        return [], None
+
+    if row["cumulative"] < row["prev_cumulative"]:
+        return [], (
+            f"{key}: cumulative went down "
+            f"({row['prev_cumulative']} → {row['cumulative']})"
+        )
+
+    filled = fill_gap(
+        row["prev_date"],
+        row["prev_cumulative"],
+        row["play_date"],
+        row["cumulative"],
+        strategy,
+    )
+    if len(filled) == 1 and filled[0][1] == row["new_plays"]:
+        return [], None
+    return [(row["account"], row["game"], *day) for day in filled], None
+
+
+async def backfill(dry_run: bool = False, strategy: str = GAP_STRATEGY) -> int:
+    """Scan the whole table, repair what can be repaired and return the anomaly count."""
+    repairs, anomalies = [], []
+    async with acquire() as conn, conn.transaction():
+        async for row in conn.cursor(_HISTORY_QUERY):
+            fixed, anomaly = _check_row(row, strategy)
+            repairs += fixed
+            if anomaly:
+                anomalies.append(anomaly)
+
+        for anomaly in anomalies:
+            print(f"⚠️ {anomaly}")
+        for account, game, day, new_plays, cumulative in repairs:
+            print(
+                f"🩹 {account}/{game} {day}: new {new_plays}, cumulative {cumulative}"
+            )
+
+        if repairs and not dry_run:
+            await upsert_rows(conn, repairs)
+
+    verb = "Would repair" if dry_run else "Repaired"
+    print(f"✅ {verb} {len(repairs)} row(s), {len(anomalies)} anomalies to review")
+    return len(anomalies)
+
+
+async def run_backfill(dry_run: bool):
+    if not await test_db_connection():
+        print("Exiting: Database is unreachable.")
+        sys.exit(1)
+    await ensure_schema()
+    if dry_run:
+        # A dry run writes nothing, so pending local rows aren't pushed or scanned
+        pending = await count_unsynced()
+        if pending:
+            print(f"ℹ️ {pending} local row(s) not synced yet, left out of this scan")
+        await backfill(dry_run)
+        return
+    # Repairs are made in Postgres; push pending local rows first, re-copy after
+    await sync_to_postgres()
+    await backfill(dry_run)
+    await mirror_from_postgres(full=True)
@@ -0,0 +1,88 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager, nullcontext
+
+from playwright.async_api import async_playwright
+
+from play_counter.metrics import metrics
+
+
+class BrowserPool:
+    """
+    Shares one Firefox process across every scrape in a run.
+
+    Playwright and the browser start lazily on the first call to `context()`,
+    so a run that never needs a browser never pays for one. Each caller gets
+    its own isolated `BrowserContext`, so games never share cookies and a
+    retry only pays for a fresh context rather than a fresh browser.
+
+    Usage:
+        async with BrowserPool() as pool:
+            async with pool.context("maimai") as context:
+                page = await context.new_page()
+    """
+
+    def __init__(self, headless: bool = True, max_contexts: int | None = None):
+        self.headless = headless
+        self.timings: dict[str, dict[str, float]] = {}
+        self._playwright = None
+        self._browser = None
+        self._lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(max_contexts) if max_contexts else None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _get_browser(self):
+        # Only one coroutine may launch; the rest wait and reuse it. A browser
+        # that crashed mid-run is relaunched on the next request.
+        async with self._lock:
+            if self._browser is None or not self._browser.is_connected():
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                start = time.perf_counter()
+                with metrics.span("browser_launch"):
+                    self._browser = await self._playwright.firefox.launch(
+                        headless=self.headless
+                    )
+                print(f"🚀 Firefox launched in {time.perf_counter() - start:.2f}s")
+            return self._browser
+
+    @asynccontextmanager
+    async def context(self, game: str, **context_options):
+        """
+        Yield a fresh browser context for `game`, closing it afterwards.
+
+        With `max_contexts` set, callers beyond the limit wait for a slot.
+        """
+        async with self._slots or nullcontext():
+            start = time.perf_counter()
+            browser = await self._get_browser()
+            context = await browser.new_context(**context_options)
+            self.record(game, "launch", time.perf_counter() - start)
+            try:
+                yield context
+            finally:
+                await context.close()
+
+    def record(self, game: str, stage: str, seconds: float):
+        """Store the duration of `stage` for `game`, keeping the latest attempt."""
+        self.timings.setdefault(game, {})[stage] = seconds
+
+    def print_timings(self):
+        for game, stages in self.timings.items():
+            summary = ", ".join(
+                f"{stage} {secs:.2f}s" for stage, secs in stages.items()
+            )
+            print(f"⏱️ {game}: {summary}")
@@ -0,0 +1,209 @@
+"""
+Spending limits, checked every time plays are written to the local store.
+
+BUDGETS (see config) is a JSON list of rules:
+
+    {"limit": 3000}                                      month, all games
+    {"period": "week", "game": "maimai", "limit": 600}
+    {"period": "custom", "start": "2025-12-20", "end": "2026-01-05",
+     "limit": 5000, "name": "Holidays", "thresholds": [0.5, 1]}
+
+Optional keys are "account" (default: every account), "game" (default:
+every game), "thresholds" (fractions of the limit that trigger an alert,
+default 0.5, 0.8 and 1) and "name".
+
+The spend of each (rule, period) is kept in the local store's
+budget_totals table. `apply()` is called by `local_store` with the change
+in new_plays of every row it writes. It adds each change, priced by
+`pricing`, to the totals of the rules it falls under, so an update costs
+O(rules) and never re-reads the history. A total is computed from the
+plays table only once, the first time its (rule, period) is seen. That
+covers new periods, new rules and changed rules or prices, because a rule's
+id includes its settings and the pricing.
+
+For a period that isn't over yet, `apply()` returns an alert when the
+spend crosses a threshold. It also alerts once when the pace so far would
+overrun the limit by the end of the period.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import cache
+
+from play_counter import config
+from play_counter.pricing import load_pricing
+from play_counter.utils.date_helpers import period_start
+from play_counter.utils.games import display_name
+
+DEFAULT_THRESHOLDS = (0.5, 0.8, 1.0)
+FORECAST_MIN_DAYS = 3  # don't extrapolate from the first days of a period
+
+
+@dataclass(frozen=True)
+class BudgetRule:
+    limit: float
+    period: str = "month"  # "week", "month" or "custom"
+    game: str | None = None
+    account: str | None = None
+    start: date | None = None  # custom periods only
+    end: date | None = None
+    thresholds: tuple[float, ...] = DEFAULT_THRESHOLDS
+    name: str = ""
+
+    @classmethod
+    def from_config(cls, entry: dict) -> "BudgetRule":
+        rule = cls(
+            limit=entry["limit"],
+            period=entry.get("period", "month"),
+            game=entry.get("game"),
+            account=entry.get("account"),
+            start=date.fromisoformat(entry["start"]) if "start" in entry else None,
+            end=date.fromisoformat(entry["end"]) if "end" in entry else None,
+            thresholds=tuple(sorted(entry.get("thresholds", DEFAULT_THRESHOLDS))),
+            name=entry.get("name", ""),
+        )
+        if rule.period not in ("week", "month", "custom"):
+            raise ValueError(f"Unknown budget period: {rule.period}")
+        if rule.period == "custom" and not (rule.start and rule.end):
+            raise ValueError("A custom budget period needs `start` and `end`")
+        return rule
+
+    @property
+    def label(self) -> str:
+        if self.name:
+            return self.name
+        scope = display_name(self.game) if self.game else "Total"
+        return f"{scope} {self.period}ly budget"
+
+    def window(self, day: date) -> tuple[date, date] | None:
+        """First and last day of the rule's period containing `day`, if any."""
+        if self.period == "custom":
+            return (self.start, self.end) if self.start <= day <= self.end else None
+        start = period_start(self.period, day)
+        if self.period == "week":
+            return start, start + timedelta(days=6)
+        next_month = (start + timedelta(days=32)).replace(day=1)
+        return start, next_month - timedelta(days=1)
+
+    def covers(self, account: str, game: str) -> bool:
+        return self.account in (None, account) and self.game in (None, game)
+
+
+@cache
+def load_rules() -> list[tuple[str, BudgetRule]]:
+    """(id, rule) for every rule in BUDGETS."""
+    pricing = repr(load_pricing().prices)
+    rules = [BudgetRule.from_config(entry) for entry in config.BUDGETS]
+    return [
+        (hashlib.sha1(f"{rule!r} {pricing}".encode()).hexdigest()[:12], rule)
+        for rule in rules
+    ]
+
+
+def _seed(conn, rule_id: str, rule: BudgetRule, window: tuple[date, date]):
+    """Compute a (rule, period) total from the plays table, once."""
+    pricing = load_pricing()
+    spent = 0.0
+    for row in conn.execute(
+        """
+        SELECT account, game, play_date, new_plays FROM plays
+        WHERE play_date BETWEEN ? AND ?
+        """,
+        (window[0].isoformat(), window[1].isoformat()),
+    ):
+        if rule.covers(row["account"], row["game"]):
+            day = date.fromisoformat(row["play_date"])
+            spent += row["new_plays"] * pricing.per_play(row["game"], day)
+    conn.execute(
+        "INSERT INTO budget_totals (rule, period_start, spent) VALUES (?, ?, ?)",
+        (rule_id, window[0].isoformat(), spent),
+    )
+
+
+def _evaluate(conn, key: tuple[str, str], rule: BudgetRule, window, today: date):
+    """Alerts for one (rule, period) whose total just changed."""
+    start, end = window
+    if end < today:
+        return []  # a past period was corrected, nothing to warn about
+    spent, alerted, forecast_alerted = conn.execute(
+        """
+        SELECT spent, alerted, forecast_alerted FROM budget_totals
+        WHERE rule = ? AND period_start = ?
+        """,
+        key,
+    ).fetchone()
+
+    alerts = []
+    crossed = [t for t in rule.thresholds if t > alerted and spent >= t * rule.limit]
+    if crossed:
+        conn.execute(
+            "UPDATE budget_totals SET alerted = ? WHERE rule = ? AND period_start = ?",
+            (max(crossed), *key),
+        )
+        alerts.append(
+            f"💸 **{rule.label}**: {spent:,.0f} of {rule.limit:,.0f} THB spent "
+            f"({spent / rule.limit:.0%}) with {(end - today).days} day(s) to go"
+        )
+
+    length = (end - start).days + 1
+    elapsed = (today - start).days + 1
+    if not forecast_alerted and spent < rule.limit and FORECAST_MIN_DAYS <= elapsed:
+        projected = spent * length / elapsed
+        if projected > rule.limit:
+            conn.execute(
+                """
+                UPDATE budget_totals SET forecast_alerted = 1
+                WHERE rule = ? AND period_start = ?
+                """,
+                key,
+            )
+            alerts.append(
+                f"📈 **{rule.label}**: on pace for {projected:,.0f} THB by "
+                f"{end:%d %b}, over the {rule.limit:,.0f} THB limit"
+            )
+    return alerts
+
+
+def apply(conn, changes: list[tuple[str, str, date, int]], today=None) -> list[str]:
+    """
+    Add (account, game, play_date, change in new_plays) to the running totals.
+
+    Runs inside the local store's write transaction, after the plays rows
+    were written. Returns the alert messages the changes triggered.
+    """
+    rules = load_rules()
+    if not rules or not changes:
+        return []
+    pricing = load_pricing()
+    today = today or date.today()
+
+    touched = {}
+    seeded = set()  # totals computed from plays that already include `changes`
+    for account, game, day, change in changes:
+        for rule_id, rule in rules:
+            window = rule.window(day)
+            if window is None or not rule.covers(account, game):
+                continue
+            key = (rule_id, window[0].isoformat())
+            if key not in touched:
+                touched[key] = rule, window
+                if not conn.execute(
+                    "SELECT 1 FROM budget_totals WHERE rule = ? AND period_start = ?",
+                    key,
+                ).fetchone():
+                    _seed(conn, rule_id, rule, window)
+                    seeded.add(key)
+            if key not in seeded:
+                conn.execute(
+                    """
+                    UPDATE budget_totals SET spent = spent + ?
+                    WHERE rule = ? AND period_start = ?
+                    """,
+                    (change * pricing.per_play(game, day), *key),
+                )
+
+    alerts = []
+    for key, (rule, window) in touched.items():
+        alerts += _evaluate(conn, key, rule, window, today)
+    return alerts
@@ -1,13 +1,120 @@
-from envparse import env
+"""
+Settings for the tracker.
 
-env.read_envfile()
+Values read from the environment (or a .env file) are resolved on first
+access through the module-level `__getattr__`, so importing this module is
+free and a command only fails on the secrets it actually uses. Commands
+call `missing()` up front to report every absent setting at once.
+"""
 
-DISCORD_WEBHOOK_URL = env("DISCORD_WEBHOOK_URL")
-WEEKREPORT_WEBHOOK = env.str("WEEKREPORT_WEBHOOK", default=DISCORD_WEBHOOK_URL)
-DATABASE_URL = env("DATABASE_URL")
-USERNAME = env("USERNAME")
-PASSWORD = env("PASSWORD")
+from envparse import ConfigurationError, env
+
+_envfile_read = False
+
+
+def _accounts():
+    accounts = env.json("ACCOUNTS", default=None)
+    if accounts is None:
+        accounts = [
+            {
+                "name": DEFAULT_ACCOUNT,
+                "username": env("USERNAME"),
+                "password": env("PASSWORD"),
+            }
+        ]
+    return accounts
+
+
+_SETTINGS = {
+    "DISCORD_WEBHOOK_URL": lambda: env("DISCORD_WEBHOOK_URL"),
+    "WEEKREPORT_WEBHOOK": lambda: env.str(
+        "WEEKREPORT_WEBHOOK", default=env("DISCORD_WEBHOOK_URL")
+    ),
+    "DATABASE_URL": lambda: env("DATABASE_URL"),
+    # Accounts to scrape, as a JSON list of {"name", "username", "password"}
+    # objects. Without ACCOUNTS, USERNAME/PASSWORD form a single "default" account.
+    "ACCOUNTS": _accounts,
+    # Upper bound on (account, game) scrapes in flight and on open browser contexts
+    "MAX_CONCURRENT_SCRAPES": lambda: env.int("MAX_CONCURRENT_SCRAPES", default=4),
+    "MAX_BROWSER_CONTEXTS": lambda: env.int("MAX_BROWSER_CONTEXTS", default=2),
+    # Also store individual plays from the recent-play (playlog) pages
+    "INGEST_PLAYLOG": lambda: env.bool("INGEST_PLAYLOG", default=True),
+    # SQLite file every run writes to first; synced to DATABASE_URL when reachable
+    "LOCAL_STORE_PATH": lambda: env.str(
+        "LOCAL_STORE_PATH", default="play_counter.sqlite3"
+    ),
+    # How plays are attributed when days are missing between two readings:
+    # "spread" splits them evenly over the gap, "today" credits the latest day
+    "GAP_STRATEGY": lambda: env.str("GAP_STRATEGY", default="spread"),
+    # Daemon mode (`python main.py daemon`): local times of day to scrape, when
+    # the weekly (Monday) and monthly (1st) reports go out, and the random delay
+    # in seconds added to every scheduled run
+    "SCRAPE_TIMES": lambda: env.list("SCRAPE_TIMES", default=["22:00"]),
+    "REPORT_TIME": lambda: env.str("REPORT_TIME", default="22:00"),
+    "SCHEDULE_JITTER": lambda: env.int("SCHEDULE_JITTER", default=300),
+    # Price of a credit over time, per game or for all games, including bundles
+    # (see play_counter.pricing), as a JSON list. The default is 40 THB a credit.
+    "PRICING": lambda: env.json("PRICING", default=[{"price": 40}]),
+    # Spending limits as a JSON list, e.g. [{"period": "month", "limit": 3000},
+    # {"period": "week", "game": "maimai", "limit": 600}]. See play_counter.budget
+    "BUDGETS": lambda: env.json("BUDGETS", default=[]),
+    # Rendered report charts, reused when a report is sent again
+    "CHART_CACHE_DIR": lambda: env.str("CHART_CACHE_DIR", default=".chart_cache"),
+    # Read API (`python main.py serve`): where it listens, and how long and how
+    # many responses it caches between writes
+    "API_HOST": lambda: env.str("API_HOST", default="127.0.0.1"),
+    "API_PORT": lambda: env.int("API_PORT", default=8080),
+    "API_CACHE_TTL": lambda: env.int("API_CACHE_TTL", default=60),
+    "API_CACHE_SIZE": lambda: env.int("API_CACHE_SIZE", default=256),
+    # Span events (JSON lines, appended) and the latest counters/histograms
+    # (Prometheus text format) written at the end of every run
+    "METRICS_JSONL": lambda: env.str("METRICS_JSONL", default="metrics.jsonl"),
+    "METRICS_PROM": lambda: env.str("METRICS_PROM", default="metrics.prom"),
+    # Playwright tracing: "on-retry" traces attempts after the first and keeps the
+    # trace only if the attempt fails, "always" keeps every trace, "off" disables it
+    "TRACE_MODE": lambda: env.str("TRACE_MODE", default="on-retry"),
+    # Set BLOCK_RESOURCES=false to load everything while scraping, e.g. to
+    # compare traffic before and after
+    "BLOCK_RESOURCES": lambda: env.bool("BLOCK_RESOURCES", default=True),
+}
+
+
+def __getattr__(name: str):
+    global _envfile_read
+    if name not in _SETTINGS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if not _envfile_read:
+        env.read_envfile()
+        _envfile_read = True
+    value = _SETTINGS[name]()
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def missing(*names: str) -> list[str]:
+    """Return those of `names` that can't be resolved from the environment."""
+    absent = []
+    for name in names:
+        if name in globals():
+            continue
+        try:
+            __getattr__(name)
+        except ConfigurationError:
+            absent.append(name)
+    return absent
+
+
+DEFAULT_ACCOUNT = "default"
+# Games to track; everything downstream of the scraper is driven by this
 CONFIG = {"chunithm": True, "maimai": True}
+# Scraping engines in fallback order: "http" reuses the saved session without
+# a browser, "playwright" logs in with Firefox when that isn't enough
+SCRAPE_ENGINES = ["http", "playwright"]
+
+# Requests aborted while scraping with Playwright (unless BLOCK_RESOURCES=false)
+BLOCKED_RESOURCE_TYPES = ["image", "font", "media"]
+# Sub-resources from any other host (analytics, ad and avatar CDNs) are aborted
+ALLOWED_HOSTS = ["am-all.net", "chunithm-net-eng.com", "maimaidx-eng.com"]
 
 NOTIFICATION_CONFIG = {
     "default": {
@@ -19,12 +126,14 @@ NOTIFICATION_CONFIG = {
         "avatar_url": "https://cdn.discordapp.com/attachments/917303163470635018/1381649633981239407/GCaygD2XUAAFTrl.png?ex=684848fe&is=6846f77e&hm=5e7af379f28414de436e5ebf133581eb3a5b94a78b010f3b79d9b86278148007&",
     },
     "maimai": {
+        "display_name": "maimai",
         "username": "毎日みのり",
         "avatar_url": "https://cdn.discordapp.com/attachments/917303163470635018/1383463722483449859/3a9fa41c9b0ef014.png?ex=684ee27e&is=684d90fe&hm=5581ac98a03f9559cd04a3034116ddd255d1077db5a65deafa4c9b2662ef2606&",
         "message_template": "**{game}**: You played **{new_plays}** credit(s) today!",
         "emoji": "🎵",
     },
     "chunithm": {
+        "display_name": "CHUNITHM",
         "username": "毎日みのり",
         "avatar_url": "https://cdn.discordapp.com/attachments/917303163470635018/1383463722483449859/3a9fa41c9b0ef014.png?ex=684ee27e&is=684d90fe&hm=5581ac98a03f9559cd04a3034116ddd255d1077db5a65deafa4c9b2662ef2606&",
         "message_template": "**{game}**: You played **{new_plays}** credit(s) today!",
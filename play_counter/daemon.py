@@ -0,0 +1,161 @@
+"""
+In-process scheduler for `python main.py daemon`.
+
+Each `Job` knows how to compute its next run time. The scheduler sleeps
+until the earliest due job, runs it, and reschedules it with up to
+SCHEDULE_JITTER seconds of random delay so runs don't hit the sites at the
+same second every day. A failed job is retried with exponential backoff
+(also jittered) before falling back to its regular schedule; a job with a
+`retry` coroutine runs that instead of `run` when retrying, e.g. to redo
+only the part that failed.
+"""
+
+import asyncio
+import random
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Any, Awaitable, Callable
+
+from play_counter.config import SCHEDULE_JITTER
+from play_counter.metrics import metrics
+from play_counter.notifications import outbox
+
+JOB_MAX_RETRIES = 3
+JOB_RETRY_DELAY = 300  # seconds before the first retry, doubled on each failure
+JOB_RETRY_MAX_DELAY = 3600
+MAX_SLEEP = 60  # wake up at least this often so clock changes are noticed
+
+
+def _parse_time(text: str) -> time:
+    return datetime.strptime(text.strip(), "%H:%M").time()
+
+
+def daily_at(times: list[str]) -> Callable[[datetime], datetime]:
+    """Schedule at each "HH:MM" in `times`, every day."""
+    at = sorted(_parse_time(t) for t in times)
+
+    def next_time(after: datetime) -> datetime:
+        for days in (0, 1):
+            day = after.date() + timedelta(days=days)
+            for t in at:
+                if datetime.combine(day, t) > after:
+                    return datetime.combine(day, t)
+        raise ValueError("daily_at needs at least one time")
+
+    return next_time
+
+
+def weekly_at(weekday: int, at: str) -> Callable[[datetime], datetime]:
+    """Schedule at "HH:MM" on `weekday` (Monday is 0) every week."""
+    t = _parse_time(at)
+
+    def next_time(after: datetime) -> datetime:
+        day = after.date() + timedelta(days=(weekday - after.weekday()) % 7)
+        if datetime.combine(day, t) <= after:
+            day += timedelta(days=7)
+        return datetime.combine(day, t)
+
+    return next_time
+
+
+def monthly_at(day_of_month: int, at: str) -> Callable[[datetime], datetime]:
+    """Schedule at "HH:MM" on `day_of_month` (1-28) every month."""
+    t = _parse_time(at)
+
+    def next_time(after: datetime) -> datetime:
+        candidate = datetime.combine(after.date().replace(day=day_of_month), t)
+        if candidate <= after:
+            year, month = divmod(after.month, 12)
+            candidate = datetime.combine(
+                date(after.year + year, month + 1, day_of_month), t
+            )
+        return candidate
+
+    return next_time
+
+
+@dataclass
+class Job:
+    """
+    One entry of the scheduler's job table.
+
+    `next_time` maps a moment to the job's next regular run after it;
+    `retry`, if given, replaces `run` for retries. `due` and `failures` are
+    maintained by the scheduler.
+    """
+
+    name: str
+    run: Callable[[], Awaitable[Any]]
+    next_time: Callable[[datetime], datetime]
+    retry: Callable[[], Awaitable[Any]] | None = None
+    due: datetime | None = None
+    failures: int = 0
+
+
+class Scheduler:
+    """Runs `jobs` one at a time, in order of their due time, until stopped."""
+
+    def __init__(
+        self,
+        jobs: list[Job],
+        jitter: float = SCHEDULE_JITTER,
+        max_retries: int = JOB_MAX_RETRIES,
+        retry_delay: float = JOB_RETRY_DELAY,
+    ):
+        self.jobs = jobs
+        self.jitter = jitter
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+    def _reschedule(self, job: Job, after: datetime):
+        job.failures = 0
+        job.due = job.next_time(after) + timedelta(
+            seconds=random.uniform(0, self.jitter)
+        )
+
+    def _retry_later(self, job: Job):
+        delay = min(self.retry_delay * 2 ** (job.failures - 1), JOB_RETRY_MAX_DELAY)
+        job.due = datetime.now() + timedelta(seconds=delay * random.uniform(0.5, 1.5))
+
+    def print_table(self):
+        print("🗓️ Job table:")
+        for job in sorted(self.jobs, key=lambda j: j.due):
+            retry = f" (retry {job.failures})" if job.failures else ""
+            print(f"   {job.name:<16} next {job.due:%Y-%m-%d %H:%M:%S}{retry}")
+
+    async def _execute(self, job: Job):
+        retrying = job.failures and job.retry is not None
+        print(f"▶️ {'Retrying' if retrying else 'Running'} {job.name}")
+        try:
+            await (job.retry if retrying else job.run)()
+        except Exception as e:
+            job.failures += 1
+            if job.failures <= self.max_retries:
+                self._retry_later(job)
+                print(f"⚠️ {job.name} failed ({e}), retrying at {job.due:%H:%M:%S}")
+                return
+            print(f"❌ {job.name} failed {job.failures} times ({e}), skipping this run")
+        finally:
+            # Deliver whatever the job queued instead of holding it until exit
+            await outbox.flush()
+            metrics.flush()
+        self._reschedule(job, datetime.now())
+
+    async def run(self, stop: asyncio.Event):
+        """Run due jobs until `stop` is set."""
+        now = datetime.now()
+        for job in self.jobs:
+            self._reschedule(job, now)
+        self.print_table()
+
+        while not stop.is_set():
+            job = min(self.jobs, key=lambda j: j.due)
+            wait = (job.due - datetime.now()).total_seconds()
+            if wait > 0:
+                try:
+                    await asyncio.wait_for(stop.wait(), min(wait, MAX_SLEEP))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._execute(job)
+            self.print_table()
@@ -0,0 +1,242 @@
+"""
+The daily pipeline: scrape, store locally, sync, notify and (on Mondays and
+the 1st) report, either once (`run`, `run_scrape`) or on a schedule
+(`run_daemon`).
+"""
+
+import asyncio
+import signal
+from datetime import datetime
+
+from play_counter.browser_pool import BrowserPool
+from play_counter.config import (
+    ACCOUNTS,
+    INGEST_PLAYLOG,
+    MAX_BROWSER_CONTEXTS,
+    REPORT_TIME,
+    SCRAPE_TIMES,
+)
+from play_counter.daemon import Job, Scheduler, daily_at, monthly_at, weekly_at
+from play_counter.daily_play_notifier import notify_plays
+from play_counter.db import ensure_schema, test_db_connection
+from play_counter.local_store import (
+    get_last_cumulatives,
+    mirror_from_postgres,
+    record_daily_plays,
+    sync_to_postgres,
+)
+from play_counter.pipeline import Stage, run_stages
+from play_counter.playlog import ingest_playlogs
+from play_counter.reports.monthly import generate_monthly_report
+from play_counter.reports.weekly import generate_weekly_report
+from play_counter.scraper import ScrapeFailed, build_engines, fetch_all
+from play_counter.utils.games import tracked_games
+
+
+async def check_db(results) -> bool:
+    if not await test_db_connection():
+        print("⚠️ Database is unreachable, today's results stay in the local store")
+        return False
+    try:
+        await ensure_schema()
+    except Exception as e:
+        print(f"⚠️ Could not prepare the database schema, skipping Postgres: {e}")
+        return False
+    return True
+
+
+async def mirror(results):
+    # Bring the local store up to date so reads never need Postgres
+    if not results["db_check"]:
+        return
+    try:
+        await mirror_from_postgres()
+    except Exception as e:
+        print(f"⚠️ Could not mirror Postgres into the local store: {e}")
+
+
+async def playlog(results):
+    if not results["db_check"]:
+        return
+    try:
+        await ingest_playlogs(ACCOUNTS, tracked_games())
+    except Exception as e:
+        print(f"⚠️ Could not store the playlogs: {e}")
+
+
+async def sync(results):
+    if not results["db_check"]:
+        return
+    try:
+        await sync_to_postgres()
+    except Exception as e:
+        print(f"⚠️ Could not sync the local store to Postgres: {e}")
+
+
+async def scrape(
+    pool: BrowserPool | None = None, engines=None, pairs=None, failed=None
+):
+    if pool is None:
+        # One browser for the whole run; each (account, game) gets its own context
+        async with BrowserPool(max_contexts=MAX_BROWSER_CONTEXTS) as pool:
+            return await scrape(pool, pairs=pairs, failed=failed)
+    cumulative = await fetch_all(
+        ACCOUNTS, tracked_games(), pool, engines=engines, pairs=pairs, failed=failed
+    )
+    pool.print_timings()
+    return cumulative
+
+
+def build_stages(
+    today: datetime,
+    pool: BrowserPool | None = None,
+    engines=None,
+    reports=True,
+    notify=True,
+    pairs=None,
+    failed=None,
+) -> list[Stage]:
+    """
+    Describe a daily run as a dependency graph.
+
+    Scraping is the slowest stage and needs nothing else, so it starts right
+    away; the DB check, local mirror, reports and the last-known-cumulative
+    prefetch run alongside it. Results are written to the local store and
+    only then synced to Postgres, so an unreachable database costs nothing
+    but the sync (and the playlog, which is stored in Postgres only).
+    Only the DB check, scrape and upsert can fail the run: every other
+    stage is optional, so a broken report or notification never cancels
+    the data path.
+
+    The daemon passes its long-lived `pool` and `engines` and schedules the
+    reports separately (`reports=False`); `python main.py scrape` leaves out
+    the reports and the notification. `pairs` and `failed` are passed on to
+    `fetch_all`, so a retry can scrape only the pairs that failed.
+    """
+    today_str = today.strftime("%Y-%m-%d")
+    games = tracked_games()
+
+    stages = [
+        Stage("db_check", check_db),
+        Stage("scrape", lambda r: scrape(pool, engines, pairs, failed)),
+        Stage("mirror", mirror, deps=("db_check",), optional=True),
+        # Without the prefetch, the upsert reads the last counts itself
+        Stage(
+            "prefetch",
+            lambda r: get_last_cumulatives(
+                [account["name"] for account in ACCOUNTS], games, today_str
+            ),
+            deps=("mirror",),
+            optional=True,
+        ),
+    ]
+    if INGEST_PLAYLOG:
+        # Reads the sessions the scrape stage just refreshed
+        stages.append(
+            Stage("playlog", playlog, deps=("db_check", "scrape"), optional=True)
+        )
+    if reports and today.day == 1:
+        stages.append(
+            Stage(
+                "monthly_report",
+                lambda r: generate_monthly_report(),
+                ("mirror",),
+                optional=True,
+            )
+        )
+    if reports and today.weekday() == 0:
+        stages.append(
+            Stage(
+                "weekly_report",
+                lambda r: generate_weekly_report(),
+                ("mirror",),
+                optional=True,
+            )
+        )
+    stages += [
+        Stage(
+            "upsert",
+            lambda r: record_daily_plays(today_str, r["scrape"], r["prefetch"]),
+            deps=("scrape", "prefetch"),
+        ),
+        Stage("sync", sync, deps=("db_check", "upsert"), optional=True),
+    ]
+    if notify:
+        stages.append(
+            Stage("notify", notify_new_plays, deps=("upsert",), optional=True)
+        )
+    return stages
+
+
+async def notify_new_plays(results):
+    notify_plays(results["upsert"])
+
+
+async def run():
+    await run_stages(build_stages(datetime.today()))
+
+
+async def run_scrape():
+    await run_stages(build_stages(datetime.today(), reports=False, notify=False))
+
+
+async def run_daemon():
+    """
+    Keep the browser, DB pool and HTTP session warm and run the daily job at
+    every SCRAPE_TIMES, plus the reports at REPORT_TIME, until SIGINT/SIGTERM.
+    """
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    async with BrowserPool(max_contexts=MAX_BROWSER_CONTEXTS) as pool:
+        engines = build_engines(pool)
+
+        # (account, game) pairs a retry should scrape again; None for all of them
+        retry_pairs = None
+
+        async def scrape_pairs(pairs, notify: bool):
+            nonlocal retry_pairs
+            failed = {}
+            await run_stages(
+                build_stages(
+                    datetime.today(),
+                    pool,
+                    engines,
+                    reports=False,
+                    notify=notify,
+                    pairs=pairs,
+                    failed=failed,
+                )
+            )
+            # A rejected login fails the same way until the credentials change
+            by_name = {account["name"]: account for account in ACCOUNTS}
+            retry_pairs = [
+                (by_name[name], game)
+                for (name, game), e in failed.items()
+                if not (isinstance(e, ScrapeFailed) and e.auth_failed)
+            ]
+            if retry_pairs:
+                raise ScrapeFailed(f"{len(retry_pairs)} scrape(s) failed")
+
+        async def daily():
+            nonlocal retry_pairs
+            retry_pairs = None
+            await scrape_pairs(None, notify=True)
+
+        async def retry_failed():
+            # Pairs that already succeeded were stored and notified. A run
+            # that failed as a whole stored nothing, so it runs again in full
+            if retry_pairs is None:
+                await scrape_pairs(None, notify=True)
+            else:
+                await scrape_pairs(retry_pairs, notify=False)
+
+        jobs = [
+            Job("scrape", daily, daily_at(SCRAPE_TIMES), retry=retry_failed),
+            Job("weekly_report", generate_weekly_report, weekly_at(0, REPORT_TIME)),
+            Job("monthly_report", generate_monthly_report, monthly_at(1, REPORT_TIME)),
+        ]
+        await Scheduler(jobs).run(stop)
+    print("👋 Daemon stopped")
@@ -1,36 +1,44 @@
-import requests
-import time
-from play_counter.config import DISCORD_WEBHOOK_URL, NOTIFICATION_CONFIG
+from datetime import date
+
+from play_counter.config import (
+    DEFAULT_ACCOUNT,
+    DISCORD_WEBHOOK_URL,
+    NOTIFICATION_CONFIG,
+)
+from play_counter.local_store import get_new_plays
+from play_counter.notifications import outbox
+from play_counter.utils.games import display_name
 
 
 def send_notification(
     game: str,
     new_plays: int,
     notify_on_zero: bool = False,
-    max_retries: int = 3,
-    retry_delay: int = 2,
+    account: str | None = None,
 ) -> bool:
     """
-    Send a notification about new game plays.
+    Queue a notification about new game plays on the shared outbox.
+
+    Delivery, retries and merging with other messages happen when the
+    outbox is flushed at the end of the run.
 
     Args:
         game: Game identifier (e.g., "maimai", "chunithm")
         new_plays: Number of new plays
         notify_on_zero: Whether to send notification when there are no new plays
-        max_retries: Maximum number of retry attempts
-        retry_delay: Delay between retries in seconds
+        account: Account name to prefix the message with when tracking several
 
     Returns:
-        Boolean indicating success or failure
+        Boolean indicating whether a message was queued
     """
     # Skip notification if no new plays and not configured to notify on zero
     if new_plays <= 0 and not notify_on_zero:
-        return True
+        return False
 
     # Get game-specific configuration
     config = NOTIFICATION_CONFIG.get(game, NOTIFICATION_CONFIG["default"])
 
-    game_display = game.upper() if game == "chunithm" else game
+    game_display = display_name(game)
 
     # Create message based on play count
     if new_plays > 0:
@@ -42,6 +50,9 @@ def send_notification(
     else:
         message = f"**{game}**: No new plays today."
 
+    if account:
+        message = f"[{account}] {message}"
+
     # Prepare payload
     payload = {
         "username": config.get("username", "毎日みのり"),
@@ -52,29 +63,41 @@ def send_notification(
         "content": message,
     }
 
-    # Send with retry mechanism
-    success = False
-    for attempt in range(max_retries):
-        try:
-            res = requests.post(DISCORD_WEBHOOK_URL, json=payload)
-            if res.status_code == 204:
-                print(f"✅ Notification sent for {game} after {attempt + 1} attempt(s)")
-                success = True
-                break
-            else:
-                print(
-                    f"❌ Discord error (attempt {attempt + 1}/{max_retries}): {res.text}"
-                )
-        except Exception as e:
-            print(
-                f"❌ Exception during notification (attempt {attempt + 1}/{max_retries}): {str(e)}"
+    outbox.enqueue(
+        DISCORD_WEBHOOK_URL,
+        payload,
+        label=f"{account or ''} {game} notification".strip(),
+    )
+    return True
+
+
+def notify_plays(new_by_account: dict[str, dict[str, int]]):
+    """Queue one notification per account and game with new plays."""
+    for account, new in new_by_account.items():
+        for game, new_plays in new.items():
+            send_notification(
+                game, new_plays, account=None if account == DEFAULT_ACCOUNT else account
             )
 
-        # Only sleep if we're going to retry
-        if attempt < max_retries - 1:
-            time.sleep(retry_delay)
 
-    if not success:
-        print(f"❌ Failed to send notification for {game} after {max_retries} attempts")
+async def notify_today(date_str: str | None = None):
+    """
+    Queue the notifications for a day already recorded in the local store,
+    without scraping (`python main.py notify`).
+    """
+    date_str = date_str or date.today().isoformat()
+    new_by_account = await get_new_plays(date_str)
+    if not new_by_account:
+        print(f"ℹ️ Nothing recorded for {date_str} yet")
+    notify_plays(new_by_account)
+
 
-    return success
+def send_budget_alerts(alerts: list[str]):
+    """Queue budget threshold and forecast alerts as one message."""
+    settings = NOTIFICATION_CONFIG.get("budget", NOTIFICATION_CONFIG["default"])
+    payload = {
+        "username": settings["username"],
+        "avatar_url": settings["avatar_url"],
+        "content": "\n".join(alerts),
+    }
+    outbox.enqueue(DISCORD_WEBHOOK_URL, payload, label="budget alert")
@@ -1,66 +1,395 @@
+import asyncio
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import date
+
 import asyncpg
-from datetime import datetime
 
-from play_counter.config import DATABASE_URL
+from play_counter import config
+from play_counter.config import DEFAULT_ACCOUNT, GAP_STRATEGY
+from play_counter.metrics import metrics
+from play_counter.utils.date_helpers import period_start
+from play_counter.utils.gap_fill import fill_gap
+
+POOL_MIN_SIZE = 1
+POOL_MAX_SIZE = 5
+# Seconds to wait for a connection, and to fail fast after a connect failed
+CONNECT_TIMEOUT = 10
+UNREACHABLE_BACKOFF = 300
+# Seconds before re-establishing a dropped LISTEN connection, doubled per failure
+LISTEN_RETRY_DELAY = 1
+LISTEN_RETRY_MAX_DELAY = 60
+ROLLUP_PERIODS = ("week", "month", "year")
+PLAY_COLUMNS = ("account", "game", "play_date", "new_plays", "cumulative")
+COPY_MIN_ROWS = 100  # batches at least this large are written with COPY
+# Notified (on commit) by every upsert_rows, with the accounts written as payload
+PLAYS_CHANGED_CHANNEL = "plays_changed"
+
+# Tables owned by the tracker, created on demand. The old wide
+# public.play_data table is only read by `python -m play_counter.migrate`.
+SCHEMA_STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS public.plays (
+        account TEXT NOT NULL,
+        game TEXT NOT NULL,
+        play_date DATE NOT NULL,
+        new_plays INTEGER NOT NULL,
+        cumulative INTEGER NOT NULL,
+        PRIMARY KEY (account, game, play_date)
+    )
+    """,
+    # Sessions are only a cache: drop the old single-account layout
+    """
+    DO $$ BEGIN
+        IF to_regclass('public.sega_sessions') IS NOT NULL AND NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = 'sega_sessions'
+              AND column_name = 'account'
+        ) THEN
+            DROP TABLE public.sega_sessions;
+        END IF;
+    END $$
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS public.sega_sessions (
+        account TEXT NOT NULL,
+        game TEXT NOT NULL,
+        storage_state JSONB NOT NULL,
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        PRIMARY KEY (account, game)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS public.play_log (
+        account TEXT NOT NULL,
+        game TEXT NOT NULL,
+        played_at TIMESTAMP NOT NULL,
+        track SMALLINT NOT NULL,
+        title TEXT NOT NULL,
+        PRIMARY KEY (account, game, played_at, track)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS public.play_rollups (
+        account TEXT NOT NULL,
+        period TEXT NOT NULL,
+        period_start DATE NOT NULL,
+        game TEXT NOT NULL,
+        plays BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (account, period, period_start, game)
+    )
+    """,
+]
+
+_pool: asyncpg.Pool | None = None
+_pool_lock = asyncio.Lock()
+# (when, error) of the last failed attempt to create the pool
+_unreachable: tuple[float, Exception] | None = None
+
+
+class DatabaseUnreachable(Exception):
+    pass
+
+
+async def init_pool() -> asyncpg.Pool:
+    """
+    Create the shared connection pool on first use and return it.
+
+    If that fails, every call for the next UNREACHABLE_BACKOFF seconds
+    raises DatabaseUnreachable straight away instead of waiting on another
+    connect, so callers that treat the database as optional (the session
+    store, the sync) cost nothing while it is down.
+    """
+    global _pool, _unreachable
+    async with _pool_lock:
+        if _pool is None:
+            if (
+                _unreachable
+                and time.monotonic() - _unreachable[0] < UNREACHABLE_BACKOFF
+            ):
+                raise DatabaseUnreachable(f"Database unreachable: {_unreachable[1]}")
+            try:
+                _pool = await asyncpg.create_pool(
+                    config.DATABASE_URL,
+                    min_size=POOL_MIN_SIZE,
+                    max_size=POOL_MAX_SIZE,
+                    timeout=CONNECT_TIMEOUT,
+                )
+            except Exception as e:
+                _unreachable = time.monotonic(), e
+                raise
+            _unreachable = None
+    return _pool
+
+
+async def close_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+def _log_query(record):
+    # Label by statement kind (SELECT, INSERT, ...) to keep the series few
+    words = record.query.split(None, 1)
+    statement = words[0].upper() if words else "EMPTY"
+    metrics.observe("db_query_seconds", record.elapsed, statement=statement)
+    if record.exception is not None:
+        metrics.inc("db_query_errors_total", statement=statement)
 
 
-async def connect_db():
-    return await asyncpg.connect(DATABASE_URL)
+@asynccontextmanager
+async def acquire():
+    """Borrow a connection from the shared pool for the duration of the block."""
+    pool = await init_pool()
+    async with pool.acquire() as conn:
+        conn.add_query_logger(_log_query)
+        try:
+            yield conn
+        finally:
+            conn.remove_query_logger(_log_query)
 
 
-async def get_cumulative(game: str, date_str: str) -> int:
-    conn = await connect_db()
+@asynccontextmanager
+async def listen(channel: str, callback):
+    """
+    Call `callback(payload)` for every NOTIFY on `channel` while the block runs.
+
+    Uses its own connection rather than one from the pool, since a listener
+    holds it for as long as it listens. If that connection drops, it is
+    re-established in the background with backoff, and `callback(None)` is
+    called once listening again, since any NOTIFY sent in between is lost.
+    """
+    conn: asyncpg.Connection | None = None
+    reconnecting: asyncio.Task | None = None
+    stopping = False
+
+    def handler(connection, pid, channel, payload):
+        callback(payload)
+
+    def terminated(connection):
+        nonlocal reconnecting
+        if not stopping:
+            print(f"⚠️ Lost the connection listening on {channel}, reconnecting")
+            reconnecting = asyncio.create_task(reconnect())
+
+    async def connect():
+        nonlocal conn
+        new = await asyncpg.connect(config.DATABASE_URL, timeout=CONNECT_TIMEOUT)
+        try:
+            await new.add_listener(channel, handler)
+        except BaseException:
+            await new.close()
+            raise
+        new.add_termination_listener(terminated)
+        conn = new
+
+    async def reconnect():
+        delay = LISTEN_RETRY_DELAY
+        while True:
+            try:
+                await connect()
+            except Exception as e:
+                print(f"⚠️ Could not listen on {channel} ({e}), retrying in {delay}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, LISTEN_RETRY_MAX_DELAY)
+                continue
+            print(f"🔌 Listening on {channel} again")
+            callback(None)
+            return
+
+    await connect()
     try:
-        date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-        col = f"{game}_cumulative"
-        row = await conn.fetchrow(
-            f"SELECT {col} FROM public.play_data WHERE play_date = $1", date_obj
-        )
-        return row[col] if row and row[col] is not None else 0
+        yield
     finally:
-        await conn.close()
+        stopping = True
+        if reconnecting is not None and not reconnecting.done():
+            reconnecting.cancel()
+            await asyncio.gather(reconnecting, return_exceptions=True)
+        if not conn.is_closed():
+            await conn.close()
 
 
-async def upsert_play_data(
-    date_str: str,
-    maimai_new: int,
-    chunithm_new: int,
-    maimai_cumulative: int,
-    chunithm_cumulative: int,
-):
-    conn = await connect_db()
-    try:
-        date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-        await conn.execute(
+async def get_daily_rows(
+    start: date, end: date, games, account: str = DEFAULT_ACCOUNT
+) -> list[asyncpg.Record]:
+    """(play_date, game, new_plays, cumulative) rows between `start` and `end`."""
+    async with acquire() as conn:
+        return await conn.fetch(
             """
-            INSERT INTO public.play_data
-                (play_date, maimai_play_count, chunithm_play_count,
-                 maimai_cumulative, chunithm_cumulative)
-            VALUES ($1,$2,$3,$4,$5)
-            ON CONFLICT (play_date) DO UPDATE
-              SET maimai_play_count=EXCLUDED.maimai_play_count,
-                  chunithm_play_count=EXCLUDED.chunithm_play_count,
-                  maimai_cumulative=EXCLUDED.maimai_cumulative,
-                  chunithm_cumulative=EXCLUDED.chunithm_cumulative
+            SELECT play_date, game, new_plays, cumulative FROM public.plays
+            WHERE account = $1 AND game = ANY($2::text[])
+              AND play_date BETWEEN $3 AND $4
+            ORDER BY play_date, game
             """,
-            date_obj,
-            maimai_new,
-            chunithm_new,
-            maimai_cumulative,
-            chunithm_cumulative,
+            account,
+            list(games),
+            start,
+            end,
+        )
+
+
+async def _apply_rollup_deltas(conn, deltas: dict[tuple[str, str, date], int]):
+    """Add the change in daily plays, keyed by (account, game, day), to every rollup."""
+    totals = defaultdict(int)
+    for (account, game, day), delta in deltas.items():
+        for period in ROLLUP_PERIODS:
+            totals[(account, period, period_start(period, day), game)] += delta
+    rows = [(*key, delta) for key, delta in totals.items() if delta]
+    if not rows:
+        return
+    await conn.executemany(
+        """
+        INSERT INTO public.play_rollups (account, period, period_start, game, plays)
+        VALUES ($1, $2, $3, $4, $5)
+        ON CONFLICT (account, period, period_start, game) DO UPDATE
+          SET plays = play_rollups.plays + EXCLUDED.plays
+        """,
+        rows,
+    )
+
+
+_UPSERT_CONFLICT = """
+    ON CONFLICT (account, game, play_date) DO UPDATE
+      SET new_plays = EXCLUDED.new_plays,
+          cumulative = EXCLUDED.cumulative
+"""
+
+
+async def upsert_rows(conn, rows: list[tuple]):
+    """
+    Write (account, game, play_date, new_plays, cumulative) rows in bulk.
+
+    Must run inside a transaction: the existing rows are locked first so the
+    rollup deltas stay correct when a day is upserted again.
+    """
+    if not rows:
+        return
+    old = await conn.fetch(
+        """
+        SELECT p.account, p.game, p.play_date, p.new_plays
+        FROM public.plays AS p
+        JOIN unnest($1::text[], $2::text[], $3::date[]) AS k(account, game, play_date)
+          USING (account, game, play_date)
+        FOR UPDATE OF p
+        """,
+        [row[0] for row in rows],
+        [row[1] for row in rows],
+        [row[2] for row in rows],
+    )
+    previous = {(r["account"], r["game"], r["play_date"]): r["new_plays"] for r in old}
+
+    columns = ", ".join(PLAY_COLUMNS)
+    if len(rows) >= COPY_MIN_ROWS:
+        await conn.execute(
+            "CREATE TEMP TABLE plays_incoming (LIKE public.plays) ON COMMIT DROP"
         )
-        print(
-            f"✅ Data saved: {date_str} | Maimai new: {maimai_new}, Chunithm new: {chunithm_new} | "
-            f"Maimai cumulative: {maimai_cumulative}, Chunithm cumulative: {chunithm_cumulative}"
+        await conn.copy_records_to_table(
+            "plays_incoming", records=rows, columns=PLAY_COLUMNS
         )
-    finally:
-        await conn.close()
+        await conn.execute(
+            f"INSERT INTO public.plays ({columns}) "
+            f"SELECT {columns} FROM plays_incoming {_UPSERT_CONFLICT}"
+        )
+        await conn.execute("DROP TABLE plays_incoming")
+    else:
+        await conn.executemany(
+            f"INSERT INTO public.plays ({columns}) "
+            f"VALUES ($1, $2, $3, $4, $5) {_UPSERT_CONFLICT}",
+            rows,
+        )
+
+    await _apply_rollup_deltas(
+        conn,
+        {
+            (account, game, day): new_plays - previous.get((account, game, day), 0)
+            for account, game, day, new_plays, _ in rows
+        },
+    )
+    # Delivered on commit, e.g. to drop the read API's cached responses
+    await conn.execute(
+        "SELECT pg_notify($1, $2)",
+        PLAYS_CHANGED_CHANNEL,
+        ",".join(sorted({row[0] for row in rows})),
+    )
+
+
+def _print_saved(date_str, account, new, cumulative):
+    summary = " | ".join(
+        f"{game} new: {new[game]}, cumulative: {cumulative[game]}"
+        for game in cumulative
+    )
+    owner = "" if account == DEFAULT_ACCOUNT else f" [{account}]"
+    print(f"✅ Data saved: {date_str}{owner} | {summary}")
+
+
+def plan_daily_rows(
+    day: date,
+    cumulative: dict[str, dict[str, int]],
+    last: dict[str, dict[str, tuple[date, int]]],
+) -> tuple[list[tuple], dict[str, dict[str, int]]]:
+    """
+    Turn today's cumulative counts into rows to write and today's new plays.
+
+    New plays are measured against the latest earlier reading in `last`
+    rather than strictly yesterday's, and any days missed in between are
+    filled according to GAP_STRATEGY (see `fill_gap`). A count lower than
+    the last known one is reported and left out.
+    """
+    rows = []
+    new: dict[str, dict[str, int]] = {}
+    for account, games in cumulative.items():
+        for game, value in games.items():
+            last_date, last_value = last.get(account, {}).get(game, (None, 0))
+            if value < last_value:
+                print(
+                    f"⚠️ {account}/{game} cumulative went down "
+                    f"({last_value} on {last_date} → {value}), not saving"
+                )
+                continue
+            filled = fill_gap(last_date, last_value, day, value, GAP_STRATEGY)
+            if len(filled) > 1:
+                print(
+                    f"🩹 {account}/{game}: filling {len(filled) - 1} missing "
+                    f"day(s) since {last_date}"
+                )
+            rows += [(account, game, *row) for row in filled]
+            new.setdefault(account, {})[game] = filled[-1][1]
+    return rows, new
+
+
+def print_saved_days(
+    date_str: str,
+    new: dict[str, dict[str, int]],
+    cumulative: dict[str, dict[str, int]],
+):
+    """Print one "Data saved" line per account in `new`."""
+    for account in new:
+        _print_saved(
+            date_str,
+            account,
+            new[account],
+            {game: cumulative[account][game] for game in new[account]},
+        )
+
+
+async def ensure_schema():
+    async with acquire() as conn:
+        missing = await conn.fetchval("SELECT to_regclass('public.play_rollups')")
+        for statement in SCHEMA_STATEMENTS:
+            await conn.execute(statement)
+    if missing is None:
+        # A new (or previously dropped) rollup table starts out from history
+        from play_counter.rollups import backfill_rollups
+
+        await backfill_rollups()
 
 
 async def test_db_connection():
     try:
-        conn = await asyncpg.connect(DATABASE_URL)
-        await conn.close()
+        async with acquire() as conn:
+            await conn.fetchval("SELECT 1")
         return True
     except Exception as e:
         print(f"Database connection failed: {e}")
@@ -0,0 +1,329 @@
+"""
+Local SQLite copy of public.plays that every run writes to first.
+
+Daily results are always written here, marked unsynced, and then pushed to
+Postgres in batches through `db.upsert_rows` whenever it is reachable. The
+push is an idempotent upsert, so rows that were sent but not marked synced
+(e.g. the run died in between) are simply sent again next time. Rows
+already in Postgres are mirrored back so reports and the last-known
+cumulative lookups can run entirely from the local file, with no network.
+
+Every write also updates the running budget totals in the same
+transaction (see `budget.apply`), and queues any alerts that crossed.
+
+Reads and writes run in a worker thread with a short-lived connection.
+`play_counter.db` (and asyncpg) is only imported by the functions that
+write or talk to Postgres, so report-only commands never load it.
+"""
+
+import asyncio
+import sqlite3
+from contextlib import closing
+from datetime import date
+
+from play_counter import budget, config
+from play_counter.config import DEFAULT_ACCOUNT
+
+SYNC_BATCH_SIZE = 500
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS plays (
+        account TEXT NOT NULL,
+        game TEXT NOT NULL,
+        play_date TEXT NOT NULL,
+        new_plays INTEGER NOT NULL,
+        cumulative INTEGER NOT NULL,
+        synced INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (account, game, play_date)
+    );
+    CREATE INDEX IF NOT EXISTS plays_unsynced ON plays (synced) WHERE synced = 0;
+    -- Running spend per budget rule and period, maintained by budget.apply
+    CREATE TABLE IF NOT EXISTS budget_totals (
+        rule TEXT NOT NULL,
+        period_start TEXT NOT NULL,
+        spent REAL NOT NULL,
+        alerted REAL NOT NULL DEFAULT 0,
+        forecast_alerted INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (rule, period_start)
+    );
+"""
+
+# Same columns as db.PLAY_COLUMNS
+_COLUMNS = "account, game, play_date, new_plays, cumulative"
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(config.LOCAL_STORE_PATH)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _run(fn, *args):
+    """Run `fn(conn, *args)` in a worker thread and commit it."""
+
+    def work():
+        with closing(_connect()) as conn, conn:
+            return fn(conn, *args)
+
+    return asyncio.to_thread(work)
+
+
+def _row(account, game, day, new_plays, cumulative) -> tuple:
+    return account, game, day.isoformat(), new_plays, cumulative
+
+
+# Reads
+
+
+def _last_cumulatives(conn, accounts, games, day: date):
+    last: dict[str, dict[str, tuple[date, int]]] = {}
+    for account in accounts:
+        for game in games:
+            row = conn.execute(
+                """
+                SELECT play_date, cumulative FROM plays
+                WHERE account = ? AND game = ? AND play_date < ?
+                ORDER BY play_date DESC LIMIT 1
+                """,
+                (account, game, day.isoformat()),
+            ).fetchone()
+            if row is not None:
+                last.setdefault(account, {})[game] = (
+                    date.fromisoformat(row["play_date"]),
+                    row["cumulative"],
+                )
+    return last
+
+
+async def get_last_cumulatives(
+    accounts, games, date_str: str
+) -> dict[str, dict[str, tuple[date, int]]]:
+    """
+    The latest (play_date, cumulative) before `date_str`, keyed by account then game.
+
+    Pairs without any earlier row are absent from the result.
+    """
+    return await _run(
+        _last_cumulatives, list(accounts), list(games), date.fromisoformat(date_str)
+    )
+
+
+def _play_rows(conn, games, account: str | None, since: date | None):
+    rows = conn.execute(
+        f"""
+        SELECT play_date, game, new_plays FROM plays
+        WHERE (? IS NULL OR account = ?)
+          AND game IN ({", ".join("?" * len(games))}) AND play_date >= ?
+        """,
+        (account, account, *games, (since or date.min).isoformat()),
+    ).fetchall()
+    return [
+        (date.fromisoformat(row["play_date"]), row["game"], row["new_plays"])
+        for row in rows
+    ]
+
+
+async def get_play_rows(
+    games, account: str | None = DEFAULT_ACCOUNT, since: date | None = None
+) -> list[tuple[date, str, int]]:
+    """
+    (play_date, game, new_plays) for `account`'s days from `since` onwards,
+    with one row per account when `account` is None.
+    """
+    return await _run(_play_rows, list(games), account, since)
+
+
+def _new_plays_on(conn, day: date):
+    new: dict[str, dict[str, int]] = {}
+    for row in conn.execute(
+        "SELECT account, game, new_plays FROM plays WHERE play_date = ?",
+        (day.isoformat(),),
+    ):
+        new.setdefault(row["account"], {})[row["game"]] = row["new_plays"]
+    return new
+
+
+async def get_new_plays(date_str: str) -> dict[str, dict[str, int]]:
+    """New plays per account and game recorded for `date_str`."""
+    return await _run(_new_plays_on, date.fromisoformat(date_str))
+
+
+# Writes
+
+
+def _write(conn, rows: list[tuple], synced: bool) -> list[str]:
+    """
+    Upsert (account, game, play_date, new_plays, cumulative) rows and
+    update the budget totals. Returns the budget alerts that fired.
+    """
+    before = {}
+    for row in rows:
+        found = conn.execute(
+            """
+            SELECT new_plays, synced FROM plays
+            WHERE account = ? AND game = ? AND play_date = ?
+            """,
+            row[:3],
+        ).fetchone()
+        if found is not None:
+            before[row[:3]] = found["new_plays"], found["synced"]
+
+    # Mirrored rows must not overwrite local results that are still unsynced
+    keep_unsynced = "WHERE plays.synced = 1" if synced else ""
+    conn.executemany(
+        f"""
+        INSERT INTO plays ({_COLUMNS}, synced) VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (account, game, play_date) DO UPDATE
+          SET new_plays = excluded.new_plays,
+              cumulative = excluded.cumulative,
+              synced = excluded.synced
+          {keep_unsynced}
+        """,
+        [(*row, int(synced)) for row in rows],
+    )
+
+    changes = []
+    for account, game, day, new_plays, _ in rows:
+        old, old_synced = before.get((account, game, day), (0, 1))
+        if synced and not old_synced:
+            continue  # the local row was kept
+        if new_plays != old:
+            changes.append((account, game, date.fromisoformat(day), new_plays - old))
+    return budget.apply(conn, changes)
+
+
+def _send_alerts(alerts: list[str]):
+    for alert in alerts:
+        print(alert)
+    # `backfill` runs without the webhook, so its alerts are only printed
+    if alerts and not config.missing("DISCORD_WEBHOOK_URL"):
+        from play_counter.daily_play_notifier import send_budget_alerts
+
+        send_budget_alerts(alerts)
+
+
+async def record_daily_plays(
+    date_str: str,
+    cumulative: dict[str, dict[str, int]],
+    last: dict[str, dict[str, tuple[date, int]]] | None = None,
+) -> dict[str, dict[str, int]]:
+    """
+    Store today's cumulative counts and return today's new plays.
+
+    Both `cumulative` and the result are keyed by account, then game; see
+    `db.plan_daily_rows` for how new plays and missed days are worked out.
+    The latest rows are read unless prefetched and passed as `last`. Rows
+    are written to the local store only and pushed to Postgres by
+    `sync_to_postgres`.
+    """
+    from play_counter.db import plan_daily_rows, print_saved_days
+
+    day = date.fromisoformat(date_str)
+
+    def record(conn):
+        known = last
+        if known is None:
+            games = sorted({game for games in cumulative.values() for game in games})
+            known = _last_cumulatives(conn, list(cumulative), games, day)
+        rows, new = plan_daily_rows(day, cumulative, known)
+        return new, _write(conn, [_row(*row) for row in rows], synced=False)
+
+    new, alerts = await _run(record)
+    print_saved_days(date_str, new, cumulative)
+    _send_alerts(alerts)
+    return new
+
+
+# Sync
+
+
+def _unsynced(conn, limit: int) -> list[tuple]:
+    rows = conn.execute(
+        f"SELECT {_COLUMNS} FROM plays WHERE synced = 0 LIMIT ?", (limit,)
+    ).fetchall()
+    return [
+        (
+            r["account"],
+            r["game"],
+            date.fromisoformat(r["play_date"]),
+            r["new_plays"],
+            r["cumulative"],
+        )
+        for r in rows
+    ]
+
+
+def _mark_synced(conn, rows: list[tuple]):
+    # Only if unchanged since it was read, so a newer local write is kept
+    conn.executemany(
+        """
+        UPDATE plays SET synced = 1
+        WHERE account = ? AND game = ? AND play_date = ?
+          AND new_plays = ? AND cumulative = ?
+        """,
+        [_row(*row) for row in rows],
+    )
+
+
+def _count_unsynced(conn, account, start, end) -> int:
+    query, args = "SELECT count(*) FROM plays WHERE synced = 0", []
+    if account is not None:
+        query, args = query + " AND account = ?", args + [account]
+    if start is not None:
+        query, args = query + " AND play_date BETWEEN ? AND ?", args + [
+            start.isoformat(),
+            end.isoformat(),
+        ]
+    return conn.execute(query, args).fetchone()[0]
+
+
+async def count_unsynced(
+    account: str | None = None, start: date | None = None, end: date | None = None
+) -> int:
+    """Local rows not yet in Postgres (of `account`, from `start` to `end`, if given)."""
+    return await _run(_count_unsynced, account, start, end)
+
+
+async def sync_to_postgres(batch_size: int = SYNC_BATCH_SIZE) -> int:
+    """Push unsynced local rows to Postgres. Returns the number of rows pushed."""
+    from play_counter.db import acquire, upsert_rows
+
+    pushed = 0
+    while rows := await _run(_unsynced, batch_size):
+        async with acquire() as conn, conn.transaction():
+            await upsert_rows(conn, rows)
+        await _run(_mark_synced, rows)
+        pushed += len(rows)
+    if pushed:
+        print(f"🔄 Synced {pushed} local row(s) to Postgres")
+    return pushed
+
+
+async def mirror_from_postgres(full: bool = False) -> int:
+    """
+    Copy Postgres rows into the local store, keeping unsynced local rows.
+
+    Only days from the newest synced local day onwards are read unless
+    `full` is set (e.g. after a backfill rewrote older history). Returns
+    the number of rows copied.
+    """
+    from play_counter.db import acquire
+
+    def newest(conn):
+        return conn.execute(
+            "SELECT max(play_date) FROM plays WHERE synced = 1"
+        ).fetchone()[0]
+
+    since = None if full else await _run(newest)
+    async with acquire() as conn:
+        records = await conn.fetch(
+            f"""
+            SELECT {_COLUMNS} FROM public.plays
+            WHERE $1::date IS NULL OR play_date >= $1
+            """,
+            date.fromisoformat(since) if since else None,
+        )
+    rows = [_row(*record) for record in records]
+    _send_alerts(await _run(_write, rows, True))
+    return len(rows)
@@ -0,0 +1,147 @@
+"""
+Step runner for browser flows, with retries that resume from the failed step.
+
+A flow is a list of `Step`s. Each step waits on a concrete condition
+(a response, a URL, an element's state) instead of sleeping. When a step
+fails, the error is classified:
+
+- `TransientError`: network trouble or a slow or failed navigation.
+  Retried with backoff from the step's `resume_from`.
+- `SelectorChanged`: the page loaded but an element isn't where we expect
+  it. Retried once from `resume_from`, in case the page was half
+  rendered, then given up. The page most likely changed.
+- `AuthFailed`: the site rejected the credentials. Never retried, since
+  repeating a bad login only risks locking the account.
+
+Only the backoff of transient retries sleeps. It is counted in the
+`sleep_seconds_total` metric, which stays at zero for a clean run.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import TimeoutError as PlaywrightTimeout
+
+from play_counter.metrics import metrics
+
+# Fragments of Playwright/Firefox error messages caused by the network
+NETWORK_ERRORS = ("net::", "NS_ERROR_", "NS_BINDING_", "Navigation failed")
+
+
+class LoginFailure(Exception):
+    """A step of a browser flow failed; `kind` names the failure class."""
+
+    kind = "failure"
+
+    def __init__(self, message: str, step: str = ""):
+        super().__init__(message)
+        self.step = step
+
+    def __str__(self):
+        where = f" at {self.step}" if self.step else ""
+        return f"{self.kind}{where}: {super().__str__()}"
+
+
+class TransientError(LoginFailure):
+    kind = "transient error"
+
+
+class SelectorChanged(LoginFailure):
+    kind = "selector changed"
+
+
+class AuthFailed(LoginFailure):
+    kind = "auth failure"
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    retries: int
+    delay: float = 0  # seconds before the first retry
+    backoff: float = 2  # multiplier for each further retry
+
+
+RETRY_POLICIES = {
+    TransientError: RetryPolicy(retries=3, delay=1),
+    SelectorChanged: RetryPolicy(retries=1),
+    AuthFailed: RetryPolicy(retries=0),
+}
+
+
+@dataclass
+class Step:
+    """
+    One step of a flow.
+
+    `navigates` marks steps whose timeouts mean a slow network rather
+    than a missing element. `resume_from` names the step to go back to on
+    a retry (by default the step itself), e.g. the page load that brings
+    back a form lost by a failed submit.
+    """
+
+    name: str
+    run: Callable[[], Awaitable]
+    navigates: bool = False
+    resume_from: str | None = None
+
+
+def classify(error: Exception, step: Step) -> LoginFailure:
+    """Map an exception raised by `step` to its failure class."""
+    if isinstance(error, LoginFailure):
+        error.step = error.step or step.name
+        return error
+    if isinstance(error, PlaywrightTimeout):
+        cls = TransientError if step.navigates else SelectorChanged
+        return cls(str(error).splitlines()[0], step.name)
+    if isinstance(error, PlaywrightError):
+        if any(fragment in str(error) for fragment in NETWORK_ERRORS):
+            return TransientError(str(error).splitlines()[0], step.name)
+    return SelectorChanged(str(error), step.name)
+
+
+async def run_steps(
+    steps: list[Step],
+    label: str,
+    on_retry: Callable[[LoginFailure], Awaitable] | None = None,
+    start: str | None = None,
+):
+    """
+    Run `steps` in order, resuming from the failed step on retryable failures.
+
+    `on_retry` is awaited before each retry, e.g. to start tracing. `start`
+    skips the steps before it on the first pass (e.g. a page that is already
+    open), while a retry can still go back to them. Raises the classified
+    failure once its class has used up its retries.
+    """
+    index = {step.name: i for i, step in enumerate(steps)}
+    failures: dict[type, int] = {}
+    i = index[start] if start else 0
+    while i < len(steps):
+        step = steps[i]
+        try:
+            with metrics.span("login_step", flow=label, step=step.name):
+                await step.run()
+        except Exception as e:
+            failure = classify(e, step)
+            cls = type(failure)
+            policy = RETRY_POLICIES.get(cls, RETRY_POLICIES[SelectorChanged])
+            failures[cls] = failures.get(cls, 0) + 1
+            metrics.inc("login_failures_total", step=step.name, kind=failure.kind)
+            if failures[cls] > policy.retries:
+                if failure is e:
+                    raise
+                raise failure from e
+
+            delay = policy.delay * policy.backoff ** (failures[cls] - 1)
+            resume = step.resume_from or step.name
+            print(f"⚠️ {label}: {failure}, resuming from {resume}")
+            if on_retry is not None:
+                await on_retry(failure)
+            if delay:
+                metrics.inc("sleep_seconds_total", delay, reason=failure.kind)
+                await asyncio.sleep(delay)
+            i = index[resume]
+            continue
+        i += 1
@@ -0,0 +1,180 @@
+"""
+Counters, histograms and spans for every part of a run.
+
+`metrics` is shared by the whole process, like `notifications.outbox`:
+
+    with metrics.span("login_step", game="maimai", step="submit"):
+        ...
+    metrics.inc("checkbox_reclicks_total", game="maimai")
+
+A span observes its duration in the `<name>_seconds` histogram and records
+a JSON event. At the end of a run `flush()` appends the events to
+METRICS_JSONL, rewrites METRICS_PROM in the Prometheus text format and
+prints a summary table.
+"""
+
+import json
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from itertools import accumulate
+
+from play_counter.config import METRICS_JSONL, METRICS_PROM
+
+METRIC_PREFIX = "play_counter_"
+HISTOGRAM_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _key(name: str, labels: dict) -> tuple[str, tuple]:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: tuple, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in labels] + ([extra] if extra else [])
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    """
+    Observation counts per HISTOGRAM_BUCKETS bound, plus their sum, count
+    and max, so a long-running daemon keeps a fixed amount per series.
+    """
+
+    def __init__(self):
+        # counts[i] observations fell in (HISTOGRAM_BUCKETS[i - 1], [i]]; the
+        # last slot holds everything above the largest bound
+        self.counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(HISTOGRAM_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def cumulative(self) -> list[int]:
+        """Observations at or below each bound, then the total (for +Inf)."""
+        return list(accumulate(self.counts))
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate the `q` quantile by interpolating within its bucket, like
+        Prometheus' histogram_quantile, capped at the largest observation.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        below = 0
+        for i, count in enumerate(self.counts):
+            if count and below + count >= rank:
+                lower = HISTOGRAM_BUCKETS[i - 1] if i else 0.0
+                upper = HISTOGRAM_BUCKETS[i] if i < len(HISTOGRAM_BUCKETS) else self.max
+                estimate = lower + (upper - lower) * (rank - below) / count
+                return min(estimate, self.max)
+            below += count
+        return self.max
+
+
+class Metrics:
+    def __init__(self):
+        self.counters: dict[tuple[str, tuple], float] = {}
+        self.histograms: dict[tuple[str, tuple], Histogram] = {}
+        self.events: list[dict] = []
+
+    def reset(self):
+        """Forget everything recorded so far."""
+        self.counters.clear()
+        self.histograms.clear()
+        self.events.clear()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        self.histograms.setdefault(_key(name, labels), Histogram()).observe(value)
+
+    @contextmanager
+    def span(self, name: str, **labels):
+        """Time the block; the event's status is "error" if it raises."""
+        started = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            self.observe(f"{name}_seconds", seconds, **labels)
+            self.events.append(
+                {
+                    "ts": started.isoformat(),
+                    "span": name,
+                    **{k: str(v) for k, v in labels.items()},
+                    "seconds": round(seconds, 4),
+                    "status": status,
+                }
+            )
+
+    def write_jsonl(self, path: str = METRICS_JSONL):
+        """Append the span events recorded since the last call to `path`."""
+        events, self.events = self.events, []
+        with open(path, "a", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    def write_prometheus(self, path: str = METRICS_PROM):
+        """Write every counter and histogram to `path` in Prometheus text format."""
+        lines = []
+        typed = set()
+
+        def declare(metric: str, kind: str):
+            # One TYPE line per metric family, however many label sets it has
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} {kind}")
+
+        for (name, labels), value in sorted(self.counters.items()):
+            declare(f"{METRIC_PREFIX}{name}", "counter")
+            lines.append(f"{METRIC_PREFIX}{name}{_format_labels(labels)} {value:g}")
+        for (name, labels), hist in sorted(self.histograms.items()):
+            metric = f"{METRIC_PREFIX}{name}"
+            declare(metric, "histogram")
+            bounds = [f"{bound:g}" for bound in HISTOGRAM_BUCKETS] + ["+Inf"]
+            for bound, count in zip(bounds, hist.cumulative()):
+                le = _format_labels(labels, f'le="{bound}"')
+                lines.append(f"{metric}_bucket{le} {count}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {hist.sum:g}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {hist.count}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def print_summary(self):
+        print("📏 Metrics:")
+        for (name, labels), hist in sorted(self.histograms.items()):
+            label = name + _format_labels(labels)
+            print(
+                f"   {label:<56} n={hist.count:<4} "
+                f"p50 {hist.quantile(0.5):7.3f}s  p95 {hist.quantile(0.95):7.3f}s  "
+                f"max {hist.max:7.3f}s"
+            )
+        for (name, labels), value in sorted(self.counters.items()):
+            print(f"   {name + _format_labels(labels):<56} {value:g}")
+
+    def flush(self):
+        """Write both output files and print the summary table."""
+        try:
+            self.write_jsonl()
+            self.write_prometheus()
+        except OSError as e:
+            print(f"⚠️ Could not write metrics: {e}")
+        self.print_summary()
+
+
+# Shared registry for the whole process; main() flushes it before exiting
+metrics = Metrics()
@@ -0,0 +1,58 @@
+"""
+One-off migration from the wide public.play_data table (one column pair per
+game) to the long public.plays table.
+
+    python -m play_counter.migrate
+
+Rows already present in public.plays are left untouched, so the command is
+safe to re-run. public.play_data itself is not modified or dropped. The
+rollups are recreated with an account column and rebuilt from the result.
+"""
+
+import asyncio
+
+from play_counter.db import DEFAULT_ACCOUNT, acquire, close_pool, ensure_schema
+from play_counter.rollups import backfill_rollups
+
+LEGACY_GAMES = ("maimai", "chunithm")
+
+
+async def migrate_play_data(account: str = DEFAULT_ACCOUNT):
+    async with acquire() as conn:
+        if await conn.fetchval("SELECT to_regclass('public.play_data')") is None:
+            print("ℹ️ No public.play_data table, nothing to migrate")
+            return
+
+        # play_rollups from before the migration has no account column
+        await conn.execute("DROP TABLE IF EXISTS public.play_rollups")
+    await ensure_schema()
+
+    source = " UNION ALL ".join(f"""
+        SELECT $1::text, '{game}', play_date,
+               COALESCE({game}_play_count, 0), COALESCE({game}_cumulative, 0)
+        FROM public.play_data
+        """ for game in LEGACY_GAMES)
+    async with acquire() as conn:
+        status = await conn.execute(
+            f"""
+            INSERT INTO public.plays
+                (account, game, play_date, new_plays, cumulative)
+            {source}
+            ON CONFLICT (account, game, play_date) DO NOTHING
+            """,
+            account,
+        )
+    print(f"✅ Copied play_data into plays ({status})")
+    await backfill_rollups()
+
+
+async def _main():
+    try:
+        await ensure_schema()
+        await migrate_play_data()
+    finally:
+        await close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
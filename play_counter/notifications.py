@@ -0,0 +1,200 @@
+import asyncio
+import json
+import mimetypes
+
+import aiohttp
+
+from play_counter.metrics import metrics
+
+MAX_EMBEDS_PER_MESSAGE = 10  # Discord's limits per webhook post
+MAX_FILES_PER_MESSAGE = 10
+
+
+class DiscordQueue:
+    """
+    Collects every webhook message produced during a run and delivers them
+    together on `flush()`.
+
+    Messages queued for the same webhook are merged into multi-embed posts,
+    so the daily maimai/CHUNITHM lines and any reports arrive as one message.
+    Messages with files (e.g. report charts) are posted as multipart, and
+    each message's files stay in the same post as its embeds.
+    Each flush posts through one `aiohttp.ClientSession`, shared by every
+    webhook's deliveries, and retries back off with `asyncio.sleep`,
+    honouring Discord's 429 `Retry-After`.
+    """
+
+    def __init__(
+        self, max_retries: int = 3, base_delay: float = 2.0, timeout: float = 10
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.timeout = timeout
+        self._pending: dict[str, list[tuple[str, dict, dict]]] = {}
+
+    def enqueue(
+        self,
+        webhook_url: str,
+        payload: dict,
+        label: str = "message",
+        files: dict[str, bytes] | None = None,
+    ):
+        """
+        Queue `payload` for `webhook_url`; `label` only appears in the logs.
+
+        `files` maps attachment filenames to their content; embeds can show
+        them with "attachment://<filename>" URLs.
+        """
+        self._pending.setdefault(webhook_url, []).append((label, payload, files or {}))
+
+    async def flush(self) -> bool:
+        """Deliver everything queued so far. Returns False if any post failed."""
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return True
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            results = await asyncio.gather(
+                *(
+                    self._deliver(session, url, messages)
+                    for url, messages in pending.items()
+                )
+            )
+        return all(results)
+
+    async def _deliver(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        messages: list[tuple[str, dict, dict]],
+    ) -> bool:
+        # Posts to one webhook go out sequentially so rate-limit waits apply
+        success = True
+        for label, payload, files in _merge(messages):
+            success = await self._post(session, url, payload, label, files) and success
+        return success
+
+    async def _post(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        payload: dict,
+        label: str,
+        files: dict,
+    ) -> bool:
+        for attempt in range(1, self.max_retries + 1):
+            delay = self.base_delay * 2 ** (attempt - 1)
+            if attempt > 1:
+                metrics.inc("webhook_retries_total")
+            try:
+                with metrics.span("webhook_post"):
+                    async with session.post(url, **_body(payload, files)) as res:
+                        status, headers, text = (
+                            res.status,
+                            res.headers,
+                            await res.text(),
+                        )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                metrics.inc("webhook_posts_total", status="exception")
+                print(
+                    f"❌ Exception sending {label} (attempt {attempt}/{self.max_retries}): {e!r}"
+                )
+            else:
+                metrics.inc("webhook_posts_total", status=status)
+                if status in (200, 204):
+                    print(f"✅ Sent {label} after {attempt} attempt(s)")
+                    await _respect_bucket(headers)
+                    return True
+                if status == 429:
+                    delay = _retry_after(headers, text, delay)
+                    print(f"⏳ Rate limited sending {label}, waiting {delay:.1f}s")
+                elif status < 500:
+                    # Other 4xx responses won't succeed on retry
+                    print(f"❌ Discord rejected {label}: {status} {text}")
+                    return False
+                else:
+                    print(
+                        f"❌ Discord error (attempt {attempt}/{self.max_retries}): {text}"
+                    )
+
+            if attempt < self.max_retries:
+                await asyncio.sleep(delay)
+
+        print(f"❌ Failed to send {label} after {self.max_retries} attempts")
+        return False
+
+
+def _merge(messages: list[tuple[str, dict, dict]]) -> list[tuple[str, dict, dict]]:
+    """Fold messages for one webhook into as few posts as Discord allows."""
+    if len(messages) == 1:
+        return messages
+
+    posts = []
+    for label, payload, files in messages:
+        embeds = []
+        if payload.get("content"):
+            embed = {"description": payload["content"]}
+            if payload.get("username"):
+                embed["author"] = {"name": payload["username"]}
+                if payload.get("avatar_url"):
+                    embed["author"]["icon_url"] = payload["avatar_url"]
+            embeds.append(embed)
+        embeds.extend(payload.get("embeds", []))
+
+        # A message's embeds and files never straddle two posts
+        if (
+            posts
+            and len(posts[-1][1]) + len(embeds) <= MAX_EMBEDS_PER_MESSAGE
+            and len(posts[-1][2]) + len(files) <= MAX_FILES_PER_MESSAGE
+        ):
+            posts[-1][0].append(label)
+            posts[-1][1].extend(embeds)
+            posts[-1][2].update(files)
+        else:
+            posts.append(([label], embeds, dict(files)))
+
+    first = messages[0][1]
+    header = {key: first[key] for key in ("username", "avatar_url") if key in first}
+    return [
+        (", ".join(labels), {**header, "embeds": embeds}, files)
+        for labels, embeds, files in posts
+    ]
+
+
+def _body(payload: dict, files: dict[str, bytes]) -> dict:
+    """Keyword arguments for `session.post`; multipart when there are files."""
+    if not files:
+        return {"json": payload}
+    # Built for every attempt: aiohttp can only send a FormData once
+    form = aiohttp.FormData()
+    form.add_field("payload_json", json.dumps(payload))
+    for i, (name, content) in enumerate(files.items()):
+        form.add_field(
+            f"files[{i}]", content, filename=name, content_type=_content_type(name)
+        )
+    return {"data": form}
+
+
+def _retry_after(headers, text: str, default: float) -> float:
+    """Seconds to wait according to a 429 response."""
+    try:
+        return float(headers.get("Retry-After") or json.loads(text)["retry_after"])
+    except (ValueError, KeyError, TypeError):
+        return default
+
+
+async def _respect_bucket(headers):
+    # Discord tells us when the bucket is empty; wait it out before the next post
+    if headers.get("X-RateLimit-Remaining") == "0":
+        try:
+            await asyncio.sleep(float(headers.get("X-RateLimit-Reset-After", 0)))
+        except ValueError:
+            pass
+
+
+def _content_type(filename: str) -> str:
+    return mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+
+# Shared outbox for the whole run; main() flushes it before exiting
+outbox = DiscordQueue()
@@ -0,0 +1,93 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from play_counter.metrics import metrics
+
+
+@dataclass
+class Stage:
+    """
+    One step of a run.
+
+    `run` receives the results of the stages completed so far (keyed by
+    stage name) and its return value becomes this stage's result. The stage
+    starts as soon as every stage named in `deps` has finished. An
+    `optional` stage that fails is logged and its result is None; it never
+    stops the rest of the run.
+    """
+
+    name: str
+    run: Callable[[dict[str, Any]], Awaitable[Any]]
+    deps: tuple[str, ...] = ()
+    optional: bool = False
+
+
+async def run_stages(stages: list[Stage]) -> dict[str, Any]:
+    """
+    Run `stages` concurrently, respecting their dependencies.
+
+    Stages must be listed after the stages they depend on. If a stage that
+    isn't optional fails, the remaining ones are cancelled and the error is
+    re-raised once the timing summary has been printed.
+    """
+    seen = set()
+    for stage in stages:
+        missing = [dep for dep in stage.deps if dep not in seen]
+        if missing:
+            raise ValueError(
+                f"Stage {stage.name!r} depends on unknown or later stage(s) {missing}"
+            )
+        seen.add(stage.name)
+
+    results: dict[str, Any] = {}
+    timings: dict[str, tuple[float, float, str]] = {}
+    tasks: dict[str, asyncio.Task] = {}
+    origin = time.perf_counter()
+
+    async def execute(stage: Stage):
+        await asyncio.gather(*(tasks[dep] for dep in stage.deps))
+        start = time.perf_counter() - origin
+        status = "failed"
+        try:
+            with metrics.span("stage", stage=stage.name):
+                results[stage.name] = await stage.run(results)
+            status = "ok"
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        except Exception as e:
+            if not stage.optional:
+                raise
+            print(f"⚠️ Optional stage {stage.name} failed: {e}")
+            results[stage.name] = None
+        finally:
+            timings[stage.name] = (start, time.perf_counter() - origin - start, status)
+
+    for stage in stages:
+        tasks[stage.name] = asyncio.create_task(execute(stage), name=stage.name)
+
+    try:
+        done, pending = await asyncio.wait(
+            tasks.values(), return_when=asyncio.FIRST_EXCEPTION
+        )
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in tasks.values():
+            if task in done and task.exception() is not None:
+                raise task.exception()
+    finally:
+        print_timings(timings, time.perf_counter() - origin)
+
+    return results
+
+
+def print_timings(timings: dict[str, tuple[float, float, str]], total: float):
+    print("⏱️ Stage timings:")
+    for name, (start, duration, status) in sorted(
+        timings.items(), key=lambda t: t[1][0]
+    ):
+        print(f"   {name:<16} start +{start:6.2f}s  took {duration:6.2f}s  {status}")
+    print(f"   {'total':<16} {total:.2f}s")
@@ -0,0 +1,251 @@
+"""
+Per-play history from the maimai-mobile and CHUNITHM-NET recent-play pages.
+
+Both sites list the latest plays newest first. Each page is streamed through
+`PlaylogParser` with the cookies of the session saved by the scraper, and
+reading stops at the first entry older than the newest play already stored
+for that account and game (the high-water mark). New entries are bulk
+loaded with COPY; the (account, game, played_at, track) primary key drops
+anything seen before. Times are stored as shown on the sites.
+"""
+
+import asyncio
+import re
+from datetime import datetime
+from html.parser import HTMLParser
+
+import requests
+
+from play_counter.config import MAX_CONCURRENT_SCRAPES
+from play_counter.db import acquire
+from play_counter.scraper import (
+    HTTP_TIMEOUT,
+    SessionExpired,
+    cookie_jar,
+    http_session,
+    save_cookies,
+    text_chunks,
+)
+from play_counter.session_store import load_session
+from play_counter.utils.constants import PLAYLOG_URLS
+
+PLAYLOG_COLUMNS = ("account", "game", "played_at", "track", "title")
+
+# Elements (by class) holding each field of a play entry
+PLAYLOG_FIELDS = {
+    "chunithm": {
+        "date": {"play_datalist_date"},
+        "track": {"play_track_text"},
+        "title": {"play_musicdata_title"},
+    },
+    "maimai": {
+        # "TRACK 04 2024/01/14 19:23" in one header
+        "header": {"sub_title"},
+        "title": {"basic_block", "break"},
+    },
+}
+
+VOID_TAGS = {
+    "area",
+    "base",
+    "br",
+    "col",
+    "embed",
+    "hr",
+    "img",
+    "input",
+    "link",
+    "meta",
+    "source",
+    "track",
+    "wbr",
+}
+_DATE = re.compile(r"(\d{4}/\d{2}/\d{2} \d{2}:\d{2})")
+_TRACK = re.compile(r"TRACK\s*0*(\d+)", re.IGNORECASE)
+
+
+class PlaylogParser(HTMLParser):
+    """
+    Streaming parser that turns a playlog page into field dicts, one per play.
+
+    A field seen a second time starts the next entry. Completed entries pile
+    up in `entries` and can be drained between `feed()` calls.
+    """
+
+    def __init__(self, game: str):
+        super().__init__(convert_charrefs=True)
+        self.fields = PLAYLOG_FIELDS[game]
+        self.stack: list[str] = []
+        self.captures: list[tuple[int, str, list[str]]] = []
+        self.current: dict[str, str] = {}
+        self.entries: list[dict[str, str]] = []
+
+    def _break_text(self):
+        # Tags separate words ("TRACK 04</span><span>2024/..."); chunk edges don't
+        for _, _, parts in self.captures:
+            parts.append(" ")
+
+    def handle_starttag(self, tag, attrs):
+        self._break_text()
+        if tag in VOID_TAGS:
+            return
+        self.stack.append(tag)
+        classes = set((dict(attrs).get("class") or "").split())
+        for field, wanted in self.fields.items():
+            if wanted <= classes:
+                self.captures.append((len(self.stack), field, []))
+
+    def handle_endtag(self, tag):
+        self._break_text()
+        if tag not in self.stack:
+            return
+        # Close anything left open inside this element as well
+        while self.stack:
+            depth = len(self.stack)
+            while self.captures and self.captures[-1][0] == depth:
+                _, field, parts = self.captures.pop()
+                self._set(field, " ".join("".join(parts).split()))
+            if self.stack.pop() == tag:
+                break
+
+    def handle_data(self, data):
+        for _, _, parts in self.captures:
+            parts.append(data)
+
+    def _set(self, field: str, text: str):
+        if field in self.current:
+            self.entries.append(self.current)
+            self.current = {}
+        self.current[field] = text
+
+    def close(self):
+        super().close()
+        if self.current:
+            self.entries.append(self.current)
+            self.current = {}
+
+
+def parse_entry(game: str, fields: dict[str, str]) -> tuple[datetime, int, str] | None:
+    """Turn one entry's fields into (played_at, track, title), or None if incomplete."""
+    if game == "maimai":
+        header = fields.get("header", "")
+        date_text, track_text = header, header
+    else:
+        date_text, track_text = fields.get("date", ""), fields.get("track", "")
+
+    date_match, track_match = _DATE.search(date_text), _TRACK.search(track_text)
+    if not date_match or not track_match:
+        return None
+    played_at = datetime.strptime(date_match.group(1), "%Y/%m/%d %H:%M")
+    return played_at, int(track_match.group(1)), fields.get("title", "")
+
+
+def parse_playlog_html(game: str, chunks, since: datetime | None = None):
+    """
+    Yield (played_at, track, title) for each play on a playlog page.
+
+    `chunks` is any iterable of HTML text, so saved pages can be parsed with
+    `parse_playlog_html(game, [html])`. Parsing stops at the first play older
+    than `since`.
+    """
+    parser = PlaylogParser(game)
+
+    def drain():
+        for fields in parser.entries:
+            entry = parse_entry(game, fields)
+            if entry is not None:
+                yield entry
+        parser.entries.clear()
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        for entry in drain():
+            if since is not None and entry[0] < since:
+                return
+            yield entry
+    parser.close()
+    for entry in drain():
+        if since is not None and entry[0] < since:
+            return
+        yield entry
+
+
+def _download(
+    session: requests.Session, game: str, since: datetime | None
+) -> list[tuple[datetime, int, str]]:
+    with session.get(PLAYLOG_URLS[game], stream=True, timeout=HTTP_TIMEOUT) as response:
+        response.raise_for_status()
+        if not response.url.startswith(PLAYLOG_URLS[game]):
+            raise SessionExpired(f"Redirected to {response.url}")
+        return list(parse_playlog_html(game, text_chunks(response), since))
+
+
+async def _high_water_marks(pairs) -> dict[tuple[str, str], datetime]:
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            """
+            SELECT k.account, k.game,
+                   (SELECT max(played_at) FROM public.play_log AS l
+                    WHERE l.account = k.account AND l.game = k.game) AS newest
+            FROM unnest($1::text[], $2::text[]) AS k(account, game)
+            """,
+            [account for account, _ in pairs],
+            [game for _, game in pairs],
+        )
+    return {(row["account"], row["game"]): row["newest"] for row in rows}
+
+
+async def _insert(records: list[tuple]) -> int:
+    """COPY `records` in and keep only the ones not stored yet. Returns the count."""
+    if not records:
+        return 0
+    columns = ", ".join(PLAYLOG_COLUMNS)
+    async with acquire() as conn, conn.transaction():
+        await conn.execute(
+            "CREATE TEMP TABLE play_log_incoming (LIKE public.play_log) ON COMMIT DROP"
+        )
+        await conn.copy_records_to_table(
+            "play_log_incoming", records=records, columns=PLAYLOG_COLUMNS
+        )
+        status = await conn.execute(f"""
+            INSERT INTO public.play_log ({columns})
+            SELECT {columns} FROM play_log_incoming
+            ON CONFLICT (account, game, played_at, track) DO NOTHING
+            """)
+    return int(status.split()[-1])
+
+
+async def ingest_playlogs(accounts: list[dict], games: list[str]) -> int:
+    """
+    Store the plays newer than each (account, game)'s high-water mark.
+
+    Pairs without a usable saved session are skipped; the scraper refreshes
+    the session, so they are picked up on the next run. Returns the number
+    of plays inserted.
+    """
+    pairs = [(account["name"], game) for account in accounts for game in games]
+    marks = await _high_water_marks(pairs)
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_SCRAPES)
+
+    async def collect(account: str, game: str) -> list[tuple]:
+        async with semaphore:
+            storage_state = await load_session(game, account)
+            if storage_state is None:
+                return []
+            # A jar per pair, so one account's cookies never reach another's requests
+            with http_session() as session:
+                session.cookies = cookie_jar(storage_state.get("cookies", []))
+                try:
+                    entries = await asyncio.to_thread(
+                        _download, session, game, marks.get((account, game))
+                    )
+                except Exception as e:
+                    print(f"⚠️ Could not read {account}/{game} playlog: {e}")
+                    return []
+                await save_cookies(game, account, storage_state, session.cookies)
+        return [(account, game, *entry) for entry in entries]
+
+    batches = await asyncio.gather(*(collect(a, g) for a, g in pairs))
+    inserted = await _insert([record for batch in batches for record in batch])
+    print(f"✅ Stored {inserted} new play(s) from the playlogs")
+    return inserted
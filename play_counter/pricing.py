@@ -0,0 +1,79 @@
+"""
+What one credit costs, per game and over time.
+
+PRICING (see config) is a JSON list of price entries, e.g.
+
+    [{"price": 40},
+     {"price": 100, "credits": 3, "game": "maimai", "since": "2025-07-01"}]
+
+An entry applies from `since` (or from the beginning) until a later entry
+for the same game or for all games replaces it. On the same day a
+game-specific entry wins. `credits` covers bundles: 3 credits for 100 THB
+cost 33.33 THB each.
+"""
+
+from dataclasses import dataclass
+from datetime import date
+from functools import cache
+
+from play_counter import config
+
+
+@dataclass(frozen=True)
+class Price:
+    price: float
+    credits: int = 1
+    game: str | None = None
+    since: date = date.min
+
+    @property
+    def per_play(self) -> float:
+        return self.price / self.credits
+
+
+class Pricing:
+    def __init__(self, prices: list[Price]):
+        if not any(p.since == date.min and p.game is None for p in prices):
+            raise ValueError("PRICING needs an entry for all games without `since`")
+        self.prices = sorted(prices, key=lambda p: (p.since, p.game is not None))
+
+    @classmethod
+    def from_config(cls, entries: list[dict]) -> "Pricing":
+        return cls(
+            [
+                Price(
+                    price=entry["price"],
+                    credits=entry.get("credits", 1),
+                    game=entry.get("game"),
+                    since=date.fromisoformat(
+                        entry.get("since") or date.min.isoformat()
+                    ),
+                )
+                for entry in entries
+            ]
+        )
+
+    def per_play(self, game: str, day: date) -> float:
+        """Price of one credit of `game` on `day`, in THB."""
+        cost = 0.0
+        for price in self.prices:
+            if price.since > day:
+                break
+            if price.game in (None, game):
+                cost = price.per_play
+        return cost
+
+    def changes(self, game: str, start: date, end: date) -> list[tuple[date, float]]:
+        """(first day, price) for each price of `game` in effect from `start` to `end`."""
+        days = [start] + [
+            p.since
+            for p in self.prices
+            if start < p.since <= end and p.game in (None, game)
+        ]
+        return [(day, self.per_play(game, day)) for day in sorted(set(days))]
+
+
+@cache
+def load_pricing() -> Pricing:
+    """The Pricing configured in PRICING."""
+    return Pricing.from_config(config.PRICING)
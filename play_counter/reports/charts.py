@@ -0,0 +1,130 @@
+"""
+PNG charts attached to the weekly and monthly reports.
+
+`render_chart()` draws one period of a `PlayHistory`:
+- the daily spend, as bars stacked per game,
+- the cumulative spend over the period,
+- each game's share of the period's spend.
+
+Drawing runs on a worker thread with matplotlib's object API, which has
+no pyplot global state, so the event loop keeps running. matplotlib is
+imported on the first render, so it doesn't slow down command startup.
+Images are cached by (period, hash of the plotted data), in memory and in
+CHART_CACHE_DIR. A daemon retry or a re-sent report reuses the PNG
+instead of drawing it again.
+"""
+
+import asyncio
+import hashlib
+import io
+import os
+from datetime import date, timedelta
+
+import numpy as np
+
+from play_counter.analytics import PlayHistory, daily_spend
+from play_counter.config import CHART_CACHE_DIR
+from play_counter.pricing import Pricing
+from play_counter.utils.games import display_name
+
+_rendered: dict[tuple[str, str], bytes] = {}
+
+
+def _digest(title: str, start: date, labels: list[str], spend: np.ndarray) -> str:
+    h = hashlib.sha256(repr((title, start.isoformat(), labels)).encode())
+    h.update(np.ascontiguousarray(spend, np.float64).tobytes())
+    return h.hexdigest()[:16]
+
+
+def _draw(title: str, start: date, labels: list[str], spend: np.ndarray) -> bytes:
+    """Render (days × games) THB `spend` from `start` as a PNG."""
+    from matplotlib.dates import AutoDateLocator, ConciseDateFormatter
+    from matplotlib.figure import Figure
+
+    days = [start + timedelta(days=i) for i in range(len(spend))]
+    fig = Figure(figsize=(9, 6), dpi=100, layout="constrained")
+    grid = fig.add_gridspec(2, 2, height_ratios=(3, 2))
+    bars = fig.add_subplot(grid[0, :])
+    cumulative = fig.add_subplot(grid[1, 0], sharex=bars)
+    split = fig.add_subplot(grid[1, 1])
+
+    bottom = np.zeros(len(days))
+    for j, label in enumerate(labels):
+        bars.bar(days, spend[:, j], bottom=bottom, label=label)
+        bottom += spend[:, j]
+    bars.set_title(title)
+    bars.set_ylabel("THB per day")
+    bars.legend(loc="upper left")
+    locator = AutoDateLocator()
+    bars.xaxis.set_major_locator(locator)
+    bars.xaxis.set_major_formatter(ConciseDateFormatter(locator))
+
+    cumulative.plot(days, np.cumsum(spend.sum(axis=1)), marker="o", markersize=3)
+    cumulative.set_title("Cumulative spend")
+    cumulative.set_ylabel("THB")
+
+    totals = spend.sum(axis=0)
+    split.set_title("Per game")
+    if totals.any():
+        split.pie(totals, labels=labels, autopct="%1.0f%%")
+    else:
+        split.text(0.5, 0.5, "No plays", ha="center", va="center")
+        split.axis("off")
+
+    out = io.BytesIO()
+    fig.savefig(out, format="png")
+    return out.getvalue()
+
+
+async def render_chart(
+    period: str,
+    history: PlayHistory,
+    start: date,
+    end: date,
+    pricing: Pricing,
+    title: str,
+) -> tuple[str, bytes]:
+    """
+    Return (filename, PNG) for the period from `start` to `end`.
+
+    Args:
+        period: Cache key for the period, e.g. "week-2025-06-02"
+        history: Play history covering the period
+        start: First day of the period
+        end: Last day of the period
+        pricing: Prices to turn plays into THB
+        title: Title drawn above the daily bars
+    """
+    spend = daily_spend(history, pricing, start, end)
+    labels = [display_name(game) for game in history.games]
+    key = (period, _digest(title, start, labels, spend))
+    filename = f"{period}-{key[1]}.png"
+    path = os.path.join(CHART_CACHE_DIR, filename)
+
+    if key not in _rendered:
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                _rendered[key] = f.read()
+        else:
+            _rendered[key] = await asyncio.to_thread(_draw, title, start, labels, spend)
+            try:
+                os.makedirs(CHART_CACHE_DIR, exist_ok=True)
+                with open(path, "wb") as f:
+                    f.write(_rendered[key])
+            except OSError as e:
+                print(f"⚠️ Could not cache chart {filename}: {e}")
+    return filename, _rendered[key]
+
+
+async def chart_attachment(*args, **kwargs) -> tuple[list[dict], dict[str, bytes]]:
+    """
+    `render_chart()` as (embeds, files) for `outbox.enqueue`.
+
+    A chart that fails to render is left out so the text report still goes out.
+    """
+    try:
+        filename, png = await render_chart(*args, **kwargs)
+    except Exception as e:
+        print(f"⚠️ Could not render the report chart: {e}")
+        return [], {}
+    return [{"image": {"url": f"attachment://{filename}"}}], {filename: png}
@@ -0,0 +1,143 @@
+from datetime import date, timedelta
+
+from play_counter.analytics import PlayHistory, burn_down, daily_spend
+from play_counter.budget import load_rules
+from play_counter.config import ACCOUNTS, DEFAULT_ACCOUNT
+from play_counter.local_store import count_unsynced
+from play_counter.pricing import Pricing
+from play_counter.utils.games import display_name, game_emoji
+
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+
+def report_accounts() -> list[str | None]:
+    """
+    The accounts the reports cover, one section each: every account in
+    ACCOUNTS and, when there are several, None for all of them combined.
+    """
+    names = [account["name"] for account in ACCOUNTS]
+    return names + [None] if len(names) > 1 else names
+
+
+def account_heading(account: str | None) -> str:
+    """Suffix naming `account` in a report heading, empty with a single account."""
+    if len(ACCOUNTS) == 1:
+        return ""
+    return f" · {account or 'All accounts'}"
+
+
+async def play_totals(
+    history: PlayHistory, start: date, end: date, account: str | None = DEFAULT_ACCOUNT
+) -> dict[str, int]:
+    """
+    Plays per game from `start` to `end`, read from the Postgres rollups.
+
+    Falls back to the local history while Postgres is unreachable or the
+    local store still holds unsynced days in the range.
+    """
+    if not await count_unsynced(account, start, end):
+        try:
+            from play_counter.rollups import get_range_totals
+
+            return await get_range_totals(start, end, history.games, account)
+        except Exception as e:
+            print(f"⚠️ Could not read the rollups, using the local store: {e}")
+    return history.totals(start, end)
+
+
+def spend_lines(
+    totals: dict[str, int], spend: dict[str, float], days: int
+) -> list[str]:
+    """
+    One "plays → cost (avg per day)" line per game followed by a total line.
+
+    Args:
+        totals: Plays per game for the period, in display order
+        spend: THB spent per game over the period
+        days: Length of the period, used for the daily average
+    """
+
+    def line(label: str, plays: int, cost: float) -> str:
+        avg = cost / days if plays > 0 else 0
+        return f"{label}: {plays} plays → **{cost:,.0f} THB** (avg {avg:.2f} THB/day)"
+
+    lines = [
+        line(f"{game_emoji(game)} **{display_name(game)}**", plays, spend[game])
+        for game, plays in totals.items()
+    ]
+    lines.append(line("**Total**", sum(totals.values()), sum(spend.values())))
+    return lines
+
+
+def period_spend(
+    history: PlayHistory, pricing: Pricing, start: date, end: date
+) -> dict[str, float]:
+    """THB spent per game from `start` to `end`."""
+    sums = daily_spend(history, pricing, start, end).sum(axis=0)
+    return {game: float(total) for game, total in zip(history.games, sums)}
+
+
+def trend_lines(
+    history: PlayHistory, start: date, end: date, pricing: Pricing
+) -> list[str]:
+    """
+    Rolling plays and spend, streaks, busiest weekday and plays-per-day percentiles
+    for the period from `start` to `end`.
+    """
+    windows = []
+    for days in (7, 30):
+        plays = int(history.rolling(days, end, end)[-1])
+        spend = daily_spend(history, pricing, end - timedelta(days=days - 1), end)
+        windows.append(f"{days} days: **{plays} plays** ({spend.sum():,.0f} THB)")
+    current, longest = history.streaks(end)
+    weekdays = history.weekday_totals(start, end)
+    pct = history.percentiles(start, end, (50, 90))
+
+    lines = [
+        "📈 Last " + " · last ".join(windows),
+        f"🔥 Streak: {current} day(s) (longest {longest})",
+    ]
+    if weekdays.any():
+        busiest = int(weekdays.argmax())
+        lines.append(f"📅 Busiest day: {WEEKDAYS[busiest]} ({weekdays[busiest]} plays)")
+        lines.append(
+            f"🎯 Plays on days played: median {pct[50]:.0f}, 90th percentile {pct[90]:.0f}"
+        )
+    return lines
+
+
+def budget_lines(
+    history: PlayHistory,
+    start: date,
+    end: date,
+    pricing: Pricing,
+    period: str,
+    account: str | None,
+) -> list[str]:
+    """
+    Where each `period` ("week" or "month") budget of `account` stood at
+    `end`: what was left, or by how much and since when it was over.
+
+    `history` holds `account`'s plays (every account's when None). Rules
+    without an account count every account, so they are only reported
+    against a history that covers all of them.
+    """
+    covers_all = account is None or len(ACCOUNTS) == 1
+    lines = []
+    for _, rule in load_rules():
+        if rule.period != period:
+            continue
+        if rule.account != account and not (rule.account is None and covers_all):
+            continue
+        games = [rule.game] if rule.game else None
+        left = burn_down(history, pricing, rule.limit, start, end, games)
+        if left[-1] >= 0:
+            lines.append(
+                f"💰 {rule.label}: {left[-1]:,.0f} of {rule.limit:,.0f} THB left"
+            )
+        else:
+            over = start + timedelta(days=int((left < 0).argmax()))
+            lines.append(
+                f"🚨 {rule.label}: over by {-left[-1]:,.0f} THB since {over:%d %b}"
+            )
+    return lines
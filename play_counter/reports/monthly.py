@@ -1,64 +1,77 @@
-import requests
-import json
+from datetime import date
 
-from play_counter.db import connect_db
-from play_counter.utils.constants import COST_PER_PLAY, MONTHREPORT_WEBHOOK
-from play_counter.utils.date_helpers import last_month_range
+from play_counter.analytics import load_history, projection
+from play_counter.notifications import outbox
+from play_counter.pricing import Pricing, load_pricing
+from play_counter.reports.charts import chart_attachment
+from play_counter.reports.common import (
+    account_heading,
+    budget_lines,
+    period_spend,
+    play_totals,
+    report_accounts,
+    spend_lines,
+    trend_lines,
+)
+from play_counter.utils.constants import MONTHREPORT_WEBHOOK
+from play_counter.utils.date_helpers import last_month_range, period_start
+from play_counter.utils.games import tracked_games
 
 
 async def generate_monthly_report():
-    """Generates a report of monthly play averages and sends it to Discord."""
+    """Generates a report of monthly play averages per account and queues it for Discord."""
     # Get the date range for the last month
     start, end = last_month_range()
-    conn = await connect_db()
-    try:
-        # Query for last month's data
-        query = """
-            SELECT SUM(maimai_play_count) AS maimai_total,
-                   SUM(chunithm_play_count) AS chunithm_total
-            FROM public.play_data 
-            WHERE play_date BETWEEN $1 AND $2;
-        """
-        row = await conn.fetchrow(query, start, end)
+    pricing = load_pricing()
+    for account in report_accounts():
+        await _queue_account_report(account, start, end, pricing)
 
-        # Default to 0 if no data exists
-        maimai_total = row["maimai_total"] or 0
-        chunithm_total = row["chunithm_total"] or 0
 
-        # Calculate costs
-        cost_maimai = maimai_total * COST_PER_PLAY
-        cost_chunithm = chunithm_total * COST_PER_PLAY
-        total_cost = cost_maimai + cost_chunithm
+async def _queue_account_report(
+    account: str | None, start: date, end: date, pricing: Pricing
+):
+    heading = account_heading(account)
+    # Load the play history once; every figure below is computed from it
+    history = await load_history(tracked_games(), account)
+    month = await play_totals(history, start, end, account)
+    year_start = period_start("year", start)
+    year_total = sum((await play_totals(history, year_start, end, account)).values())
+    year_spend = sum(period_spend(history, pricing, year_start, end).values())
+    year_projected = projection(history, year_start, date(start.year, 12, 31), end)
+    # Projected plays at the average price paid so far this year
+    year_projected_spend = year_projected * year_spend / year_total if year_total else 0
 
-        # Calculate averages
-        days = (end - start).days + 1
-        avg_maimai = cost_maimai / days if maimai_total > 0 else 0
-        avg_chunithm = cost_chunithm / days if chunithm_total > 0 else 0
-        avg_total = total_cost / days if (maimai_total + chunithm_total) > 0 else 0
-
-        # Generate the report message
-        report_content = (
-            f"📊 **Monthly Play Report ({start:%B %Y})**\n\n"
-            f"🎵 **maimai**: {maimai_total} plays → **{cost_maimai:,} THB** (avg {avg_maimai:.2f} THB/day)\n"
-            f"🎶 **CHUNITHM**: {chunithm_total} plays → **{cost_chunithm:,} THB** (avg {avg_chunithm:.2f} THB/day)\n"
-            f"**Total**: {maimai_total + chunithm_total} plays → **{total_cost:,} THB** (avg {avg_total:.2f} THB/day)"
-        )
-
-        # Send to Discord
-        message = {
-            "username": "桃井 愛莉",
-            "avatar_url": "https://pbs.twimg.com/media/F2kuFKjaYAEWnpO?format=jpg&name=4096x4096",
-            "content": report_content,
-        }
-        response = requests.post(
-            MONTHREPORT_WEBHOOK,
-            data=json.dumps(message),
-            headers={"Content-Type": "application/json"},
+    # Costs and daily averages over the length of the month
+    days = (end - start).days + 1
+    report_content = (
+        f"📊 **Monthly Play Report ({start:%B %Y}){heading}**\n\n"
+        + "\n".join(
+            spend_lines(month, period_spend(history, pricing, start, end), days)
+            + budget_lines(history, start, end, pricing, "month", account)
         )
+        + f"\n📅 **{start:%Y} so far**: {year_total} plays → **{year_spend:,.0f} THB**"
+        + f" (on pace for {year_projected_spend:,.0f} THB)\n\n"
+        + "\n".join(trend_lines(history, start, end, pricing))
+    )
+    embeds, files = await chart_attachment(
+        f"month-{start:%Y-%m}",
+        history,
+        start,
+        end,
+        pricing,
+        f"{start:%B %Y}{heading}",
+    )
 
-        if response.status_code == 204:
-            print("✅ Monthly report sent to Discord.")
-        else:
-            print(f"❌ Failed to send monthly report. Response: {response.text}")
-    finally:
-        await conn.close()
+    # Send to Discord
+    message = {
+        "username": "桃井 愛莉",
+        "avatar_url": "https://pbs.twimg.com/media/F2kuFKjaYAEWnpO?format=jpg&name=4096x4096",
+        "content": report_content,
+        "embeds": embeds,
+    }
+    outbox.enqueue(
+        MONTHREPORT_WEBHOOK,
+        message,
+        label=f"monthly report{heading}",
+        files=files,
+    )
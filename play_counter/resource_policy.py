@@ -0,0 +1,93 @@
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+from play_counter.metrics import metrics
+
+
+class TrafficMeter:
+    """Counts requests, bytes received and aborted requests for one browser context."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.requests = 0
+        self.bytes = 0
+        self.blocked = 0
+
+    async def on_request_finished(self, request):
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return
+        self.requests += 1
+        self.bytes += sizes["responseBodySize"] + sizes["responseHeadersSize"]
+
+    @asynccontextmanager
+    async def page(self, name: str):
+        """Measure the time and traffic of one page load."""
+        start = time.perf_counter()
+        requests, received, blocked = self.requests, self.bytes, self.blocked
+        try:
+            with metrics.span("page_load", page=name):
+                yield
+        finally:
+            metrics.inc("page_bytes_total", self.bytes - received, page=name)
+            metrics.inc("requests_blocked_total", self.blocked - blocked, page=name)
+            print(
+                f"📦 {self.label} {name}: {(self.bytes - received) / 1024:.1f} KB, "
+                f"{self.requests - requests} requests, {self.blocked - blocked} blocked "
+                f"in {time.perf_counter() - start:.2f}s"
+            )
+
+    def print_total(self):
+        print(
+            f"📦 {self.label} total: {self.bytes / 1024:.1f} KB, "
+            f"{self.requests} requests, {self.blocked} blocked"
+        )
+
+
+class ResourcePolicy:
+    """
+    Request interception for scraping contexts.
+
+    Aborts requests whose resource type is in `blocked_types`, and any
+    sub-resource served from a host outside `allowed_hosts` (matched by
+    domain suffix). Page navigations are never aborted so redirects through
+    the login flow keep working.
+    """
+
+    def __init__(
+        self, blocked_types: list[str], allowed_hosts: list[str], enabled: bool = True
+    ):
+        self.blocked_types = set(blocked_types)
+        self.allowed_hosts = allowed_hosts
+        self.enabled = enabled
+
+    def _is_first_party(self, url: str) -> bool:
+        host = urlsplit(url).hostname or ""
+        return any(
+            host == allowed or host.endswith(f".{allowed}")
+            for allowed in self.allowed_hosts
+        )
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        if not self.enabled or resource_type == "document":
+            return False
+        return resource_type in self.blocked_types or not self._is_first_party(url)
+
+    async def apply(self, context, label: str) -> TrafficMeter:
+        """Install the policy on `context` and return a meter for its traffic."""
+        meter = TrafficMeter(label)
+        context.on("requestfinished", meter.on_request_finished)
+
+        async def handle(route):
+            request = route.request
+            if self.should_block(request.resource_type, request.url):
+                meter.blocked += 1
+                await route.abort()
+            else:
+                await route.continue_()
+
+        if self.enabled:
+            await context.route("**/*", handle)
+        return meter
@@ -0,0 +1,153 @@
+"""
+Week/month/year aggregates of public.plays.
+
+Every write to public.plays adds the change in each day's new plays to
+public.play_rollups, so the weekly/monthly reports read a few rows per game
+(`get_range_totals`) instead of summing the raw table. Run `python -m play_counter.rollups backfill` to rebuild the
+rollups from history and `... check` to compare them against the raw data.
+"""
+
+import asyncio
+import sys
+from datetime import date, timedelta
+
+from play_counter.db import (
+    DEFAULT_ACCOUNT,
+    ROLLUP_PERIODS,
+    acquire,
+    close_pool,
+    ensure_schema,
+)
+from play_counter.utils.date_helpers import period_end, period_start
+
+_AGGREGATE_QUERY = """
+    SELECT account, date_trunc($1, play_date)::date AS period_start, game,
+           SUM(new_plays)::bigint AS plays
+    FROM public.plays
+    GROUP BY 1, 2, 3
+"""
+
+
+def split_range(
+    start: date, end: date, periods: tuple[str, ...] = ROLLUP_PERIODS[::-1]
+) -> tuple[list[tuple[str, date]], list[date]]:
+    """
+    Cover `start`..`end` with whole (period, period_start) rollups, largest
+    periods first, and return them with the leftover days that need the raw table.
+    """
+    if not periods:
+        return [], [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    period, smaller = periods[0], periods[1:]
+    first = period_start(period, start)
+    if first < start:
+        first = period_end(period, start) + timedelta(days=1)
+    whole, day = [], first
+    while day <= end and period_end(period, day) <= end:
+        whole.append((period, day))
+        day = period_end(period, day) + timedelta(days=1)
+    if not whole:
+        return split_range(start, end, smaller)
+
+    left = split_range(start, first - timedelta(days=1), smaller)
+    right = split_range(day, end, smaller)
+    return left[0] + whole + right[0], left[1] + right[1]
+
+
+async def get_range_totals(
+    start: date, end: date, games, account: str | None = DEFAULT_ACCOUNT
+) -> dict[str, int]:
+    """
+    Plays per game from `start` to `end`, read from the rollups where whole
+    periods fit. With `account` None, every account is counted.
+    """
+    periods, days = split_range(start, end)
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            """
+            SELECT game, SUM(plays)::bigint AS plays FROM (
+                SELECT r.game, r.plays FROM public.play_rollups r
+                JOIN unnest($3::text[], $4::date[]) AS w(period, period_start)
+                  USING (period, period_start)
+                WHERE ($1::text IS NULL OR r.account = $1) AND r.game = ANY($2::text[])
+                UNION ALL
+                SELECT game, new_plays FROM public.plays
+                WHERE ($1::text IS NULL OR account = $1) AND game = ANY($2::text[])
+                  AND play_date = ANY($5::date[])
+            ) AS parts
+            GROUP BY game
+            """,
+            account,
+            list(games),
+            [period for period, _ in periods],
+            [first for _, first in periods],
+            days,
+        )
+    found = {row["game"]: row["plays"] for row in rows}
+    return {game: found.get(game, 0) for game in games}
+
+
+async def backfill_rollups():
+    """Rebuild every rollup from public.plays in one transaction."""
+    async with acquire() as conn, conn.transaction():
+        await conn.execute("LOCK TABLE public.plays IN SHARE MODE")
+        await conn.execute("DELETE FROM public.play_rollups")
+        for period in ROLLUP_PERIODS:
+            await conn.execute(
+                f"""
+                INSERT INTO public.play_rollups
+                    (account, period, period_start, game, plays)
+                SELECT account, $1, period_start, game, plays
+                FROM ({_AGGREGATE_QUERY}) AS totals
+                """,
+                period,
+            )
+    print("✅ Rollups rebuilt from plays")
+
+
+async def check_rollups() -> list[dict]:
+    """Return every rollup row that disagrees with the raw data (empty if consistent)."""
+    mismatches = []
+    async with acquire() as conn:
+        for period in ROLLUP_PERIODS:
+            rows = await conn.fetch(
+                f"""
+                SELECT COALESCE(r.account, t.account) AS account,
+                       COALESCE(r.period_start, t.period_start) AS period_start,
+                       COALESCE(r.game, t.game) AS game,
+                       COALESCE(r.plays, 0) AS rollup_plays,
+                       COALESCE(t.plays, 0) AS raw_plays
+                FROM (SELECT * FROM public.play_rollups WHERE period = $1) AS r
+                FULL OUTER JOIN ({_AGGREGATE_QUERY}) AS t
+                  USING (account, period_start, game)
+                WHERE COALESCE(r.plays, 0) <> COALESCE(t.plays, 0)
+                """,
+                period,
+            )
+            mismatches += [{"period": period, **dict(row)} for row in rows]
+
+    for m in mismatches:
+        print(
+            f"❌ {m['account']} {m['period']} {m['period_start']} {m['game']}: "
+            f"rollup {m['rollup_plays']} vs raw {m['raw_plays']}"
+        )
+    if not mismatches:
+        print("✅ Rollups match plays")
+    return mismatches
+
+
+async def _main(command: str) -> int:
+    try:
+        await ensure_schema()
+        if command == "backfill":
+            await backfill_rollups()
+            return 0
+        return 1 if await check_rollups() else 0
+    finally:
+        await close_pool()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2 or sys.argv[1] not in ("backfill", "check"):
+        print("Usage: python -m play_counter.rollups {backfill|check}")
+        sys.exit(2)
+    sys.exit(asyncio.run(_main(sys.argv[1])))
@@ -1,165 +1,652 @@
 import asyncio
 import re
+import time
+from abc import ABC, abstractmethod
+from html.parser import HTMLParser
 
 import requests
-from playwright.async_api import async_playwright
+from playwright.async_api import TimeoutError as PlaywrightTimeout
 
-from play_counter.config import PASSWORD, USERNAME
-from play_counter.utils.constants import DISCORD_WEBHOOK_URL, HOME_URLS, LOGIN_URLS
+from play_counter.browser_pool import BrowserPool
+from play_counter.config import (
+    ACCOUNTS,
+    ALLOWED_HOSTS,
+    BLOCK_RESOURCES,
+    BLOCKED_RESOURCE_TYPES,
+    MAX_CONCURRENT_SCRAPES,
+    SCRAPE_ENGINES,
+    TRACE_MODE,
+)
+from play_counter.login_flow import (
+    AuthFailed,
+    SelectorChanged,
+    Step,
+    TransientError,
+    run_steps,
+)
+from play_counter.metrics import metrics
+from play_counter.notifications import outbox
+from play_counter.resource_policy import ResourcePolicy
+from play_counter.session_store import load_session, save_session
+from play_counter.utils.constants import (
+    DISCORD_WEBHOOK_URL,
+    HOME_URLS,
+    LOGIN_URLS,
+    PLAYER_DATA_URLS,
+)
 
-MAX_RETRIES = 3
-RETRY_DELAY = 2  # seconds
+HTTP_TIMEOUT = 15  # seconds
+# Milliseconds to wait for each condition in the login flow
+CHECKBOX_TIMEOUT = 2000  # for a click to show up as checked
+SUBMIT_TIMEOUT = 10000  # for the login button to be enabled
+PARSE_TIMEOUT = 10000  # for the play count element
+CHECKBOX_CLICKS = 3
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64; rv:128.0) Gecko/20100101 Firefox/128.0"
 
+# Nested div classes (outermost first) wrapping the play count on Player Data
+PLAY_COUNT_CLASSES = {
+    "chunithm": [{"user_data_play_count"}, {"user_data_text"}],
+    "maimai": [{"m_5", "m_b_5", "t_r", "f_12"}],
+}
+AGREE_CHECKBOXES = {
+    # maimai's label has an extra .agree class
+    "maimai": "label.c-form__label--bg.agree input#agree",
+    # CHUNITHM's doesn't; skip maimai's in case both are on the page
+    "chunithm": "label.c-form__label--bg:not(.agree) input#agree",
+}
+# Error box aime-gw shows when the SEGA ID or password is wrong
+LOGIN_ERROR_SELECTOR = ".c-form__error, .c-alert--error"
 
-def send_discord_notification(game: str, error_message: str):
-    """Send notification to Discord when scraping fails."""
+
+class SessionExpired(Exception):
+    """The saved session no longer reaches the Player Data page."""
+
+
+class ScrapeFailed(Exception):
+    """
+    Every engine failed to read the play count.
+
+    `auth_failed` is set if the site rejected the credentials, in which
+    case trying again later won't help.
+    """
+
+    def __init__(self, message: str, auth_failed: bool = False):
+        super().__init__(message)
+        self.auth_failed = auth_failed
+
+
+class UnreadablePlayCount(Exception):
+    """The play count element is on the page but its text isn't a count."""
+
+
+def send_discord_notification(game: str, error_message: str, account: str = ""):
+    """Queue a Discord alert for when scraping fails."""
+    account_line = f"**Account:** {account}\n" if account else ""
     payload = {
-        "content": f"🚨 **Scraping Failed** 🚨\n\n**Game:** {game}\n**Error:** {error_message}\n**All {MAX_RETRIES} retries exhausted.**"
+        "content": f"🚨 **Scraping Failed** 🚨\n\n{account_line}**Game:** {game}\n**Error:** {error_message}\n**All retries exhausted.**"
     }
+    outbox.enqueue(DISCORD_WEBHOOK_URL, payload, label=f"{game} scrape failure alert")
+
+
+def _check_response(response, what: str):
+    """Treat rate limits and server errors on a navigation as transient."""
+    if response is not None and (response.status == 429 or response.status >= 500):
+        raise TransientError(f"{what} answered HTTP {response.status}")
+
+
+async def _ensure_checked(page, game: str):
+    """
+    Click the agreement checkbox until it reports checked, without sleeping.
+
+    The state is read again before every re-click: a click that registered
+    after the wait timed out must not be undone by toggling it back off.
+    """
+    checkbox = page.locator(AGREE_CHECKBOXES[game])
+    checked = page.locator(f"{AGREE_CHECKBOXES[game]}:checked")
+    if game == "chunithm":
+        # Clicking the label text is what toggles CHUNITHM's checkbox
+        target = page.get_by_text("Agree to the terms of use for Aime service")
+    else:
+        target = checkbox
 
+    for click in range(1, CHECKBOX_CLICKS + 1):
+        if click > 1:
+            if await checkbox.is_checked():
+                return
+            print(f"🔄 Checkbox unchecked, clicking again... (attempt {click})")
+            metrics.inc("checkbox_reclicks_total", game=game)
+        await target.click()
+        try:
+            await checked.wait_for(state="attached", timeout=CHECKBOX_TIMEOUT)
+            return
+        except PlaywrightTimeout:
+            continue
+    raise SelectorChanged(f"Agreement checkbox still unchecked after {click} clicks")
+
+
+async def _wait_for_home(page, game: str):
+    """
+    Wait for the game's home page after submitting the form, or for the
+    login error that means the credentials were rejected.
+
+    The home page wait is only cancelled once the error box has actually
+    shown up; if watching for it fails, the home page still decides. A home
+    page that doesn't load is a TransientError.
+    """
+    home = asyncio.create_task(
+        page.wait_for_url(HOME_URLS[game], wait_until="domcontentloaded")
+    )
+    rejected = asyncio.create_task(
+        page.locator(LOGIN_ERROR_SELECTOR).first.wait_for(state="visible")
+    )
     try:
-        response = requests.post(DISCORD_WEBHOOK_URL, json=payload)
-        if response.status_code == 204:
-            print("✅ Discord notification sent successfully")
-        else:
-            print(f"⚠️ Failed to send Discord notification: {response.status_code}")
-    except Exception as e:
-        print(f"⚠️ Error sending Discord notification: {e}")
+        done, _ = await asyncio.wait(
+            {home, rejected}, return_when=asyncio.FIRST_COMPLETED
+        )
+        if rejected in done and rejected.exception() is None:
+            message = await page.locator(LOGIN_ERROR_SELECTOR).first.inner_text()
+            raise AuthFailed(" ".join(message.split()) or "Login rejected")
+        await asyncio.wait({home})
+    finally:
+        pending = [task for task in (home, rejected) if not task.done()]
+        for task in pending:
+            task.cancel()
+        # Let them finish cancelling; their CancelledError is not ours
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    error = home.exception()
+    if error is not None:
+        print(f"❌ Failed to load {game} home page from {page.url}")
+        reason = str(error).split("\n", 1)[0]
+        raise TransientError(f"Home page didn't load: {reason}") from error
+
+
+def _login_steps(page, game: str, account: dict) -> list[Step]:
+    """The aime-gw SEGA ID login as `login_flow` steps, ending on the home page."""
+
+    async def load_form():
+        print(f"🔄 Logging into {game} as {account['name']}...")
+        response = await page.goto(LOGIN_URLS[game], wait_until="domcontentloaded")
+        _check_response(response, "Login page")
+
+    async def open_sega_id():
+        await page.locator("span.c-button--openid--segaId").click()
+
+    async def fill():
+        await page.locator("#sid").fill(account["username"])
+        await page.locator("#password").fill(account["password"])
+
+    async def agree():
+        # Check the agreement checkbox right before login
+        await _ensure_checked(page, game)
+
+    async def submit():
+        # Clicking waits for the button to be enabled
+        print("🔄 Waiting for login button to be enabled...")
+        await page.locator("button#btnSubmit:not([disabled])").click(
+            timeout=SUBMIT_TIMEOUT
+        )
+        print("✅ Login button clicked successfully")
+
+    async def wait_for_home():
+        print(f"🔄 Waiting for {game} home page...")
+        await _wait_for_home(page, game)
+
+    # A reload brings back a form that is missing, half rendered or already submitted
+    return [
+        Step("load_form", load_form, navigates=True),
+        Step("open_sega_id", open_sega_id, resume_from="load_form"),
+        Step("fill", fill, resume_from="load_form"),
+        Step("agree", agree, resume_from="load_form"),
+        Step("submit", submit, resume_from="load_form"),
+        Step("wait_for_home", wait_for_home, navigates=True, resume_from="load_form"),
+    ]
+
 
+async def _open_player_data(page, game: str) -> bool:
+    """
+    Navigate to the Player Data page.
+
+    Returns False when the site bounced us elsewhere (typically back to
+    LOGIN_URLS because the session is missing or expired).
+    """
+    response = await page.goto(PLAYER_DATA_URLS[game], wait_until="domcontentloaded")
+    _check_response(response, "Player Data page")
+    return page.url.startswith(PLAYER_DATA_URLS[game])
+
+
+def _scrape_steps(page, game: str, result: dict) -> list[Step]:
+    """Open Player Data and read the play count into `result["cumulative"]`."""
+
+    async def player_data():
+        if not await _open_player_data(page, game):
+            raise TransientError(f"Redirected to {page.url} instead of Player Data")
+
+    async def parse():
+        result["cumulative"] = await _parse_play_count(page, game)
+
+    return [
+        Step("player_data", player_data, navigates=True),
+        Step("parse", parse, resume_from="player_data"),
+    ]
+
+
+def _extract_play_count(game: str, text: str) -> int:
+    """
+    Turn the text of the play count element into an integer.
+
+    Raises UnreadablePlayCount rather than guessing, e.g. on a maintenance
+    notice or a page decoded with the wrong charset.
+    """
+    text = " ".join(text.split())
+    if game == "chunithm" and text.isdigit():
+        return int(text)
+    if game == "maimai":
+        match = re.search(r"maimaiDX total play count：\s*(\d+)", text)
+        if match:
+            return int(match.group(1))
+    raise UnreadablePlayCount(f"Unreadable {game} play count: {text[:80]!r}")
+
+
+async def _parse_play_count(page, game: str) -> int:
+    """Extract the cumulative play count from an open Player Data page."""
+    classes = " ".join(f"div.{'.'.join(sorted(c))}" for c in PLAY_COUNT_CLASSES[game])
+    play_count_text = await page.locator(classes).inner_text(timeout=PARSE_TIMEOUT)
+    return _extract_play_count(game, play_count_text)
+
+
+class _PlayCountParser(HTMLParser):
+    """
+    Streaming parser that captures the text of the play count element.
 
-async def fetch_cumulative(game: str) -> int:
+    Feed it chunks as they arrive; `done` flips once the element has closed so
+    the caller can stop downloading the rest of the page.
     """
-    Logs into the game website and retrieves the cumulative play count from the Player Data page.
 
-    For chunithm: Navigates to https://chunithm-net-eng.com/mobile/home/playerData
-       and extracts the number from:
-         <div class="user_data_play_count">
-             <div class="user_data_text">72</div>
-         </div>
+    def __init__(self, game: str):
+        super().__init__(convert_charrefs=True)
+        self.chain = PLAY_COUNT_CLASSES[game]
+        self.stack: list[set[str]] = []
+        self.capture_depth = None
+        self.parts: list[str] = []
+        self.done = False
+
+    def _matches(self) -> bool:
+        if not self.chain[-1] <= self.stack[-1]:
+            return False
+        remaining = len(self.chain) - 2
+        for classes in reversed(self.stack[:-1]):
+            if remaining < 0:
+                break
+            if self.chain[remaining] <= classes:
+                remaining -= 1
+        return remaining < 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag != "div" or self.done:
+            return
+        self.stack.append(set((dict(attrs).get("class") or "").split()))
+        if self.capture_depth is None and self._matches():
+            self.capture_depth = len(self.stack)
+
+    def handle_endtag(self, tag):
+        if tag != "div" or self.done or not self.stack:
+            return
+        if self.capture_depth == len(self.stack):
+            self.done = True
+        self.stack.pop()
+
+    def handle_data(self, data):
+        if self.capture_depth is not None and not self.done:
+            self.parts.append(data)
+
+    @property
+    def text(self) -> str | None:
+        return "".join(self.parts) if self.capture_depth is not None else None
+
+
+def parse_play_count_html(game: str, chunks) -> int | None:
+    """
+    Parse the play count out of Player Data HTML given as an iterable of chunks.
+
+    Returns None when the element is missing, e.g. on an error or login page,
+    and raises UnreadablePlayCount when its text isn't a count. Works on
+    saved pages too: `parse_play_count_html(game, [html])`.
+    """
+    parser = _PlayCountParser(game)
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done:
+            break
+    parser.close()
+    return None if parser.text is None else _extract_play_count(game, parser.text)
+
+
+def _cookie_key(cookie: dict) -> tuple[str, str, str]:
+    return cookie["name"], cookie.get("domain", ""), cookie.get("path", "/")
+
+
+def cookie_jar(cookies: list[dict]) -> requests.cookies.RequestsCookieJar:
+    """Convert Playwright storage_state cookies into a requests cookie jar."""
+    jar = requests.cookies.RequestsCookieJar()
+    for cookie in cookies:
+        expires = cookie.get("expires", -1)
+        jar.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain", ""),
+            path=cookie.get("path", "/"),
+            expires=None if expires is None or expires < 0 else expires,
+            secure=cookie.get("secure", False),
+            rest={"HttpOnly": None} if cookie.get("httpOnly") else {},
+        )
+    return jar
+
+
+def storage_cookies(jar, previous: list[dict]) -> list[dict]:
+    """
+    Convert a requests cookie jar back into storage_state cookies.
 
-    For maimai: Navigates to https://maimaidx-eng.com/maimai-mobile/playerData/ and uses regex
-       to extract the cumulative count (e.g., "maimaiDX total play count：300").
+    Attributes requests doesn't keep track of (sameSite) come from the
+    matching cookie in `previous`.
     """
-    last_error = None
+    known = {_cookie_key(cookie): cookie for cookie in previous}
+    cookies = []
+    for cookie in jar:
+        entry = {
+            "name": cookie.name,
+            "value": cookie.value,
+            "domain": cookie.domain,
+            "path": cookie.path,
+            "expires": -1 if cookie.expires is None else cookie.expires,
+            "httpOnly": cookie.has_nonstandard_attr("HttpOnly")
+            or cookie.has_nonstandard_attr("httponly"),
+            "secure": bool(cookie.secure),
+        }
+        entry["sameSite"] = known.get(_cookie_key(entry), {}).get("sameSite", "Lax")
+        cookies.append(entry)
+    return cookies
 
-    for attempt in range(1, MAX_RETRIES + 1):
+
+async def save_cookies(game: str, account: str, storage_state: dict, jar):
+    """Save the cookies the site set during an HTTP fetch, if any changed."""
+    previous = storage_state.get("cookies", [])
+    cookies = storage_cookies(jar, previous)
+    values = {_cookie_key(cookie): cookie["value"] for cookie in cookies}
+    if values != {_cookie_key(cookie): cookie["value"] for cookie in previous}:
+        await save_session(game, {**storage_state, "cookies": cookies}, account)
+
+
+def http_session() -> requests.Session:
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def text_chunks(response):
+    """Decoded chunks of a streamed response body."""
+    # requests assumes ISO-8859-1 for text/html without a charset, which
+    # garbles maimai's full-width colon
+    if "charset=" not in response.headers.get("Content-Type", "").lower():
+        response.encoding = "utf-8"
+    return response.iter_content(chunk_size=8192, decode_unicode=True)
+
+
+class ScrapeEngine(ABC):
+    """Interface for something that can read a game's cumulative play count."""
+
+    name = "base"
+
+    @abstractmethod
+    async def fetch(self, game: str, account: dict) -> int:
+        """
+        Return `account`'s cumulative play count for `game`.
+
+        Raises SessionExpired when the next engine should take over.
+        """
+
+
+class HttpEngine(ScrapeEngine):
+    """
+    Browserless engine: GET the Player Data page with cookies from the saved
+    session and stream it through `_PlayCountParser`.
+
+    Each (account, game) has its own requests session, whose cookie jar is
+    loaded from the session store before every fetch, so the cookies the
+    site sets for one account never reach another's requests. Cookies set
+    during a successful fetch are saved back.
+
+    Raises SessionExpired when there is no saved session or it has lapsed, so
+    the caller can fall back to a browser login, and UnreadablePlayCount
+    when the page doesn't show a count.
+    """
+
+    name = "http"
+
+    def __init__(self):
+        self.sessions: dict[tuple[str, str], requests.Session] = {}
+
+    def _get(self, session: requests.Session, game: str) -> int | None:
+        with session.get(
+            PLAYER_DATA_URLS[game], stream=True, timeout=HTTP_TIMEOUT
+        ) as response:
+            response.raise_for_status()
+            if not response.url.startswith(PLAYER_DATA_URLS[game]):
+                raise SessionExpired(f"Redirected to {response.url}")
+            return parse_play_count_html(game, text_chunks(response))
+
+    async def fetch(self, game: str, account: dict) -> int:
+        storage_state = await load_session(game, account["name"])
+        if storage_state is None:
+            raise SessionExpired("No saved session")
+
+        session = self.sessions.get((account["name"], game))
+        if session is None:
+            session = self.sessions[account["name"], game] = http_session()
+        # The store wins over the jar: a browser login may have renewed the session
+        session.cookies = cookie_jar(storage_state.get("cookies", []))
+
+        cumulative = await asyncio.to_thread(self._get, session, game)
+        if cumulative is None:
+            raise SessionExpired("Play count not found on Player Data page")
+        await save_cookies(game, account["name"], storage_state, session.cookies)
+        return cumulative
+
+
+class PlaywrightEngine(ScrapeEngine):
+    """Full browser engine: logs in when needed and retries with fresh contexts."""
+
+    name = "playwright"
+
+    def __init__(self, pool: BrowserPool):
+        self.pool = pool
+
+    async def fetch(self, game: str, account: dict) -> int:
+        return await _fetch_with_browser(game, self.pool, account)
+
+
+def _trace_path(label: str) -> str:
+    return f"trace-{label.replace('/', '-')}.zip"
+
+
+async def _fetch_with_browser(game: str, pool: BrowserPool, account: dict) -> int:
+    """
+    Scrape with Playwright.
+
+    Reuses the storage_state saved by the previous run and only goes through
+    the SEGA ID login if the site redirects us away. Login and scrape run as
+    `login_flow` steps, so a failure is retried from the step that failed,
+    in the same context, according to its failure class. Only if that
+    doesn't help is a second context tried, with every request allowed in
+    case the resource blocking broke the page. A rejected login is never
+    retried.
+    """
+    storage_state = await load_session(game, account["name"])
+    blocking = [True, False] if BLOCK_RESOURCES else [False]
+
+    for attempt, block in enumerate(blocking, 1):
         try:
-            async with async_playwright() as p:
-                browser = await p.firefox.launch(headless=True)
-                context = await browser.new_context()
+            return await _browser_attempt(
+                game, pool, account, storage_state, block, attempt
+            )
+        except Exception as e:
+            # Don't trust the cached session again if it got us into trouble
+            storage_state = None
+            metrics.inc("browser_attempt_failures_total", game=game)
+            print(f"⚠️ Attempt {attempt} failed: {e}")
+            if isinstance(e, AuthFailed) or attempt == len(blocking):
+                print("❌ All retries failed.")
+                raise
+            print("🔄 Trying a fresh context with every request allowed...")
+
+
+async def _browser_attempt(
+    game: str,
+    pool: BrowserPool,
+    account: dict,
+    storage_state: dict | None,
+    block: bool,
+    attempt: int,
+) -> int:
+    """
+    One browser context's worth of scraping.
+
+    With TRACE_MODE "on-retry", tracing starts at the first step retry (or
+    straight away on a second attempt). The trace is written to
+    trace-<game>.zip if the attempt fails.
+    """
+    label = _label(game, account)
+    policy = ResourcePolicy(BLOCKED_RESOURCE_TYPES, ALLOWED_HOSTS, enabled=block)
+
+    async with pool.context(label, storage_state=storage_state) as context:
+        meter = await policy.apply(context, label)
+        tracing = False
 
-                # Start tracing
+        async def start_tracing(failure=None):
+            nonlocal tracing
+            if not tracing:
                 await context.tracing.start(
                     screenshots=True, snapshots=True, sources=True
                 )
-                page = await context.new_page()
-
-                print(f"🔄 Logging into {game}... (Attempt {attempt})")
-                await page.goto(LOGIN_URLS[game], wait_until="domcontentloaded")
-                await page.locator("span.c-button--openid--segaId").click()
-                await page.locator("#sid").fill(USERNAME)
-                await page.locator("#password").fill(PASSWORD)
-
-                # Check the agreement checkbox right before login
-                if game == "maimai":
-                    # Maimai has specific .agree class
-                    await page.locator(
-                        "label.c-form__label--bg.agree input#agree"
-                    ).click()
-                    await page.wait_for_timeout(1000)
-
-                    # Ensure checkbox is checked (retry if needed)
-                    for i in range(3):  # Try up to 3 times
-                        is_checked = await page.locator(
-                            "label.c-form__label--bg.agree input#agree"
-                        ).is_checked()
-                        if is_checked:
-                            break
-                        print(
-                            f"🔄 Checkbox unchecked, clicking again... (attempt {i + 1})"
-                        )
-                        await page.locator(
-                            "label.c-form__label--bg.agree input#agree"
-                        ).click()
-                        await page.wait_for_timeout(500)
-
-                elif game == "chunithm":
-                    # Chunithm uses basic .c-form__label--bg without .agree class
-                    # Use text-based selector to avoid conflict with maimai checkbox
-                    await page.get_by_text(
-                        "Agree to the terms of use for Aime service"
-                    ).click()
-                    await page.wait_for_timeout(1000)
-
-                    # Ensure checkbox is checked (retry if needed)
-                    for i in range(3):  # Try up to 3 times
-                        # Use the specific checkbox that's NOT in the .agree label
-                        is_checked = await page.locator(
-                            "label.c-form__label--bg:not(.agree) input#agree"
-                        ).is_checked()
-                        if is_checked:
-                            break
-                        print(
-                            f"🔄 Checkbox unchecked, clicking again... (attempt {i + 1})"
-                        )
-                        await page.get_by_text(
-                            "Agree to the terms of use for Aime service"
-                        ).click()
-                        await page.wait_for_timeout(500)
-
-                # Wait for login button to be enabled and click
-                print("🔄 Waiting for login button to be enabled...")
-                await page.wait_for_selector(
-                    "button#btnSubmit:not([disabled])", timeout=10000
+                tracing = True
+
+        if TRACE_MODE == "always" or (TRACE_MODE == "on-retry" and attempt > 1):
+            await start_tracing()
+        on_retry = start_tracing if TRACE_MODE == "on-retry" else None
+        page = await context.new_page()
+
+        failed = True
+        try:
+            start = time.perf_counter()
+            resumed = False
+            if storage_state is not None:
+                async with meter.page("player data"):
+                    resumed = await _open_player_data(page, game)
+            if resumed:
+                print(f"✅ Reused saved {game} session, login skipped")
+            else:
+                async with meter.page("login"):
+                    await run_steps(_login_steps(page, game, account), label, on_retry)
+            pool.record(label, "login", time.perf_counter() - start)
+
+            start = time.perf_counter()
+            result = {}
+            async with meter.page("player data"):
+                await run_steps(
+                    _scrape_steps(page, game, result),
+                    label,
+                    on_retry,
+                    start="parse" if resumed else None,
                 )
-                await page.locator("button#btnSubmit").click()
-                print("✅ Login button clicked successfully")
-
-                print(f"🔄 Waiting for {game} home page...")
-                try:
-                    await page.wait_for_url(HOME_URLS[game])
-                except Exception as e:
-                    print(page.url)
-                    print(f"❌ Failed to load {game} home page: {e}")
-                    await context.tracing.stop(path="trace.zip")
-                    await browser.close()
-                    raise
-
-                if game == "chunithm":
-                    await page.goto(
-                        f"{HOME_URLS[game]}playerData", wait_until="domcontentloaded"
-                    )
-                    play_count_text = await page.locator(
-                        "div.user_data_play_count div.user_data_text"
-                    ).inner_text()
-                    cumulative = (
-                        int(play_count_text) if play_count_text.isdigit() else 0
-                    )
-
-                elif game == "maimai":
-                    await page.goto(
-                        "https://maimaidx-eng.com/maimai-mobile/playerData/",
-                        wait_until="domcontentloaded",
-                    )
-                    play_count_text = await page.locator(
-                        "div.m_5.m_b_5.t_r.f_12"
-                    ).inner_text()
-                    match = re.search(
-                        r"maimaiDX total play count：(\d+)", play_count_text
-                    )
-                    cumulative = int(match.group(1)) if match else 0
-
-                await context.tracing.stop(path="trace.zip")
-                await browser.close()
-                print(f"✅ Fetched cumulative {game} play count: {cumulative}")
-                return cumulative
+            pool.record(label, "scrape", time.perf_counter() - start)
+            failed = False
+        finally:
+            meter.print_total()
+            if tracing:
+                keep = failed or TRACE_MODE == "always"
+                path = _trace_path(label) if keep else None
+                await context.tracing.stop(path=path)
+                if path:
+                    print(f"🧾 Trace written to {path}")
+
+        await save_session(game, await context.storage_state(), account["name"])
+        return result["cumulative"]
+
+
+def build_engines(pool: BrowserPool) -> list[ScrapeEngine]:
+    """Instantiate the engines named in SCRAPE_ENGINES, in fallback order."""
+    available = {
+        "http": HttpEngine,
+        "playwright": lambda: PlaywrightEngine(pool),
+    }
+    return [available[name]() for name in SCRAPE_ENGINES]
+
+
+def _label(game: str, account: dict) -> str:
+    return game if len(ACCOUNTS) == 1 else f"{account['name']}/{game}"
+
+
+async def _fetch(
+    game: str, pool: BrowserPool, engines: list[ScrapeEngine], account: dict
+) -> int:
+    """Try each engine in order and raise ScrapeFailed if none succeeds."""
+    label = _label(game, account)
+    last_error, auth_failed = None, False
+    for engine in engines:
+        start = time.perf_counter()
+        try:
+            with metrics.span("engine_fetch", engine=engine.name, game=game):
+                cumulative = await engine.fetch(game, account)
         except Exception as e:
+            metrics.inc("engine_failures_total", engine=engine.name, game=game)
             last_error = str(e)
-            print(f"⚠️ Attempt {attempt} failed: {e}")
-            if attempt < MAX_RETRIES:
-                print(f"⏳ Retrying in {RETRY_DELAY} seconds...")
-                await asyncio.sleep(RETRY_DELAY)
-            else:
-                print("❌ All retries failed.")
-                send_discord_notification(game, last_error)
-                return 0
+            auth_failed = auth_failed or isinstance(e, AuthFailed)
+            print(f"⚠️ {engine.name} engine failed for {label}: {e}")
+            continue
+        pool.record(label, engine.name, time.perf_counter() - start)
+        print(f"✅ Fetched cumulative {label} play count: {cumulative} ({engine.name})")
+        return cumulative
+    raise ScrapeFailed(last_error, auth_failed)
+
+
+async def fetch_all(
+    accounts: list[dict],
+    games: list[str],
+    pool: BrowserPool,
+    max_concurrency: int = MAX_CONCURRENT_SCRAPES,
+    engines: list[ScrapeEngine] | None = None,
+    pairs: list[tuple[dict, str]] | None = None,
+    failed: dict[tuple[str, str], Exception] | None = None,
+) -> dict[str, dict[str, int]]:
+    """
+    Scrape every (account, game) pair with at most `max_concurrency` in flight.
+
+    Returns cumulative counts keyed by account, then game. A pair that fails
+    is alerted on Discord and left out of the result, so one bad account
+    never costs the others their data; its error is added to `failed`
+    under (account name, game), if given. Pass `pairs` to scrape only those
+    instead of every account with every game, and `engines` to reuse them
+    (and their HTTP sessions) across calls.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    engines = engines or build_engines(pool)
+
+    async def scrape_one(account: dict, game: str) -> int | None:
+        async with semaphore:
+            try:
+                return await _fetch(game, pool, engines, account)
+            except Exception as e:
+                send_discord_notification(game, str(e), account["name"])
+                if failed is not None:
+                    failed[account["name"], game] = e
+                return None
+
+    if pairs is None:
+        pairs = [(account, game) for account in accounts for game in games]
+    values = await asyncio.gather(*(scrape_one(a, g) for a, g in pairs))
+
+    results: dict[str, dict[str, int]] = {}
+    for (account, game), value in zip(pairs, values):
+        if value is not None:
+            results.setdefault(account["name"], {})[game] = value
+    return results
@@ -0,0 +1,53 @@
+import json
+
+from play_counter.db import DEFAULT_ACCOUNT, acquire
+
+
+async def load_session(game: str, account: str = DEFAULT_ACCOUNT) -> dict | None:
+    """
+    Return the saved Playwright storage_state for `account` on `game`, or None on a miss.
+
+    Any database error is treated as a miss so a broken cache never blocks
+    the scrape; the caller simply falls back to a full login.
+    """
+    try:
+        async with acquire() as conn:
+            row = await conn.fetchrow(
+                """
+                SELECT storage_state FROM public.sega_sessions
+                WHERE account = $1 AND game = $2
+                """,
+                account,
+                game,
+            )
+    except Exception as e:
+        print(f"⚠️ Could not load {account}/{game} session: {e}")
+        return None
+
+    if row is None:
+        print(f"🔑 Session store miss for {account}/{game}")
+        return None
+    print(f"🔑 Session store hit for {account}/{game}")
+    return json.loads(row["storage_state"])
+
+
+async def save_session(game: str, storage_state: dict, account: str = DEFAULT_ACCOUNT):
+    """Persist the storage_state of a logged-in context for the next run."""
+    try:
+        async with acquire() as conn:
+            await conn.execute(
+                """
+                INSERT INTO public.sega_sessions
+                    (account, game, storage_state, updated_at)
+                VALUES ($1, $2, $3::jsonb, now())
+                ON CONFLICT (account, game) DO UPDATE
+                  SET storage_state = EXCLUDED.storage_state,
+                      updated_at = EXCLUDED.updated_at
+                """,
+                account,
+                game,
+                json.dumps(storage_state),
+            )
+        print(f"💾 Saved {account}/{game} session")
+    except Exception as e:
+        print(f"⚠️ Could not save {account}/{game} session: {e}")
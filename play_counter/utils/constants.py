@@ -1,6 +1,5 @@
 from play_counter.config import DISCORD_WEBHOOK_URL
 
-COST_PER_PLAY      = 40
 LOGIN_URLS = {
     "chunithm": (
         "https://lng-tgk-aime-gw.am-all.net/common_auth/login?site_id=chuniex"
@@ -15,5 +14,13 @@ HOME_URLS = {
     "chunithm": "https://chunithm-net-eng.com/mobile/home/",
     "maimai": "https://maimaidx-eng.com/maimai-mobile/home/",
 }
+PLAYER_DATA_URLS = {
+    "chunithm": "https://chunithm-net-eng.com/mobile/home/playerData",
+    "maimai": "https://maimaidx-eng.com/maimai-mobile/playerData/",
+}
+PLAYLOG_URLS = {
+    "chunithm": "https://chunithm-net-eng.com/mobile/record/playlog",
+    "maimai": "https://maimaidx-eng.com/maimai-mobile/record/",
+}
 WEEKREPORT_WEBHOOK = DISCORD_WEBHOOK_URL
 MONTHREPORT_WEBHOOK = DISCORD_WEBHOOK_URL
\ No newline at end of file
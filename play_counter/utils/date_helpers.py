@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 
 def last_week_range():
@@ -14,3 +14,26 @@ def last_month_range():
     last_end = first_current - timedelta(days=1)
     start = last_end.replace(day=1)
     return start.date(), last_end.date()
+
+
+def period_start(period: str, day: date) -> date:
+    """First day of the week (Monday), month or year containing `day`."""
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    if period == "year":
+        return day.replace(month=1, day=1)
+    raise ValueError(f"Unknown rollup period: {period}")
+
+
+def period_end(period: str, day: date) -> date:
+    """Last day of the week (Sunday), month or year containing `day`."""
+    if period == "week":
+        return period_start("week", day) + timedelta(days=6)
+    if period == "month":
+        following = day.replace(day=28) + timedelta(days=4)
+        return following - timedelta(days=following.day)
+    if period == "year":
+        return day.replace(month=12, day=31)
+    raise ValueError(f"Unknown rollup period: {period}")
@@ -0,0 +1,14 @@
+from play_counter.config import CONFIG, NOTIFICATION_CONFIG
+
+
+def tracked_games() -> list[str]:
+    """Games enabled in CONFIG, in the order they are listed."""
+    return [game for game, enable in CONFIG.items() if enable]
+
+
+def display_name(game: str) -> str:
+    return NOTIFICATION_CONFIG.get(game, {}).get("display_name", game)
+
+
+def game_emoji(game: str) -> str:
+    return NOTIFICATION_CONFIG.get(game, {}).get("emoji", "🎮")
@@ -0,0 +1,39 @@
+from datetime import date, timedelta
+
+
+def fill_gap(
+    last_date: date | None,
+    last_cumulative: int,
+    day: date,
+    cumulative: int,
+    strategy: str = "spread",
+) -> list[tuple[date, int, int]]:
+    """
+    Daily (play_date, new_plays, cumulative) rows from the last known day up to `day`.
+
+    Covers every day after `last_date` through `day` inclusive, so days missed
+    by failed or skipped runs get a row too. With the "spread" strategy the
+    plays since `last_date` are split evenly across those days (any remainder
+    goes to the most recent ones); with "today" they are all attributed to
+    `day` and the missing days record zero.
+
+    Without any earlier row there is nothing to diff against, so `day` records
+    zero new plays rather than the account's whole lifetime count.
+    """
+    if last_date is None:
+        return [(day, 0, cumulative)]
+
+    days = (day - last_date).days
+    delta = cumulative - last_cumulative
+    if strategy == "today":
+        shares = [0] * (days - 1) + [delta]
+    else:
+        base, extra = divmod(delta, days)
+        shares = [base + (1 if i >= days - extra else 0) for i in range(days)]
+
+    rows = []
+    running = last_cumulative
+    for offset, share in enumerate(shares, start=1):
+        running += share
+        rows.append((last_date + timedelta(days=offset), share, running))
+    return rows
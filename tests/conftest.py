@@ -0,0 +1,89 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# Read by play_counter.config on first use; nothing here talks to them
+for name, value in {
+    "DISCORD_WEBHOOK_URL": "http://127.0.0.1:9/webhook",
+    "DATABASE_URL": "postgresql://test@127.0.0.1:9/test",
+    "USERNAME": "test",
+    "PASSWORD": "test",
+}.items():
+    os.environ.setdefault(name, value)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "Site"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        cookie = self.headers.get("Cookie") or ""
+        self.server.requests.append((self.path, cookie))
+        self._respond(cookie)
+
+    def do_POST(self):
+        cookie = self.headers.get("Cookie") or ""
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.server.requests.append((self.path, cookie))
+        self.server.posts.append((self.path, self.headers.get("Content-Type"), body))
+        self._respond(cookie)
+
+    def _respond(self, cookie: str):
+        route = self.server.routes.get(self.path)
+        status, headers, body = route(cookie) if route else (404, {}, b"")
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class Site(ThreadingHTTPServer):
+    """
+    Local HTTP server standing in for a SEGA site.
+
+    `routes` maps a path to `handler(cookie_header) -> (status, headers, body)`;
+    `requests` records (path, cookie header) for every request, and `posts`
+    (path, content type, body) for every POST.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.base_url = f"http://127.0.0.1:{self.server_address[1]}"
+        self.routes = {}
+        self.requests: list[tuple[str, str]] = []
+        self.posts: list[tuple[str, str, bytes]] = []
+
+
+@pytest.fixture
+def saved_page():
+    """Load a page saved in tests/fixtures as text."""
+    return lambda name: (FIXTURES / name).read_text(encoding="utf-8")
+
+
+@pytest.fixture
+def site():
+    server = Site()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Point the local store at an empty SQLite file under tmp_path."""
+    from play_counter import config
+
+    monkeypatch.setattr(config, "LOCAL_STORE_PATH", str(tmp_path / "plays.sqlite3"))
@@ -0,0 +1,91 @@
+from datetime import date, timedelta
+
+from play_counter import budget
+from play_counter.analytics import PlayHistory, burn_down
+from play_counter.pricing import Pricing
+from play_counter.reports.common import budget_lines, trend_lines
+
+START = date(2025, 6, 1)
+# A price rise on the 3rd, so each day must be priced at its own price
+PRICING = Pricing.from_config([{"price": 40}, {"price": 50, "since": "2025-06-03"}])
+
+
+def _history() -> PlayHistory:
+    rows = [
+        (START + timedelta(days=day), game, plays)
+        for day, game, plays in [
+            (0, "maimai", 2),
+            (1, "chunithm", 1),
+            (2, "maimai", 3),
+            (3, "maimai", 1),
+            (3, "chunithm", 2),
+        ]
+    ]
+    return PlayHistory.from_rows(rows, ["maimai", "chunithm"])
+
+
+def test_rolling_sums_the_trailing_window():
+    end = START + timedelta(days=3)
+    assert _history().rolling(2, START, end).tolist() == [2, 3, 4, 6]
+
+
+def test_trend_lines_rolling_windows():
+    end = START + timedelta(days=3)
+    lines = trend_lines(_history(), START, end, PRICING)
+    assert lines[0] == (
+        "📈 Last 7 days: **9 plays** (420 THB) · last 30 days: **9 plays** (420 THB)"
+    )
+
+
+def test_burn_down_prices_each_day():
+    end = START + timedelta(days=3)
+    left = burn_down(_history(), PRICING, 400, START, end)
+    assert left.tolist() == [320, 280, 130, -20]
+
+
+def test_burn_down_counts_only_given_games():
+    end = START + timedelta(days=3)
+    left = burn_down(_history(), PRICING, 400, START, end, ["chunithm"])
+    assert left.tolist() == [400, 360, 360, 260]
+
+
+def test_budget_lines(monkeypatch):
+    rules = [
+        budget.BudgetRule(limit=400),
+        budget.BudgetRule(limit=500, game="chunithm"),
+        budget.BudgetRule(limit=100, period="week"),
+        budget.BudgetRule(limit=100, account="someone-else"),
+    ]
+    monkeypatch.setattr(
+        "play_counter.reports.common.load_rules",
+        lambda: [(str(i), rule) for i, rule in enumerate(rules)],
+    )
+    end = START + timedelta(days=29)
+
+    lines = budget_lines(_history(), START, end, PRICING, "month", "default")
+
+    assert lines == [
+        "🚨 Total monthly budget: over by 20 THB since 04 Jun",
+        "💰 CHUNITHM monthly budget: 360 of 500 THB left",
+    ]
+
+
+def test_budget_lines_of_one_of_several_accounts(monkeypatch):
+    rules = [
+        budget.BudgetRule(limit=400),
+        budget.BudgetRule(limit=500, account="alice"),
+        budget.BudgetRule(limit=100, account="bob"),
+    ]
+    monkeypatch.setattr(
+        "play_counter.reports.common.load_rules",
+        lambda: [(str(i), rule) for i, rule in enumerate(rules)],
+    )
+    accounts = [{"name": "alice"}, {"name": "bob"}]
+    monkeypatch.setattr("play_counter.reports.common.ACCOUNTS", accounts)
+    end = START + timedelta(days=29)
+
+    alice = budget_lines(_history(), START, end, PRICING, "month", "alice")
+    everyone = budget_lines(_history(), START, end, PRICING, "month", None)
+
+    assert alice == ["💰 Total monthly budget: 80 of 500 THB left"]
+    assert everyone == ["🚨 Total monthly budget: over by 20 THB since 04 Jun"]
@@ -0,0 +1,44 @@
+import asyncio
+
+from play_counter.api import ResponseCache
+
+
+def test_waiters_rebuild_when_the_builder_is_cancelled():
+    cache = ResponseCache()
+    calls = []
+
+    async def build():
+        calls.append("build")
+        await asyncio.sleep(0 if len(calls) > 1 else 10)
+        return {"plays": len(calls)}
+
+    async def run():
+        first = asyncio.create_task(cache.fetch("/spend/daily", build))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.fetch("/spend/daily", build))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await asyncio.wait_for(waiter, 1)
+
+    etag, body = asyncio.run(run())
+    assert body == b'{"plays":2}'
+    assert calls == ["build", "build"]
+    assert cache.get("/spend/daily") == (etag, body)
+
+
+def test_builder_errors_reach_every_waiter():
+    cache = ResponseCache()
+
+    async def build():
+        await asyncio.sleep(0.01)
+        raise ValueError("bad query")
+
+    async def run():
+        return await asyncio.gather(
+            cache.fetch("/history", build),
+            cache.fetch("/history", build),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert [str(result) for result in results] == ["bad query", "bad query"]
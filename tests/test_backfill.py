@@ -0,0 +1,94 @@
+import asyncio
+from datetime import date
+
+from play_counter import backfill, local_store
+
+
+def _stub(monkeypatch, calls):
+    async def record(name, *args):
+        calls.append(name)
+        return True
+
+    for name in ("test_db_connection", "ensure_schema", "sync_to_postgres"):
+        monkeypatch.setattr(backfill, name, lambda *a, n=name: record(n, *a))
+    monkeypatch.setattr(backfill, "backfill", lambda dry_run: record("backfill"))
+    monkeypatch.setattr(
+        backfill, "mirror_from_postgres", lambda full: record("mirror_from_postgres")
+    )
+
+
+def test_dry_run_does_not_sync(store, monkeypatch, capsys):
+    row = local_store._row("default", "maimai", date(2026, 10, 1), 2, 2)
+    asyncio.run(local_store._run(local_store._write, [row], False))
+    calls = []
+    _stub(monkeypatch, calls)
+
+    asyncio.run(backfill.run_backfill(dry_run=True))
+
+    assert calls == ["test_db_connection", "ensure_schema", "backfill"]
+    assert "1 local row(s) not synced yet" in capsys.readouterr().out
+
+
+def test_run_syncs_before_and_mirrors_after(store, monkeypatch):
+    calls = []
+    _stub(monkeypatch, calls)
+
+    asyncio.run(backfill.run_backfill(dry_run=False))
+
+    assert calls == [
+        "test_db_connection",
+        "ensure_schema",
+        "sync_to_postgres",
+        "backfill",
+        "mirror_from_postgres",
+    ]
+
+
+def _history_row(new_plays, cumulative, prev_cumulative=None, prev_date=None):
+    day = date(2026, 10, 8)
+    return {
+        "account": "alice",
+        "game": "maimai",
+        "play_date": day,
+        "new_plays": new_plays,
+        "cumulative": cumulative,
+        "prev_date": prev_date,
+        "prev_cumulative": prev_cumulative,
+    }
+
+
+def test_check_row_consistent_day():
+    row = _history_row(4, 14, 10, date(2026, 10, 7))
+    assert backfill._check_row(row, "spread") == ([], None)
+
+
+def test_check_row_recomputes_wrong_new_plays():
+    row = _history_row(9, 14, 10, date(2026, 10, 7))
+    assert backfill._check_row(row, "spread") == (
+        [("alice", "maimai", date(2026, 10, 8), 4, 14)],
+        None,
+    )
+
+
+def test_check_row_fills_a_gap():
+    row = _history_row(6, 16, 10, date(2026, 10, 5))
+    repairs, anomaly = backfill._check_row(row, "today")
+    assert repairs == [
+        ("alice", "maimai", date(2026, 10, 6), 0, 10),
+        ("alice", "maimai", date(2026, 10, 7), 0, 10),
+        ("alice", "maimai", date(2026, 10, 8), 6, 16),
+    ]
+    assert anomaly is None
+
+
+def test_check_row_reports_a_cumulative_going_down():
+    row = _history_row(0, 8, 10, date(2026, 10, 7))
+    repairs, anomaly = backfill._check_row(row, "spread")
+    assert repairs == []
+    assert "cumulative went down (10 → 8)" in anomaly
+
+
+def test_check_row_first_row():
+    assert backfill._check_row(_history_row(0, 500), "spread") == ([], None)
+    repairs, anomaly = backfill._check_row(_history_row(500, 500), "spread")
+    assert repairs == [] and "counts all 500 lifetime plays" in anomaly
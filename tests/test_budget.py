@@ -0,0 +1,133 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+from play_counter import budget, config, local_store
+from play_counter.pricing import load_pricing
+
+TODAY = date.today()
+# Ten days with four of them gone, so the forecast may extrapolate
+START = TODAY - timedelta(days=3)
+WINDOW = {"period": "custom", "start": str(START), "end": str(START + timedelta(9))}
+
+
+@pytest.fixture
+def rules(store, monkeypatch):
+    """Set BUDGETS (and a flat 40 THB per play) for the test."""
+    monkeypatch.setattr(config, "PRICING", [{"price": 40}])
+
+    def set_rules(*entries):
+        monkeypatch.setattr(config, "BUDGETS", list(entries))
+        budget.load_rules.cache_clear()
+
+    set_rules()
+    load_pricing.cache_clear()
+    yield set_rules
+    budget.load_rules.cache_clear()
+    load_pricing.cache_clear()
+
+
+def _write(rows, synced=False) -> list[str]:
+    rows = [local_store._row("default", game, *row) for game, *row in rows]
+    return asyncio.run(local_store._run(local_store._write, rows, synced))
+
+
+def _totals() -> list[tuple]:
+    def read(conn):
+        return [tuple(r) for r in conn.execute("SELECT rule, spent FROM budget_totals")]
+
+    return asyncio.run(local_store._run(read))
+
+
+def test_total_is_seeded_once_from_existing_plays(rules):
+    _write([("maimai", START, 2, 2)])
+    rules({"limit": 10000, **WINDOW})
+
+    _write([("maimai", START + timedelta(1), 3, 5)])
+    _write([("chunithm", START + timedelta(2), 1, 1)])
+
+    [(_, spent)] = _totals()
+    assert spent == 6 * 40
+
+
+def test_rewritten_day_corrects_the_total(rules):
+    rules({"limit": 10000, **WINDOW})
+    _write([("maimai", START, 2, 2), ("maimai", START + timedelta(1), 1, 3)])
+
+    _write([("maimai", START, 5, 5), ("maimai", START + timedelta(1), 1, 6)])
+
+    [(_, spent)] = _totals()
+    assert spent == 6 * 40
+
+
+def test_mirroring_keeps_unsynced_local_rows(rules):
+    rules({"limit": 10000, **WINDOW})
+    _write([("maimai", START, 3, 3)])
+
+    _write([("maimai", START, 1, 1)], synced=True)
+
+    rows = asyncio.run(local_store.get_play_rows(["maimai"]))
+    assert rows == [(START, "maimai", 3)]
+    [(_, spent)] = _totals()
+    assert spent == 3 * 40
+
+
+def _spent_alerts(alerts: list[str]) -> list[str]:
+    return [alert for alert in alerts if alert.startswith("💸")]
+
+
+def test_each_threshold_alerts_once(rules):
+    rules({"limit": 1000, "thresholds": [0.5, 0.8, 1], **WINDOW})
+
+    assert _write([("maimai", START, 5, 5)]) == []
+    half = _spent_alerts(_write([("maimai", START + timedelta(1), 8, 13)]))
+    assert len(half) == 1 and "520 of 1,000 THB spent (52%)" in half[0]
+    assert _spent_alerts(_write([("maimai", START + timedelta(2), 1, 14)])) == []
+    # 80% and 100% crossed by one write: one alert
+    over = _spent_alerts(_write([("maimai", START + timedelta(3), 12, 26)]))
+    assert len(over) == 1 and "(104%)" in over[0]
+    assert _write([("maimai", TODAY, 1, 27)]) == []
+
+
+def test_forecast_alerts_once(rules):
+    rules({"limit": 1000, "thresholds": [10], **WINDOW})
+
+    # 80 THB in the first four of ten days: on pace for 200 THB
+    assert _write([("maimai", START, 2, 2)]) == []
+    # 440 THB: on pace for 1,100 THB
+    forecast = _write([("maimai", START + timedelta(1), 9, 11)])
+    assert len(forecast) == 1 and "on pace for 1,100 THB" in forecast[0]
+    assert _write([("maimai", START + timedelta(2), 1, 12)]) == []
+
+
+def test_forecast_waits_for_the_first_days(rules):
+    start = TODAY - timedelta(days=budget.FORECAST_MIN_DAYS - 2)
+    end = start + timedelta(days=9)
+    rules(
+        {
+            "limit": 100,
+            "thresholds": [10],
+            "period": "custom",
+            "start": str(start),
+            "end": str(end),
+        }
+    )
+
+    assert _write([("maimai", start, 2, 2)]) == []
+
+
+def test_past_periods_do_not_alert(rules):
+    start = TODAY - timedelta(days=20)
+    rules(
+        {
+            "limit": 10,
+            "period": "custom",
+            "start": str(start),
+            "end": str(start + timedelta(days=6)),
+        }
+    )
+
+    assert _write([("maimai", start, 5, 5)]) == []
+    [(_, spent)] = _totals()
+    assert spent == 5 * 40
@@ -0,0 +1,58 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from play_counter import daemon
+from play_counter.daemon import Job, Scheduler
+
+
+@pytest.fixture(autouse=True)
+def quiet_flush(monkeypatch):
+    async def flush():
+        return True
+
+    monkeypatch.setattr(daemon.outbox, "flush", flush)
+    monkeypatch.setattr(daemon.metrics, "flush", lambda: None)
+
+
+def _every_day(after: datetime) -> datetime:
+    return after + timedelta(days=1)
+
+
+def test_failed_job_runs_its_retry():
+    calls = []
+
+    async def run():
+        calls.append("run")
+        raise RuntimeError("two scrapes failed")
+
+    async def retry():
+        calls.append("retry")
+
+    job = Job("scrape", run, _every_day, retry=retry)
+    scheduler = Scheduler([job], jitter=0)
+
+    asyncio.run(scheduler._execute(job))
+    assert job.failures == 1
+    assert job.due < datetime.now() + timedelta(hours=1)
+
+    asyncio.run(scheduler._execute(job))
+    assert calls == ["run", "retry"]
+    assert job.failures == 0
+    assert job.due > datetime.now() + timedelta(hours=23)
+
+
+def test_failed_job_without_retry_runs_again():
+    calls = []
+
+    async def run():
+        calls.append("run")
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+
+    job = Job("report", run, _every_day)
+    scheduler = Scheduler([job], jitter=0)
+    asyncio.run(scheduler._execute(job))
+    asyncio.run(scheduler._execute(job))
+    assert calls == ["run", "run"]
@@ -0,0 +1,147 @@
+import asyncio
+from datetime import date
+
+import pytest
+
+from play_counter import db, session_store
+
+
+@pytest.fixture
+def unreachable(monkeypatch):
+    """Make every connect attempt fail, counting the attempts."""
+    attempts = []
+
+    async def create_pool(*args, **kwargs):
+        attempts.append(kwargs.get("timeout"))
+        raise OSError("Connection refused")
+
+    monkeypatch.setattr(db.asyncpg, "create_pool", create_pool)
+    monkeypatch.setattr(db, "_pool", None)
+    monkeypatch.setattr(db, "_unreachable", None)
+    return attempts
+
+
+def test_failed_connect_is_remembered(unreachable):
+    async def run():
+        with pytest.raises(OSError):
+            await db.init_pool()
+        with pytest.raises(db.DatabaseUnreachable):
+            await db.init_pool()
+
+    asyncio.run(run())
+    assert unreachable == [db.CONNECT_TIMEOUT]
+
+
+def test_connect_is_retried_after_backoff(unreachable, monkeypatch):
+    async def run():
+        with pytest.raises(OSError):
+            await db.init_pool()
+        monkeypatch.setattr(db, "UNREACHABLE_BACKOFF", 0)
+        with pytest.raises(OSError):
+            await db.init_pool()
+
+    asyncio.run(run())
+    assert len(unreachable) == 2
+
+
+def test_session_store_skips_unreachable_database(unreachable):
+    async def run():
+        assert not await db.test_db_connection()
+        sessions = [session_store.load_session("maimai", f"a{i}") for i in range(8)]
+        assert await asyncio.gather(*sessions) == [None] * 8
+        await session_store.save_session("maimai", {}, "a0")
+
+    asyncio.run(run())
+    assert len(unreachable) == 1
+
+
+class _ListenConnection:
+    def __init__(self):
+        self.listeners = {}
+        self.on_terminate = []
+        self.closed = False
+
+    async def add_listener(self, channel, handler):
+        self.listeners[channel] = handler
+
+    def add_termination_listener(self, callback):
+        self.on_terminate.append(callback)
+
+    def drop(self):
+        self.closed = True
+        for callback in self.on_terminate:
+            asyncio.get_running_loop().call_soon(callback, self)
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.drop()
+
+
+def test_listen_reconnects_after_a_drop(monkeypatch):
+    connections = []
+    outcomes = iter([None, OSError("refused"), None])
+
+    async def connect(*args, **kwargs):
+        error = next(outcomes)
+        if error is not None:
+            raise error
+        connections.append(_ListenConnection())
+        return connections[-1]
+
+    monkeypatch.setattr(db.asyncpg, "connect", connect)
+    monkeypatch.setattr(db, "LISTEN_RETRY_DELAY", 0)
+    payloads = []
+
+    async def run():
+        async with db.listen("plays_changed", payloads.append):
+            first = connections[0]
+            first.listeners["plays_changed"](first, 1, "plays_changed", "alice")
+            first.drop()
+            for _ in range(10):
+                await asyncio.sleep(0)
+            second = connections[1]
+            second.listeners["plays_changed"](second, 1, "plays_changed", "bob")
+        assert second.closed
+
+    asyncio.run(run())
+    # None marks the reconnect, after which missed writes must be assumed
+    assert payloads == ["alice", None, "bob"]
+    assert len(connections) == 2
+
+
+MON, WED = date(2026, 10, 5), date(2026, 10, 7)
+
+
+def test_plan_daily_rows_fills_missed_days(monkeypatch):
+    monkeypatch.setattr(db, "GAP_STRATEGY", "spread")
+    last = {"alice": {"maimai": (MON, 10), "chunithm": (date(2026, 10, 6), 3)}}
+
+    rows, new = db.plan_daily_rows(WED, {"alice": {"maimai": 15, "chunithm": 3}}, last)
+
+    assert rows == [
+        ("alice", "maimai", date(2026, 10, 6), 2, 12),
+        ("alice", "maimai", WED, 3, 15),
+        ("alice", "chunithm", WED, 0, 3),
+    ]
+    assert new == {"alice": {"maimai": 3, "chunithm": 0}}
+
+
+def test_plan_daily_rows_first_reading(monkeypatch):
+    monkeypatch.setattr(db, "GAP_STRATEGY", "today")
+
+    rows, new = db.plan_daily_rows(WED, {"bob": {"maimai": 500}}, {})
+
+    assert rows == [("bob", "maimai", WED, 0, 500)]
+    assert new == {"bob": {"maimai": 0}}
+
+
+def test_plan_daily_rows_skips_a_cumulative_that_went_down(capsys):
+    last = {"alice": {"maimai": (MON, 10), "chunithm": (MON, 3)}}
+
+    rows, new = db.plan_daily_rows(WED, {"alice": {"maimai": 9, "chunithm": 3}}, last)
+
+    assert [row[1] for row in rows] == ["chunithm", "chunithm"]
+    assert "maimai" not in new["alice"]
+    assert "cumulative went down (10" in capsys.readouterr().out
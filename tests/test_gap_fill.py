@@ -0,0 +1,37 @@
+from datetime import date
+
+from play_counter.utils.gap_fill import fill_gap
+
+MON, TUE, WED, THU = (date(2026, 10, d) for d in (5, 6, 7, 8))
+
+
+def test_next_day_gets_the_whole_difference():
+    assert fill_gap(MON, 10, TUE, 14) == [(TUE, 4, 14)]
+
+
+def test_spread_gives_the_remainder_to_the_latest_days():
+    assert fill_gap(MON, 10, THU, 18, "spread") == [
+        (TUE, 2, 12),
+        (WED, 3, 15),
+        (THU, 3, 18),
+    ]
+
+
+def test_spread_of_fewer_plays_than_days():
+    assert fill_gap(MON, 10, THU, 11, "spread") == [
+        (TUE, 0, 10),
+        (WED, 0, 10),
+        (THU, 1, 11),
+    ]
+
+
+def test_today_puts_every_play_on_the_last_day():
+    assert fill_gap(MON, 10, THU, 18, "today") == [
+        (TUE, 0, 10),
+        (WED, 0, 10),
+        (THU, 8, 18),
+    ]
+
+
+def test_first_row_without_history_counts_no_plays():
+    assert fill_gap(None, 0, THU, 1234) == [(THU, 0, 1234)]
@@ -0,0 +1,45 @@
+import pytest
+
+from play_counter.metrics import HISTOGRAM_BUCKETS, Histogram, Metrics
+
+
+def test_histogram_keeps_a_fixed_size():
+    hist = Histogram()
+    for i in range(10_000):
+        hist.observe((i % 100) / 100)
+
+    assert len(hist.counts) == len(HISTOGRAM_BUCKETS) + 1
+    assert hist.count == 10_000
+    assert hist.sum == pytest.approx(4950)
+    assert hist.max == 0.99
+
+
+def test_histogram_quantiles_stay_within_their_bucket():
+    hist = Histogram()
+    for value in [0.2] * 90 + [3] * 9 + [100]:
+        hist.observe(value)
+
+    assert 0.1 < hist.quantile(0.5) <= 0.25
+    assert 2.5 < hist.quantile(0.95) <= 5
+    assert hist.quantile(1) == 100
+    assert Histogram().quantile(0.5) == 0
+
+
+def test_prometheus_buckets_are_cumulative(tmp_path):
+    metrics = Metrics()
+    for value in (0.005, 0.3, 0.3, 45, 120):
+        metrics.observe("stage_seconds", value, stage="scrape")
+    path = tmp_path / "metrics.prom"
+
+    metrics.write_prometheus(str(path))
+
+    lines = dict(
+        line.rsplit(" ", 1) for line in path.read_text().splitlines() if "#" not in line
+    )
+    prefix = 'play_counter_stage_seconds_bucket{stage="scrape",'
+    assert lines[prefix + 'le="0.01"}'] == "1"
+    assert lines[prefix + 'le="0.5"}'] == "3"
+    assert lines[prefix + 'le="60"}'] == "4"
+    assert lines[prefix + 'le="+Inf"}'] == "5"
+    assert lines['play_counter_stage_seconds_count{stage="scrape"}'] == "5"
+    assert float(lines['play_counter_stage_seconds_sum{stage="scrape"}']) == 165.605
@@ -0,0 +1,106 @@
+import asyncio
+import json
+import time
+
+from play_counter.notifications import DiscordQueue, _merge
+
+
+def _replies(*responses):
+    """Route handler answering with each of `responses` in turn, then the last."""
+    replies = list(responses)
+
+    def handler(cookie):
+        return replies.pop(0) if len(replies) > 1 else replies[0]
+
+    return handler
+
+
+def test_429_waits_for_retry_after(site):
+    site.routes["/webhook"] = _replies(
+        (429, {"Retry-After": "0.2"}, b'{"retry_after": 5}'), (204, {}, b"")
+    )
+    queue = DiscordQueue(base_delay=30)
+    queue.enqueue(site.base_url + "/webhook", {"content": "hi"})
+
+    started = time.monotonic()
+    assert asyncio.run(queue.flush())
+    waited = time.monotonic() - started
+
+    assert len(site.posts) == 2
+    # Retry-After, not the 30s backoff or the body's retry_after
+    assert 0.2 <= waited < 5
+
+
+def test_4xx_gives_up_without_retrying(site):
+    site.routes["/webhook"] = _replies((400, {}, b'{"message": "bad"}'))
+    queue = DiscordQueue(base_delay=0)
+    queue.enqueue(site.base_url + "/webhook", {"content": "hi"})
+
+    assert not asyncio.run(queue.flush())
+    assert len(site.posts) == 1
+
+
+def test_5xx_is_retried(site):
+    site.routes["/webhook"] = _replies((500, {}, b"oops"), (200, {}, b"{}"))
+    queue = DiscordQueue(base_delay=0)
+    queue.enqueue(site.base_url + "/webhook", {"content": "hi"})
+
+    assert asyncio.run(queue.flush())
+    assert len(site.posts) == 2
+
+
+def test_messages_to_one_webhook_go_out_as_one_post(site):
+    site.routes["/webhook"] = _replies((204, {}, b""))
+    queue = DiscordQueue(base_delay=0)
+    url = site.base_url + "/webhook"
+    queue.enqueue(url, {"username": "bot", "content": "maimai"}, label="maimai")
+    queue.enqueue(url, {"content": "report"}, files={"chart.png": b"\x89PNG"})
+
+    assert asyncio.run(queue.flush())
+
+    [(path, content_type, body)] = site.posts
+    assert content_type.startswith("multipart/form-data")
+    assert b'filename="chart.png"' in body
+    assert b'"description": "maimai"' in body
+
+
+def test_merge_folds_messages_into_embeds():
+    messages = [
+        ("a", {"username": "bot", "avatar_url": "u", "content": "one"}, {}),
+        ("b", {"content": "two", "embeds": [{"title": "t"}]}, {"b.png": b""}),
+    ]
+
+    [(label, payload, files)] = _merge(messages)
+
+    assert label == "a, b"
+    assert payload == {
+        "username": "bot",
+        "avatar_url": "u",
+        "embeds": [
+            {"description": "one", "author": {"name": "bot", "icon_url": "u"}},
+            {"description": "two"},
+            {"title": "t"},
+        ],
+    }
+    assert files == {"b.png": b""}
+
+
+def test_merge_keeps_each_message_in_one_post():
+    messages = [(str(i), {"content": str(i), "embeds": [{}] * 3}, {}) for i in range(3)]
+
+    posts = _merge(messages)
+
+    # 4 embeds per message: two fit in a post, the third starts a new one
+    assert [label for label, _, _ in posts] == ["0, 1", "2"]
+    assert [len(payload["embeds"]) for _, payload, _ in posts] == [8, 4]
+
+
+def test_single_message_is_posted_as_is(site):
+    site.routes["/webhook"] = _replies((200, {}, b"{}"))
+    queue = DiscordQueue(base_delay=0)
+    queue.enqueue(site.base_url + "/webhook", {"content": "hi"})
+
+    assert asyncio.run(queue.flush())
+    [(_, content_type, body)] = site.posts
+    assert content_type == "application/json"
+    assert json.loads(body) == {"content": "hi"}
@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from play_counter.pipeline import Stage, run_stages
+
+
+async def _value(value, delay: float = 0):
+    await asyncio.sleep(delay)
+    return value
+
+
+async def _fail(delay: float = 0):
+    await asyncio.sleep(delay)
+    raise RuntimeError("boom")
+
+
+def test_optional_stage_failure_keeps_the_run_going():
+    stages = [
+        Stage("report", lambda r: _fail(), optional=True),
+        Stage("scrape", lambda r: _value(1, delay=0.05)),
+        Stage("upsert", lambda r: _value(r["scrape"] + 1), deps=("scrape",)),
+        Stage("after_report", lambda r: _value(r["report"]), deps=("report",)),
+    ]
+
+    results = asyncio.run(run_stages(stages))
+
+    assert results == {"report": None, "scrape": 1, "upsert": 2, "after_report": None}
+
+
+def test_required_stage_failure_cancels_the_rest():
+    finished = []
+
+    async def slow(r):
+        await asyncio.sleep(1)
+        finished.append("slow")
+
+    stages = [Stage("scrape", lambda r: _fail()), Stage("upsert", slow)]
+
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(run_stages(stages))
+    assert finished == []
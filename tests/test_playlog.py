@@ -0,0 +1,41 @@
+from datetime import datetime
+
+import pytest
+
+from play_counter.playlog import parse_playlog_html
+
+EXPECTED = {
+    "chunithm": [
+        (datetime(2025, 6, 14, 21, 40), 3, "Ｇｒａｖｉｔｙ & Light"),
+        (datetime(2025, 6, 14, 21, 36), 2, "Sqrt (remix)"),
+        (datetime(2025, 6, 13, 19, 5), 1, "Opening"),
+    ],
+    "maimai": [
+        (datetime(2025, 6, 14, 21, 12), 4, "ハローショッピング"),
+        (datetime(2025, 6, 14, 21, 8), 3, "Rock & Roll"),
+        (datetime(2025, 6, 12, 18, 30), 1, "Splash"),
+    ],
+}
+
+
+def _chunks(text: str, size: int) -> list[str]:
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("game", ["maimai", "chunithm"])
+@pytest.mark.parametrize("chunk_size", [None, 1, 7, 512])
+def test_parse_playlog(saved_page, game, chunk_size):
+    html = saved_page(f"{game}_playlog.html")
+    chunks = [html] if chunk_size is None else _chunks(html, chunk_size)
+    assert list(parse_playlog_html(game, chunks)) == EXPECTED[game]
+
+
+@pytest.mark.parametrize("game", ["maimai", "chunithm"])
+def test_parse_playlog_stops_at_high_water_mark(saved_page, game):
+    html = saved_page(f"{game}_playlog.html")
+    since = EXPECTED[game][1][0]
+    assert list(parse_playlog_html(game, _chunks(html, 7), since)) == EXPECTED[game][:2]
+
+
+def test_parse_playlog_without_entries(saved_page):
+    assert list(parse_playlog_html("maimai", [saved_page("aime_login.html")])) == []
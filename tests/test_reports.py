@@ -0,0 +1,49 @@
+import asyncio
+from datetime import date, timedelta
+
+from play_counter import local_store
+from play_counter.reports import weekly
+
+MONDAY = date(2026, 10, 5)
+SUNDAY = MONDAY + timedelta(days=6)
+
+
+def test_weekly_report_has_a_section_per_account(store, monkeypatch):
+    rows = [
+        local_store._row("alice", "maimai", MONDAY, 3, 3),
+        local_store._row("alice", "chunithm", MONDAY + timedelta(days=2), 2, 2),
+        local_store._row("bob", "maimai", MONDAY + timedelta(days=1), 4, 4),
+    ]
+    asyncio.run(local_store._run(local_store._write, rows, False))
+
+    accounts = [{"name": "alice"}, {"name": "bob"}]
+    monkeypatch.setattr("play_counter.reports.common.ACCOUNTS", accounts)
+    monkeypatch.setattr(weekly, "last_week_range", lambda: (MONDAY, SUNDAY))
+
+    async def no_chart(*args, **kwargs):
+        return [], {}
+
+    monkeypatch.setattr(weekly, "chart_attachment", no_chart)
+    sent = []
+    monkeypatch.setattr(
+        weekly.outbox,
+        "enqueue",
+        lambda url, message, label, files: sent.append(message["content"]),
+    )
+
+    asyncio.run(weekly.generate_weekly_report())
+
+    headings = [content.split("\n")[0] for content in sent]
+    assert headings == [
+        "📊 **Last Week Play Report · alice**",
+        "📊 **Last Week Play Report · bob**",
+        "📊 **Last Week Play Report · All accounts**",
+    ]
+    totals = [
+        line for content in sent for line in content.split("\n") if "Total" in line
+    ]
+    assert [line.split(" plays")[0] for line in totals] == [
+        "**Total**: 5",
+        "**Total**: 4",
+        "**Total**: 9",
+    ]
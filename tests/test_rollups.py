@@ -0,0 +1,32 @@
+from datetime import date
+
+from play_counter.rollups import split_range
+from play_counter.utils.date_helpers import period_end
+
+
+def test_split_range_uses_the_largest_whole_periods():
+    periods, days = split_range(date(2024, 12, 28), date(2026, 3, 4))
+
+    assert periods == [
+        ("year", date(2025, 1, 1)),
+        ("month", date(2026, 1, 1)),
+        ("month", date(2026, 2, 1)),
+    ]
+    assert days == [date(2024, 12, d) for d in range(28, 32)] + [
+        date(2026, 3, d) for d in range(1, 5)
+    ]
+
+
+def test_split_range_falls_back_to_weeks_and_days():
+    periods, days = split_range(date(2026, 9, 30), date(2026, 10, 14))
+
+    assert periods == [("week", date(2026, 10, 5))]
+    assert days == [date(2026, 9, 30)] + [
+        date(2026, 10, d) for d in (1, 2, 3, 4, 12, 13, 14)
+    ]
+
+
+def test_period_end():
+    assert period_end("week", date(2026, 10, 14)) == date(2026, 10, 18)
+    assert period_end("month", date(2024, 2, 10)) == date(2024, 2, 29)
+    assert period_end("year", date(2026, 5, 5)) == date(2026, 12, 31)
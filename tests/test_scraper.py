@@ -0,0 +1,429 @@
+import asyncio
+from html.parser import HTMLParser
+from types import SimpleNamespace
+
+import pytest
+
+from play_counter import scraper
+from play_counter.login_flow import AuthFailed, TransientError
+from play_counter.scraper import (
+    HttpEngine,
+    SessionExpired,
+    UnreadablePlayCount,
+    fetch_all,
+    parse_play_count_html,
+)
+
+
+def _chunks(text: str, size: int) -> list[str]:
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("game, count", [("maimai", 12345), ("chunithm", 678)])
+@pytest.mark.parametrize("chunk_size", [None, 1, 7, 512])
+def test_parse_play_count(saved_page, game, count, chunk_size):
+    html = saved_page(f"{game}_player_data.html")
+    chunks = [html] if chunk_size is None else _chunks(html, chunk_size)
+    assert parse_play_count_html(game, chunks) == count
+
+
+def test_parse_play_count_missing_element(saved_page):
+    assert parse_play_count_html("maimai", [saved_page("aime_login.html")]) is None
+
+
+def test_parse_play_count_unreadable(saved_page):
+    html = saved_page("maimai_player_data_maintenance.html")
+    with pytest.raises(UnreadablePlayCount):
+        parse_play_count_html("maimai", [html])
+
+
+class _SavedPage:
+    """
+    A saved page behind just enough of Playwright's page API for
+    `_parse_play_count`: `locator("div.a.b div.c").inner_text()` returns the
+    text of the first div matching that chain of descendant class selectors.
+    """
+
+    def __init__(self, html: str):
+        self.html = html
+
+    def locator(self, selector):
+        self.chain = [set(part.split(".")[1:]) for part in selector.split()]
+        return self
+
+    async def inner_text(self, timeout):
+        finder = _DivText(self.chain)
+        finder.feed(self.html)
+        if finder.text is None:
+            raise scraper.PlaywrightTimeout("no element")
+        return finder.text
+
+
+class _DivText(HTMLParser):
+    def __init__(self, chain):
+        super().__init__(convert_charrefs=True)
+        self.chain, self.stack, self.depth, self.parts = chain, [], None, []
+
+    def handle_starttag(self, tag, attrs):
+        if tag != "div":
+            return
+        self.stack.append(set((dict(attrs).get("class") or "").split()))
+        if self.depth is None and self.chain[-1] <= self.stack[-1]:
+            ancestors = iter(self.stack[:-1])
+            # Each earlier selector must match some ancestor, in order
+            if all(any(c <= a for a in ancestors) for c in self.chain[:-1]):
+                self.depth = len(self.stack)
+
+    def handle_endtag(self, tag):
+        if tag == "div" and self.stack:
+            if self.depth == len(self.stack):
+                self.depth = -1
+            self.stack.pop()
+
+    def handle_data(self, data):
+        if self.depth is not None and self.depth > 0:
+            self.parts.append(data)
+
+    @property
+    def text(self):
+        return "".join(self.parts) if self.depth is not None else None
+
+
+@pytest.mark.parametrize("game, count", [("maimai", 12345), ("chunithm", 678)])
+def test_playwright_path_reads_saved_page(saved_page, game, count):
+    page = _SavedPage(saved_page(f"{game}_player_data.html"))
+    assert asyncio.run(scraper._parse_play_count(page, game)) == count
+
+
+def test_playwright_path_unreadable(saved_page):
+    page = _SavedPage(saved_page("maimai_player_data_maintenance.html"))
+    with pytest.raises(UnreadablePlayCount):
+        asyncio.run(scraper._parse_play_count(page, "maimai"))
+
+
+@pytest.mark.parametrize(
+    "game, text, count",
+    [
+        ("maimai", "maimaiDX total play count：\n  42\n", 42),
+        ("chunithm", " 1234 ", 1234),
+    ],
+)
+def test_extract_play_count(game, text, count):
+    assert scraper._extract_play_count(game, text) == count
+
+
+@pytest.mark.parametrize(
+    "game, text",
+    [
+        ("maimai", "maimaiDX total play count：---"),
+        # Full-width colon decoded as ISO-8859-1
+        ("maimai", "maimaiDX total play countï¼\x9a 42"),
+        ("chunithm", "12,345"),
+        ("chunithm", ""),
+    ],
+)
+def test_extract_play_count_unreadable(game, text):
+    with pytest.raises(UnreadablePlayCount):
+        scraper._extract_play_count(game, text)
+
+
+class _Abstract(scraper.ScrapeEngine):
+    pass
+
+
+def test_scrape_engine_is_abstract():
+    with pytest.raises(TypeError):
+        _Abstract()
+
+
+@pytest.fixture
+def session_store(monkeypatch):
+    """In-memory stand-in for the session store the scraper reads and writes."""
+    store = SimpleNamespace(states={}, saved={})
+
+    async def load_session(game, account):
+        return store.states.get((account, game))
+
+    async def save_session(game, storage_state, account):
+        store.saved[account, game] = storage_state
+
+    monkeypatch.setattr(scraper, "load_session", load_session)
+    monkeypatch.setattr(scraper, "save_session", save_session)
+    return store
+
+
+def _storage_state(**cookies) -> dict:
+    return {
+        "cookies": [
+            {"name": name, "value": value, "domain": "127.0.0.1", "path": "/"}
+            for name, value in cookies.items()
+        ],
+        "origins": [],
+    }
+
+
+def _serve(monkeypatch, site, game: str, route):
+    path = f"/{game}/playerData/"
+    site.routes[path] = route
+    monkeypatch.setitem(scraper.PLAYER_DATA_URLS, game, site.base_url + path)
+
+
+def _fetch(game: str, name: str) -> int:
+    return asyncio.run(HttpEngine().fetch(game, {"name": name}))
+
+
+def test_http_engine_reads_utf8_page_without_charset(
+    monkeypatch, site, saved_page, session_store
+):
+    # requests would decode this as ISO-8859-1 and garble "："
+    body = saved_page("maimai_player_data.html").encode("utf-8")
+    _serve(
+        monkeypatch,
+        site,
+        "maimai",
+        lambda cookie: (200, {"Content-Type": "text/html"}, body),
+    )
+    session_store.states["alice", "maimai"] = _storage_state(clal="alice")
+
+    assert _fetch("maimai", "alice") == 12345
+    assert site.requests == [("/maimai/playerData/", "clal=alice")]
+
+
+def test_http_engine_raises_on_unreadable_count(
+    monkeypatch, site, saved_page, session_store
+):
+    body = saved_page("maimai_player_data_maintenance.html").encode("utf-8")
+    _serve(monkeypatch, site, "maimai", lambda cookie: (200, {}, body))
+    session_store.states["alice", "maimai"] = _storage_state(clal="alice")
+
+    with pytest.raises(UnreadablePlayCount):
+        _fetch("maimai", "alice")
+
+
+def test_http_engine_expired_session(monkeypatch, site, saved_page, session_store):
+    login = saved_page("aime_login.html").encode("utf-8")
+    site.routes["/login"] = lambda cookie: (200, {}, login)
+    _serve(
+        monkeypatch, site, "chunithm", lambda cookie: (302, {"Location": "/login"}, b"")
+    )
+    session_store.states["alice", "chunithm"] = _storage_state(clal="alice")
+
+    with pytest.raises(SessionExpired):
+        _fetch("chunithm", "alice")
+    assert session_store.saved == {}
+
+
+def test_http_engine_keeps_cookies_per_account(
+    monkeypatch, site, saved_page, session_store
+):
+    body = saved_page("chunithm_player_data.html").encode("utf-8")
+
+    def player_data(cookie):
+        # The site renews alice's session only
+        renewed = {"Set-Cookie": "token=alice-renewed; Path=/"}
+        return 200, renewed if "clal=alice" in cookie else {}, body
+
+    _serve(monkeypatch, site, "chunithm", player_data)
+    session_store.states["alice", "chunithm"] = _storage_state(clal="alice")
+    session_store.states["bob", "chunithm"] = _storage_state(clal="bob")
+
+    engine = HttpEngine()
+
+    async def fetch_both():
+        await engine.fetch("chunithm", {"name": "alice"})
+        await engine.fetch("chunithm", {"name": "bob"})
+
+    asyncio.run(fetch_both())
+
+    assert [cookie for _, cookie in site.requests] == ["clal=alice", "clal=bob"]
+    saved = session_store.saved["alice", "chunithm"]["cookies"]
+    assert {c["name"]: c["value"] for c in saved} == {
+        "clal": "alice",
+        "token": "alice-renewed",
+    }
+    assert ("bob", "chunithm") not in session_store.saved
+
+
+class _Engine:
+    def __init__(self, name: str, outcomes: dict):
+        self.name = name
+        self.outcomes = outcomes
+
+    async def fetch(self, game, account):
+        outcome = self.outcomes[account["name"], game]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def test_fetch_all_reports_failed_pairs(monkeypatch):
+    monkeypatch.setattr(scraper, "send_discord_notification", lambda *args: None)
+    outcomes = {
+        ("alice", "maimai"): 10,
+        ("alice", "chunithm"): TransientError("timed out"),
+        ("bob", "maimai"): AuthFailed("wrong password"),
+        ("bob", "chunithm"): 20,
+    }
+    engines = [
+        _Engine("http", {pair: SessionExpired("expired") for pair in outcomes}),
+        _Engine("playwright", outcomes),
+    ]
+    pool = SimpleNamespace(record=lambda *args: None)
+    accounts = [{"name": "alice"}, {"name": "bob"}]
+    failed = {}
+
+    results = asyncio.run(
+        fetch_all(
+            accounts, ["maimai", "chunithm"], pool, engines=engines, failed=failed
+        )
+    )
+
+    assert results == {"alice": {"maimai": 10}, "bob": {"chunithm": 20}}
+    assert {pair: e.auth_failed for pair, e in failed.items()} == {
+        ("alice", "chunithm"): False,
+        ("bob", "maimai"): True,
+    }
+
+
+def test_fetch_all_scrapes_only_given_pairs(monkeypatch):
+    engine = _Engine("http", {("alice", "chunithm"): 7})
+    pool = SimpleNamespace(record=lambda *args: None)
+    alice = {"name": "alice"}
+
+    results = asyncio.run(
+        fetch_all(
+            [alice],
+            ["maimai", "chunithm"],
+            pool,
+            engines=[engine],
+            pairs=[(alice, "chunithm")],
+        )
+    )
+
+    assert results == {"alice": {"chunithm": 7}}
+
+
+class _LoginPage:
+    """Just enough of a Playwright page for `_wait_for_home`."""
+
+    url = "https://lng-tgk-aime-gw.am-all.net/common_auth/login"
+
+    def __init__(self, home, error_box, message="Incorrect SEGA ID or password"):
+        self.home, self.error_box, self.message = home, error_box, message
+        self.cancelled = []
+        self.first = self
+
+    async def _outcome(self, name, outcome):
+        delay, error = outcome
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(name)
+            raise
+        if error is not None:
+            raise error
+
+    def wait_for_url(self, url, wait_until):
+        return self._outcome("home", self.home)
+
+    def locator(self, selector):
+        return self
+
+    def wait_for(self, state):
+        return self._outcome("error box", self.error_box)
+
+    async def inner_text(self):
+        return self.message
+
+
+def _wait(page) -> None:
+    asyncio.run(scraper._wait_for_home(page, "maimai"))
+
+
+def test_wait_for_home_reaches_home():
+    page = _LoginPage(home=(0, None), error_box=(1, None))
+    _wait(page)
+    assert page.cancelled == ["error box"]
+
+
+def test_wait_for_home_rejected_login():
+    page = _LoginPage(home=(1, None), error_box=(0, None))
+    with pytest.raises(AuthFailed, match="Incorrect SEGA ID"):
+        _wait(page)
+    assert page.cancelled == ["home"]
+
+
+def test_wait_for_home_outlives_a_failed_error_box_wait():
+    page = _LoginPage(home=(0.05, None), error_box=(0, RuntimeError("detached")))
+    _wait(page)
+    assert page.cancelled == []
+
+
+def test_wait_for_home_failure_is_transient():
+    page = _LoginPage(
+        home=(0.05, RuntimeError("Timeout 30000ms exceeded.\ncall log")),
+        error_box=(0, RuntimeError("detached")),
+    )
+    with pytest.raises(TransientError, match="Timeout 30000ms exceeded.$"):
+        _wait(page)
+
+
+class _CheckboxPage:
+    """
+    Just enough of a Playwright page for `_ensure_checked`: each click
+    toggles the box, and `registers` says whether a click shows up before
+    the checked wait times out (False), after it (True) or never (None).
+    """
+
+    def __init__(self, registers):
+        self.registers = list(registers)
+        self.box_checked = False
+        self.pending = None
+        self.clicks = 0
+
+    def locator(self, selector):
+        return _Checkbox(self)
+
+    def get_by_text(self, text):
+        return _Checkbox(self)
+
+
+class _Checkbox:
+    def __init__(self, page):
+        self.page = page
+
+    async def click(self):
+        self.page.clicks += 1
+        self.page.pending = self.page.registers.pop(0)
+        if self.page.pending is False:
+            self.page.box_checked = not self.page.box_checked
+
+    async def wait_for(self, state, timeout):
+        if not self.page.box_checked:
+            if self.page.pending:
+                # The click lands just after the wait gave up
+                self.page.box_checked = not self.page.box_checked
+            raise scraper.PlaywrightTimeout("timed out")
+
+    async def is_checked(self):
+        return self.page.box_checked
+
+
+@pytest.mark.parametrize("game", ["maimai", "chunithm"])
+def test_ensure_checked_does_not_undo_a_late_click(game):
+    page = _CheckboxPage(registers=[True])
+    asyncio.run(scraper._ensure_checked(page, game))
+    assert page.clicks == 1 and page.box_checked
+
+
+def test_ensure_checked_clicks_again_while_unchecked():
+    page = _CheckboxPage(registers=[None, False])
+    asyncio.run(scraper._ensure_checked(page, "maimai"))
+    assert page.clicks == 2 and page.box_checked
+
+
+def test_ensure_checked_gives_up():
+    page = _CheckboxPage(registers=[None] * scraper.CHECKBOX_CLICKS)
+    with pytest.raises(scraper.SelectorChanged):
+        asyncio.run(scraper._ensure_checked(page, "maimai"))
+    assert page.clicks == scraper.CHECKBOX_CLICKS